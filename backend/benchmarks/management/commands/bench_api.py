@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.scenarios import SCENARIOS, ScenarioContext, run_scenario, scenario_environment
+from benchmarks.seed import SCALES, seed_marketplace
+from benchmarks.utils import benchmark_database
+from market.view_counter import view_counter
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a throwaway database (users, profiles, shoes, galleries, wishlists, "
+        "reviews) and replays the scripted API scenarios in benchmarks/scenarios.py, "
+        "reporting throughput, latency percentiles and queries per request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES), default='small')
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--scenarios', default='',
+                            help='Comma-separated scenario names (default: all).')
+        parser.add_argument('--check', action='store_true',
+                            help='Exit with an error if a scenario exceeds its thresholds.')
+        parser.add_argument('--latency-slack', type=float, default=1.0,
+                            help='Multiplier for the p99 thresholds (slow machines).')
+
+    def handle(self, *args, **options):
+        wanted = {name.strip() for name in options['scenarios'].split(',') if name.strip()}
+        scenarios = [s for s in SCENARIOS if not wanted or s.name in wanted]
+        unknown = wanted - {s.name for s in SCENARIOS}
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        violations = []
+        with benchmark_database():
+            start = time.perf_counter()
+            ids = seed_marketplace(options['scale'])
+            self.stdout.write(
+                f"Seeded '{options['scale']}' ({SCALES[options['scale']]}) "
+                f"in {time.perf_counter() - start:.1f}s; {options['iterations']} requests per scenario\n")
+
+            with scenario_environment() as (issuer, client):
+                ctx = ScenarioContext.build(issuer, ids['seller_ids'], ids['buyer_ids'], ids['shoe_ids'])
+                for scenario in scenarios:
+                    result = run_scenario(client, scenario, ctx, options['iterations'], options['warmup'])
+                    self.stdout.write(result.format())
+                    violations += [f'{scenario.name}: {v}' for v in result.violations(options['latency_slack'])]
+            view_counter.flush()  # before the database goes away
+
+        if violations:
+            message = 'Thresholds exceeded:\n  ' + '\n  '.join(violations)
+            if options['check']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
@@ -0,0 +1,232 @@
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.seed import seed_shoes, seed_users
+from benchmarks.stub_issuer import STUB_ANON_KEY, StubIssuer
+from benchmarks.utils import benchmark_database, format_summary, summarize
+from market.models import Shoe, Wishlist
+from users.models import Profile
+
+# label -> gunicorn arguments
+SERVERS = {
+    'wsgi sync': ['config.wsgi:application'],
+    'wsgi gthread x4': ['config.wsgi:application', '-k', 'gthread', '--threads', '4'],
+    'asgi uvicorn': ['config.asgi:application', '-k', 'uvicorn_worker.UvicornWorker'],
+}
+
+# Every request claims to have come through the TLS-terminating proxy
+BASE_HEADERS = {'X-Forwarded-Proto': 'https', 'Accept': 'application/json'}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # "pid (comm) state ppid ..." - comm may contain spaces
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+
+class Server:
+    """A gunicorn master with `workers` workers on a free local port."""
+
+    def __init__(self, args, workers, env):
+        self.port = free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        self.command = [
+            sys.executable, '-m', 'gunicorn', *args,
+            '--workers', str(workers), '--bind', f'127.0.0.1:{self.port}',
+            '--log-level', 'warning', '--timeout', '120',
+        ]
+        self.env = env
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.command, cwd=settings.BASE_DIR, env=self.env)
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError(f'{" ".join(self.command)} exited with {self.process.returncode}')
+            try:
+                if httpx.get(f'{self.url}/api/shoes/', headers=BASE_HEADERS, timeout=5).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.__exit__()
+        raise CommandError(f'{" ".join(self.command)} did not come up')
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def worker_rss(self):
+        return [rss_mb(pid) for pid in child_pids(self.process.pid)]
+
+
+async def drive(base_url, routes, token, concurrency, duration, auth_ratio):
+    """Closed-loop load: `concurrency` clients, each firing its next request on completion."""
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=BASE_HEADERS, limits=limits, timeout=60) as client:
+        async def client_loop(n):
+            nonlocal errors
+            rng = random.Random(n)
+            while time.perf_counter() < deadline:
+                path, needs_auth = rng.choice(routes)()
+                headers = {}
+                if needs_auth or rng.random() < auth_ratio:
+                    headers['Authorization'] = f'Bearer {token}'
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path, headers=headers)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(client_loop(n) for n in range(concurrency)))
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the read endpoints (shoe list/detail, profile, favorites) under "
+        "gunicorn sync and gthread workers (config.wsgi) and uvicorn workers "
+        "(config.asgi, async read views), each with as many workers as fit in "
+        "--memory-mb, with Supabase token checks against a slow stub issuer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--memory-mb', type=float, default=600,
+                            help='RSS budget for all workers of one server.')
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument('--duration', type=float, default=15, help='Seconds of load per server.')
+        parser.add_argument('--shoes', type=int, default=2000)
+        parser.add_argument('--auth-ratio', type=float, default=0.5,
+                            help='Share of (optionally authenticated) requests that send a token.')
+        parser.add_argument('--auth-mode', choices=['remote', 'local'], default='remote')
+        parser.add_argument('--issuer-latency-ms', type=float, default=50,
+                            help='Delay the stub issuer adds to every /auth/v1/user call.')
+        parser.add_argument('--servers', default=','.join(SERVERS),
+                            help=f"Comma-separated subset of: {', '.join(SERVERS)}")
+
+    def seed(self, count):
+        seller_ids = seed_users(50, prefix='seller')
+        for _ in seed_shoes(count, seller_ids):
+            pass
+        user = User.objects.create_user(username='bench', email='bench@example.com', password='x')
+        Profile.objects.create(user=user, phone_number='+10000000000')
+        shoe_ids = list(Shoe.objects.values_list('pk', flat=True))
+        Wishlist.objects.bulk_create(
+            [Wishlist(user=user, shoe_id=pk) for pk in random.Random(1).sample(shoe_ids, 20)])
+        usernames = list(User.objects.filter(pk__in=seller_ids).values_list('username', flat=True))
+        return user, shoe_ids, usernames
+
+    def handle(self, *args, **options):
+        labels = [label.strip() for label in options['servers'].split(',')]
+        unknown = set(labels) - set(SERVERS)
+        if unknown:
+            raise CommandError(f"Unknown servers: {', '.join(sorted(unknown))}")
+
+        with benchmark_database(), \
+                StubIssuer(latency=options['issuer_latency_ms'] / 1000) as issuer:
+            user, shoe_ids, usernames = self.seed(options['shoes'])
+            token = issuer.issue(user.email)
+            rng = random.Random(7)
+            routes = [
+                lambda: ('/api/shoes/', False),
+                lambda: (f'/api/shoes/?brand=Nike&page={rng.randint(1, 3)}', False),
+                lambda: (f'/api/shoes/{rng.choice(shoe_ids)}/', False),
+                lambda: (f'/api/shoes/{rng.choice(shoe_ids)}/', False),
+                lambda: (f'/api/profiles/{rng.choice(usernames)}/', False),
+                lambda: ('/api/shoes/favorites/', True),
+            ]
+            env = {
+                **os.environ,
+                'DJANGO_SETTINGS_MODULE': 'benchmarks.server_settings',
+                'BENCH_DATABASE': str(connection.settings_dict['NAME']),
+                'DEBUG': 'False',
+                'DATABASE_URL': '',
+                'REDIS_URL': '',
+                'SUPABASE_URL': issuer.url,
+                'SUPABASE_KEY': STUB_ANON_KEY,
+                'SUPABASE_JWT_SECRET': issuer.secret,
+                'SUPABASE_AUTH_MODE': options['auth_mode'],
+                'SUPABASE_AUTH_CACHE_SIZE': '0',  # every token is verified
+                'SUPABASE_AUTH_SHARED_CACHE': '',
+                'PYTHONWARNINGS': 'ignore::UserWarning',  # no collectstatic output here
+            }
+            connection.close()  # the servers get the SQLite file to themselves
+
+            self.stdout.write(
+                f"{len(shoe_ids)} shoes, {options['concurrency']} concurrent clients, "
+                f"{options['duration']:.0f}s per server, {options['memory_mb']:.0f} MB worker budget, "
+                f"auth {options['auth_mode']} ({options['issuer_latency_ms']:.0f}ms issuer), "
+                f"{options['auth_ratio']:.0%} authenticated\n")
+
+            for label in labels:
+                args = SERVERS[label]
+                # 1. Size one warmed-up worker, 2. fill the budget with workers, 3. load test
+                with Server(args, 1, env) as probe:
+                    asyncio.run(drive(probe.url, routes, token, options['concurrency'], 3, options['auth_ratio']))
+                    per_worker = max(probe.worker_rss())
+                workers = max(1, int(options['memory_mb'] // per_worker))
+
+                with Server(args, workers, env) as server:
+                    asyncio.run(drive(server.url, routes, token, options['concurrency'], 2, options['auth_ratio']))
+                    before = issuer.requests
+                    start = time.perf_counter()
+                    latencies, errors = asyncio.run(drive(
+                        server.url, routes, token, options['concurrency'],
+                        options['duration'], options['auth_ratio']))
+                    elapsed = time.perf_counter() - start
+                    total_rss = sum(server.worker_rss())
+
+                self.stdout.write(
+                    f'{format_summary(label, summarize(latencies))} '
+                    f'rps={len(latencies) / elapsed:7.1f} errors={errors} '
+                    f'workers={workers} ({per_worker:.0f} MB each, {total_rss:.0f} MB after) '
+                    f'issuer_calls={issuer.requests - before}')
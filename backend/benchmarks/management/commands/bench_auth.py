@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from benchmarks.stub_issuer import STUB_ANON_KEY, StubIssuer
+from benchmarks.utils import benchmark_database, format_summary, summarize, time_calls
+from config.authentication import SupabaseAuthentication
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares per-request SupabaseAuthentication latency in 'remote' mode "
+        "(auth.get_user round-trip) and 'local' mode (HS256 secret / cached JWKS) "
+        "against a local stub issuer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument(
+            '--latency-ms', type=float, default=0.0,
+            help='Artificial delay added by the stub issuer to every request, '
+                 'to simulate the network distance to Supabase.')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        warmup = options['warmup']
+
+        with benchmark_database(), StubIssuer(latency=options['latency_ms'] / 1000) as issuer:
+            email = 'bench@example.com'
+            User.objects.create_user(username='bench', email=email, password='bench')
+
+            factory = APIRequestFactory()
+            auth = SupabaseAuthentication()
+
+            # (label, SUPABASE_AUTH_MODE, token algorithm, token cache size)
+            scenarios = [
+                ('remote (get_user)', 'remote', 'HS256', 0),
+                ('local (HS256 secret)', 'local', 'HS256', 0),
+                ('local (RS256 via JWKS)', 'local', 'RS256', 0),
+                ('token cache hit', 'local', 'RS256', 10000),
+            ]
+
+            self.stdout.write(
+                f'{iterations} authenticated requests per mode, '
+                f"stub latency {options['latency_ms']}ms\n")
+
+            for label, mode, algorithm, cache_size in scenarios:
+                token = issuer.issue(email, algorithm=algorithm)
+                request = factory.get('/api/shoes/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+                def authenticate():
+                    user, _ = auth.authenticate(request)
+                    assert user.email == email
+
+                with override_settings(
+                    SUPABASE_URL=issuer.url,
+                    SUPABASE_KEY=STUB_ANON_KEY,
+                    SUPABASE_JWT_SECRET=issuer.secret,
+                    SUPABASE_JWKS_URL=issuer.jwks_url,
+                    SUPABASE_AUTH_MODE=mode,
+                    SUPABASE_AUTH_REMOTE_FALLBACK=False,
+                    SUPABASE_AUTH_CACHE_SIZE=cache_size,
+                    SUPABASE_AUTH_SHARED_CACHE='',
+                ):
+                    before = issuer.requests
+                    samples = time_calls(authenticate, iterations, warmup=warmup)
+                    issuer_calls = issuer.requests - before
+
+                self.stdout.write(
+                    f'{format_summary(label, summarize(samples))} '
+                    f'issuer_calls={issuer_calls}')
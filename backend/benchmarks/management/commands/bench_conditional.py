@@ -0,0 +1,65 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from benchmarks.seed import seed_shoes, seed_users
+from benchmarks.utils import benchmark_database, format_summary, summarize, time_calls
+from market.models import Shoe
+from market.view_counter import view_counter
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a throwaway database and compares repeated polls of the shoe list, "
+        "shoe detail and profile endpoints with and without conditional requests "
+        "(If-None-Match): server time per request and bytes sent."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20_000)
+        parser.add_argument('--sellers', type=int, default=200)
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def endpoints(self):
+        shoe_id = Shoe.objects.order_by('-created_at').values_list('pk', flat=True).first()
+        username = Profile.objects.values_list('user__username', flat=True).first()
+        return [
+            ('shoe list', '/api/shoes/'),
+            ('shoe list (filtered)', '/api/shoes/?brand=nike&min_price=50'),
+            ('shoe detail', f'/api/shoes/{shoe_id}/'),
+            ('profile', f'/api/profiles/{username}/'),
+        ]
+
+    def poll(self, client, url, headers, sizes):
+        response = client.get(url, secure=True, headers=headers)
+        assert response.status_code in (200, 304), response.status_code
+        sizes.append(len(response.content))
+
+    def run(self, label, client, url, headers, iterations):
+        sizes = []
+        samples = time_calls(lambda: self.poll(client, url, headers, sizes), iterations, warmup=2)
+        sent = sum(sizes[2:])
+        self.stdout.write(f'{format_summary(label, summarize(samples))} bytes={sent:,}')
+        return sent
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            seller_ids = seed_users(options['sellers'], prefix='seller')
+            for _ in seed_shoes(options['rows'], seller_ids, rng=random.Random(42)):
+                pass
+
+            # Measure the server's own work, not the response cache
+            with override_settings(RESPONSE_CACHE_ENDPOINTS=[]):
+                client = Client()
+                for name, url in self.endpoints():
+                    self.stdout.write(f'\n{name}: {url}')
+                    full = self.run('full responses', client, url, {}, options['iterations'])
+
+                    etag = client.get(url, secure=True)['ETag']
+                    conditional = self.run(
+                        'If-None-Match (304)', client, url, {'If-None-Match': etag}, options['iterations'])
+                    saved = 100 * (1 - conditional / full) if full else 0
+                    self.stdout.write(f'{"":<28} {saved:.1f}% fewer bytes')
+            view_counter.flush()  # while the benchmark database still exists
@@ -0,0 +1,96 @@
+import io
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from benchmarks.utils import benchmark_database, format_summary, summarize
+from market.models import Shoe, ShoeImage
+from market.renditions import rendition_worker
+
+
+def make_photo(name, rng_seed):
+    image = Image.effect_noise((1600, 1200), 40 + rng_seed % 20).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return name, buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        "Times creating a listing with N gallery images: the old one-INSERT-and-"
+        "one-storage-write-per-file loop vs. market.services.create_listing "
+        "(parallel storage writes, one bulk_create), through POST /api/shoes/ "
+        "(so the latter also pays for multipart parsing and validation)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=10)
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument(
+            '--storage-latency-ms', type=float, default=50,
+            help='Added to every storage write, to stand in for S3 / Supabase Storage.')
+
+    def uploads(self, photos):
+        return [SimpleUploadedFile(name, data, content_type='image/jpeg') for name, data in photos]
+
+    def legacy(self, seller, main, gallery):
+        # What ShoeViewSet.create + ShoeSerializer.create used to do (minus the duplicate loop)
+        shoe = Shoe.objects.create(
+            seller=seller, title='Bench', brand='Nike', size='42.0', price='100.00', image=main)
+        for upload in gallery:
+            ShoeImage.objects.create(shoe=shoe, image=upload)
+
+    def current(self, client, main, gallery):
+        response = client.post('/api/shoes/', {
+            'title': 'Bench', 'brand': 'Nike', 'size': '42.0', 'price': '100.00',
+            'image': main, 'uploaded_images': gallery,
+        }, format='multipart', secure=True)
+        assert response.status_code == 201, response.content
+
+    def handle(self, *args, **options):
+        photos = [make_photo(f'photo-{i}.jpg', i) for i in range(options['images'] + 1)]
+        total = sum(len(data) for _, data in photos)
+        self.stdout.write(f"{options['images']} gallery images + 1 main, {total / 1e6:.1f} MB per listing, "
+                          f"{options['storage_latency_ms']:.0f} ms per storage write")
+
+        latency = options['storage_latency_ms'] / 1000
+        real_save = FileSystemStorage._save
+
+        def slow_save(storage, name, content):
+            time.sleep(latency)
+            return real_save(storage, name, content)
+
+        media = tempfile.mkdtemp(prefix='bench-media-')
+        try:
+            with benchmark_database(), override_settings(MEDIA_ROOT=media), \
+                    mock.patch.object(FileSystemStorage, '_save', slow_save), \
+                    mock.patch.object(rendition_worker, 'schedule'):  # measure creation only
+                seller = User.objects.create_user(username='seller', email='seller@example.com', password='x')
+                client = APIClient()
+                client.force_authenticate(seller)
+
+                for label, run in (
+                    ('per-file loop', lambda: self.legacy(seller, *self.split(photos))),
+                    ('create_listing', lambda: self.current(client, *self.split(photos))),
+                ):
+                    samples = []
+                    for _ in range(options['iterations']):
+                        start = time.perf_counter()
+                        run()
+                        samples.append(time.perf_counter() - start)
+                    self.stdout.write(format_summary(label, summarize(samples)))
+        finally:
+            shutil.rmtree(media, ignore_errors=True)
+
+    def split(self, photos):
+        uploads = self.uploads(photos)
+        return uploads[0], uploads[1:]
@@ -0,0 +1,111 @@
+import io
+import shutil
+import tempfile
+import threading
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+from PIL import Image
+
+from benchmarks.utils import percentile
+from config.media import serve_media
+
+
+def consume(response):
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    response.close()
+    return size
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent image fetches against django.views.static.serve (the old /media/ "
+        "route) and config.media.serve_media in django and x-accel mode: cold "
+        "fetches, browser revisits (conditional) and range requests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--files', type=int, default=20)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=100, help='Requests per thread.')
+
+    def make_files(self, count):
+        names = []
+        for i in range(count):
+            buffer = io.BytesIO()
+            Image.effect_noise((800, 600), 30 + i % 30).convert('RGB').save(buffer, 'JPEG', quality=85)
+            names.append(default_storage.save(f'shoe_images/bench-{i}.jpg', ContentFile(buffer.getvalue())))
+        return names
+
+    def run(self, label, view, names, options, headers_for=lambda name: {}):
+        factory = RequestFactory()
+        latencies, sent, statuses = [], [0], {}
+        lock = threading.Lock()
+
+        def worker(n):
+            local, local_sent = [], 0
+            for i in range(options['requests']):
+                name = names[(n + i) % len(names)]
+                request = factory.get(f'/media/{name}', headers=headers_for(name))
+                start = time.perf_counter()
+                response = view(request, name)
+                local_sent += consume(response)
+                local.append(time.perf_counter() - start)
+                with lock:
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            with lock:
+                latencies.extend(local)
+                sent[0] += local_sent
+
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(options['threads'])]
+        start = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        ms = [s * 1000 for s in latencies]
+        self.stdout.write(
+            f'{label:<34} {len(ms) / elapsed:8.0f} req/s  p50={percentile(ms, 50):7.2f}ms '
+            f'p95={percentile(ms, 95):7.2f}ms  body={sent[0] / 1e6:8.1f} MB  status={statuses}')
+
+    def handle(self, *args, **options):
+        media = tempfile.mkdtemp(prefix='bench-media-')
+        try:
+            with override_settings(MEDIA_ROOT=media):
+                names = self.make_files(options['files'])
+                etags = {}
+                for name in names:
+                    etags[name] = serve_media(RequestFactory().get('/'), name)['ETag']
+
+                def old(request, name):
+                    return serve(request, name, document_root=media)
+
+                self.stdout.write(f"{options['threads']} threads x {options['requests']} requests, "
+                                  f"{len(names)} files\n")
+                self.run('static.serve (old)', old, names, options)
+                self.run('serve_media (django)', serve_media, names, options)
+                with override_settings(MEDIA_SERVE_MODE='x-accel'):
+                    self.run('serve_media (x-accel)', serve_media, names, options)
+
+                self.stdout.write('\nrevisits')
+                self.run('static.serve + If-Modified-Since', old, names, options,
+                         lambda name: {'If-Modified-Since': 'Tue, 01 Jan 2030 00:00:00 GMT'})
+                self.run('serve_media + If-None-Match', serve_media, names, options,
+                         lambda name: {'If-None-Match': etags[name]})
+
+                self.stdout.write('\nrange requests (first 16 KB)')
+                self.run('static.serve (ignores Range)', old, names, options,
+                         lambda name: {'Range': 'bytes=0-16383'})
+                self.run('serve_media', serve_media, names, options,
+                         lambda name: {'Range': 'bytes=0-16383'})
+        finally:
+            shutil.rmtree(media, ignore_errors=True)
@@ -0,0 +1,76 @@
+import logging
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.scenarios import scenario_environment
+from benchmarks.seed import SCALES, seed_marketplace
+from benchmarks.utils import benchmark_database
+from market.view_counter import view_counter
+
+# (label, url) - the first of each group is what a list sends by default
+VARIANTS = [
+    ('shoes: full (default)', '/api/shoes/'),
+    ('shoes: ?view=compact', '/api/shoes/?view=compact'),
+    ('shoes: ?fields= card', '/api/shoes/?fields=id,title,brand,price,currency,renditions,seller_username'),
+    ('profiles: full (default)', '/api/profiles/?ordering=-rating_avg'),
+    ('profiles: ?view=compact', '/api/profiles/?ordering=-rating_avg&view=compact'),
+    ('reviews: full', '/api/reviews/'),
+    ('reviews: ?fields=', '/api/reviews/?fields=reviewer_username,rating,comment'),
+]
+
+
+class RequestLog(logging.Handler):
+    """Collects the per-request data RequestMetricsMiddleware logs (config/instrumentation.py)."""
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.entries = []
+
+    def emit(self, record):
+        self.entries.append(record.data)
+
+
+class Command(BaseCommand):
+    help = (
+        "Payload size, serialization time and queries per list page, with every "
+        "field (the default) versus ?view=compact and ?fields=."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES), default='small')
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            seed_marketplace(options['scale'])
+            self.stdout.write(
+                f"'{options['scale']}' seed, {settings.REST_FRAMEWORK['PAGE_SIZE']} rows per page, "
+                f"{options['iterations']} pages per variant\n")
+
+            log = RequestLog()
+            request_logger = logging.getLogger('config.requests')
+            with scenario_environment() as (issuer, client):
+                handlers = request_logger.handlers
+                request_logger.handlers = [log]  # collected here, not printed
+                request_logger.setLevel(logging.INFO)
+                try:
+                    for label, url in VARIANTS:
+                        client.get(url)  # warm up
+                        log.entries.clear()
+                        queries = 0
+                        for _ in range(options['iterations']):
+                            with CaptureQueriesContext(connection) as captured:
+                                response = client.get(url)
+                            assert response.status_code == 200, (url, response.status_code)
+                            queries = max(queries, len(captured.captured_queries))
+                        self.stdout.write(
+                            f"{label:<28} bytes={statistics.fmean(e['bytes'] for e in log.entries):9.0f} "
+                            f"serialization={statistics.fmean(e['serialization_ms'] for e in log.entries):7.2f}ms "
+                            f"total={statistics.fmean(e['ms'] for e in log.entries):7.2f}ms queries={queries}")
+                finally:
+                    request_logger.handlers = handlers
+            view_counter.flush()  # before the database goes away
@@ -0,0 +1,91 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from benchmarks.seed import SCALES, seed_marketplace
+from benchmarks.utils import benchmark_database, time_calls
+from config.renderers import FastJSONRenderer, orjson
+from market.views import ShoeViewSet
+from reviews.views import ReviewViewSet
+from users.views import ProfileViewSet
+
+SHOE_EXPANDED = 'seller_phone,seller_rating,description,contact_info'
+
+# (label, viewset, list URL, signed in)
+PAGES = [
+    ('shoes list', ShoeViewSet, '/api/shoes/?view=compact', False),
+    ('shoes list (signed in)', ShoeViewSet, '/api/shoes/?view=compact', True),
+    ('shoes, all but images', ShoeViewSet, f'/api/shoes/?view=compact&expand={SHOE_EXPANDED}', False),
+    ('profiles list', ProfileViewSet, '/api/profiles/?ordering=-rating_avg&view=compact', False),
+    ('reviews list', ReviewViewSet, '/api/reviews/', False),
+]
+
+
+def list_view(viewset, url, user=None):
+    """A viewset instance set up for GET `url` as its list action, without the request cycle."""
+    view = viewset(action_map={'get': 'list'}, args=(), kwargs={}, format_kwarg=None)
+    view.request = view.initialize_request(APIRequestFactory().get(url))
+    view.request.user = user or AnonymousUser()
+    return view
+
+
+class Command(BaseCommand):
+    help = (
+        "Rows/sec for list pages: model instances through the serializer (as DRF "
+        "does) versus values() rows (config/values_serialization.py), and DRF's "
+        "JSONRenderer versus FastJSONRenderer (config/renderers.py). Fails unless "
+        "all four produce the same JSON bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES), default='small')
+        parser.add_argument('--rows', type=int, default=48, help='Rows per page.')
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def rate(self, fn, rows, iterations):
+        samples = time_calls(fn, iterations, warmup=max(1, iterations // 10))
+        return rows * len(samples) / sum(samples)
+
+    def handle(self, *args, **options):
+        rows, iterations = options['rows'], options['iterations']
+        with benchmark_database():
+            ids = seed_marketplace(options['scale'])
+            user = User.objects.get(pk=ids['buyer_ids'][0])
+            self.stdout.write(
+                f"'{options['scale']}' seed, {rows} rows per page, {iterations} pages per run; "
+                f"orjson {'installed' if orjson else 'NOT installed (stdlib fallback)'}\n")
+
+            for label, viewset, url, signed_in in PAGES:
+                view = list_view(viewset, url, user if signed_in else None)
+                queryset = view.filter_queryset(view.get_queryset())
+                serializer = view.get_serializer()
+                plan = serializer.row_plan(queryset)
+                if plan is None:
+                    raise CommandError(f'{label}: {url} has no values() plan')
+                paths, readers = plan
+
+                def from_instances():
+                    return view.get_serializer(list(queryset[:rows]), many=True).data
+
+                def from_values():
+                    return serializer.rows_data(list(queryset.values(*paths)[:rows]), readers)
+
+                expected = JSONRenderer().render(from_instances())
+                data = from_values()
+                for name, output in (('values() rows', JSONRenderer().render(data)),
+                                     ('FastJSONRenderer', FastJSONRenderer().render(data))):
+                    if output != expected:
+                        raise CommandError(f'{label}: {name} JSON differs from the serializer output')
+                count = len(data)
+
+                instances_rate = self.rate(from_instances, count, iterations)
+                values_rate = self.rate(from_values, count, iterations)
+                stdlib_rate = self.rate(lambda: JSONRenderer().render(data), count, iterations)
+                fast_rate = self.rate(lambda: FastJSONRenderer().render(data), count, iterations)
+                self.stdout.write(
+                    f"{label}: {count} rows, {len(expected)} bytes, identical JSON\n"
+                    f"  fetch + serialize  instances {instances_rate:10,.0f} rows/s   "
+                    f"values() {values_rate:10,.0f} rows/s  (x{values_rate / instances_rate:.1f})\n"
+                    f"  render             stdlib    {stdlib_rate:10,.0f} rows/s   "
+                    f"fast     {fast_rate:10,.0f} rows/s  (x{fast_rate / stdlib_rate:.1f})")
@@ -0,0 +1,89 @@
+import importlib
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from benchmarks.seed import seed_shoes, seed_users
+from benchmarks.utils import benchmark_database, format_summary, summarize, time_calls
+from market.models import Shoe
+from market.views import ShoeFilter
+
+indexes_migration = importlib.import_module('market.migrations.0006_shoe_indexes')
+
+# (label, query params, ordering) as the frontend sends them to /api/shoes/
+SCENARIOS = [
+    ('newest (default list)', {}, ['-created_at']),
+    ('live inventory', {'is_sold': False}, ['-created_at']),
+    ('brand contains', {'brand': 'nik'}, ['-created_at']),
+    ('size', {'size': '42.0'}, ['-created_at']),
+    ('brand + size', {'brand': 'Nike', 'size': '42.0'}, ['-created_at']),
+    ('condition', {'condition': 'New'}, ['-created_at']),
+    ('price range', {'min_price': '50', 'max_price': '80'}, ['-created_at']),
+    ('price range by price', {'min_price': '50', 'max_price': '80'}, ['price']),
+    ('cheapest first', {}, ['price']),
+    ('seller', {'seller__username': 'seller7'}, ['-created_at']),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a throwaway database with shoes and reports p50/p95 of the "
+        "/api/shoes/ page + count queries per filter combination, without and "
+        "with the market.Shoe indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--sellers', type=int, default=1000)
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--page-size', type=int, default=12)
+
+    def page(self, params, ordering, page_size):
+        live_only = params.pop('is_sold', None) is False
+        queryset = ShoeFilter(params, queryset=Shoe.objects.order_by(*ordering)).qs
+        if live_only:
+            queryset = queryset.filter(is_sold=False)
+        list(queryset[:page_size])
+        queryset.count()
+
+    def run_scenarios(self, heading, options):
+        self.stdout.write(f'\n{heading}')
+        for label, params, ordering in SCENARIOS:
+            samples = time_calls(
+                lambda: self.page(dict(params), ordering, options['page_size']),
+                options['iterations'], warmup=2)
+            self.stdout.write(format_summary(label, summarize(samples)))
+
+    def set_indexes(self, enabled):
+        with connection.schema_editor() as editor:
+            for index in Shoe._meta.indexes:
+                if enabled:
+                    editor.add_index(Shoe, index)
+                else:
+                    editor.remove_index(Shoe, index)
+        if connection.vendor == 'postgresql':
+            with connection.schema_editor() as editor:
+                if enabled:
+                    indexes_migration.create_brand_trigram_index(None, editor)
+                else:
+                    indexes_migration.drop_brand_trigram_index(None, editor)
+        self.analyze()
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            rng = random.Random(42)
+            seller_ids = seed_users(options['sellers'], prefix='seller')
+            for inserted in seed_shoes(options['rows'], seller_ids, rng=rng, batch_size=20000):
+                if inserted % 100_000 == 0 or inserted == options['rows']:
+                    self.stdout.write(f'seeded {inserted} shoes')
+
+            self.set_indexes(False)
+            self.run_scenarios('BEFORE (PK + seller FK only)', options)
+
+            self.set_indexes(True)
+            self.run_scenarios('AFTER (marketplace indexes)', options)
@@ -0,0 +1,80 @@
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+
+from benchmarks.utils import benchmark_database
+from market.models import Shoe
+from market.view_counter import view_counter
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test for shoe view counting: N threads hit one listing at the same "
+        "time, first with the old read-modify-write save(), then through "
+        "ShoeViewSet.retrieve with the buffered counter. Reports lost increments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--hits', type=int, default=200, help='Detail hits per thread.')
+        parser.add_argument('--flush-seconds', type=float, default=0.05)
+
+    def run_threads(self, worker, threads):
+        def run(n):
+            try:
+                worker(n)
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=run, args=(n,)) for n in range(threads)]
+        start = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        return time.perf_counter() - start
+
+    def report(self, label, expected, shoe, elapsed):
+        stored = Shoe.objects.values_list('views', flat=True).get(pk=shoe.pk)
+        self.stdout.write(
+            f'{label:<22} hits={expected:<6} stored={stored:<6} lost={expected - stored:<6} '
+            f'throughput={expected / elapsed:8.1f} hits/s')
+
+    def handle(self, *args, **options):
+        threads, hits = options['threads'], options['hits']
+        expected = threads * hits
+
+        with benchmark_database():
+            seller = User.objects.create_user(username='seller', email='seller@example.com', password='x')
+            shoe = Shoe.objects.create(
+                seller=seller, title='Hot listing', brand='Nike', size='42.0',
+                price='100.00', image='shoe_images/hot.jpg')
+
+            # 1. The old code path: read the row, += 1, save() every column
+            def legacy(n):
+                for _ in range(hits):
+                    instance = Shoe.objects.get(pk=shoe.pk)
+                    instance.views += 1
+                    instance.save()
+
+            elapsed = self.run_threads(legacy, threads)
+            self.report('legacy save()', expected, shoe, elapsed)
+
+            # 2. Buffered counter through the real detail endpoint
+            Shoe.objects.filter(pk=shoe.pk).update(views=0)
+            url = f'/api/shoes/{shoe.pk}/'
+
+            def buffered(n):
+                client = Client()
+                for i in range(hits):
+                    response = client.get(url, secure=True, REMOTE_ADDR=f'10.{n}.{i // 256}.{i % 256}')
+                    assert response.status_code == 200, response.status_code
+
+            with override_settings(VIEW_COUNT_FLUSH_SECONDS=options['flush_seconds']):
+                elapsed = self.run_threads(buffered, threads)
+                view_counter.flush()
+            self.report('buffered counter', expected, shoe, elapsed)
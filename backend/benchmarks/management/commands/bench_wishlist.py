@@ -0,0 +1,82 @@
+import random
+import time
+from contextlib import nullcontext
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.scenarios import scenario_environment
+from benchmarks.seed import SCALES, seed_marketplace
+from benchmarks.utils import benchmark_database, format_summary, summarize
+from market.models import Wishlist
+from market.serializers import ShoeSerializer
+from market.view_counter import view_counter
+from market.wishlist import liked_shoes
+
+
+def exists_per_row(serializer, obj):
+    """is_liked as it used to be computed without an annotation: one EXISTS per shoe."""
+    request = serializer.context.get('request')
+    if request and request.user.is_authenticated:
+        return Wishlist.objects.filter(user=request.user, shoe=obj).exists()
+    return False
+
+
+class Command(BaseCommand):
+    help = (
+        "A signed-in user with many likes pages through /api/shoes/: is_liked from "
+        "one EXISTS query per shoe, versus the per-user liked set (market/wishlist.py) "
+        "loaded from the database (cold) or the cache (warm)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES), default='small')
+        parser.add_argument('--likes', type=int, default=500, help="Shoes on the user's wishlist.")
+        parser.add_argument('--pages', type=int, default=20)
+        parser.add_argument('--iterations', type=int, default=5, help='Passes over the pages.')
+
+    def browse(self, client, token, pages, iterations, before_request=None):
+        samples, queries = [], []
+        for _ in range(iterations):
+            for page in range(1, pages + 1):
+                if before_request:
+                    before_request()
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = client.get(f'/api/shoes/?page={page}', HTTP_AUTHORIZATION=f'Bearer {token}')
+                    samples.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.status_code
+                queries.append(len(captured.captured_queries))
+        return samples, queries
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            ids = seed_marketplace(options['scale'])
+            user_id = ids['buyer_ids'][0]
+            Wishlist.objects.filter(user_id=user_id).delete()
+            liked = random.Random(3).sample(ids['shoe_ids'], min(options['likes'], len(ids['shoe_ids'])))
+            Wishlist.objects.bulk_create([Wishlist(user_id=user_id, shoe_id=pk) for pk in liked])
+            self.stdout.write(
+                f"'{options['scale']}' seed, {len(liked)} likes, pages 1-{options['pages']} "
+                f"x {options['iterations']}\n")
+
+            with scenario_environment() as (issuer, client):
+                token = issuer.issue(User.objects.get(pk=user_id).email)
+                runs = [
+                    ('EXISTS per shoe', {'patch': exists_per_row}),
+                    ('liked set (cold)', {'before': lambda: liked_shoes.invalidate(user_id)}),
+                    ('liked set (warm)', {}),
+                ]
+                for label, run in runs:
+                    patch = (mock.patch.object(ShoeSerializer, 'get_is_liked', run['patch'])
+                             if 'patch' in run else nullcontext())
+                    with patch:
+                        self.browse(client, token, 1, 1)  # warm up
+                        samples, queries = self.browse(
+                            client, token, options['pages'], options['iterations'], run.get('before'))
+                    self.stdout.write(
+                        f'{format_summary(label, summarize(samples))} queries/page={max(queries)}')
+            view_counter.flush()  # before the database goes away
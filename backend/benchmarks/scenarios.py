@@ -0,0 +1,215 @@
+"""
+Scripted API scenarios: the requests the frontend makes most, replayed
+through the full Django/DRF stack (middleware, SupabaseAuthentication with
+stub-issued tokens, serializers, rendering) against seeded data.
+
+`manage.py bench_api` prints throughput, latency percentiles and query
+counts per scenario; benchmarks/tests.py runs the same scenarios on a tiny
+seed and fails when a scenario exceeds its max_queries / max_p99_ms.
+"""
+import io
+import logging
+import random
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from market.renditions import rendition_worker
+from .seed import BRANDS, MODELS
+from .stub_issuer import StubIssuer
+from .utils import format_summary, summarize
+
+
+def small_photo(seed=0):
+    buffer = io.BytesIO()
+    Image.effect_noise((320, 240), 30 + seed % 30).convert('RGB').save(buffer, 'JPEG', quality=80)
+    return buffer.getvalue()
+
+
+@dataclass
+class ScenarioContext:
+    """What the scenarios pick their requests from."""
+    shoe_ids: list
+    seller_usernames: list
+    user: User
+    token: str
+    rng: random.Random = field(default_factory=lambda: random.Random(42))
+    photo: bytes = field(default_factory=small_photo)
+
+    @classmethod
+    def build(cls, issuer, seller_ids, buyer_ids, shoe_ids):
+        user = User.objects.get(pk=buyer_ids[0])
+        usernames = list(User.objects.filter(pk__in=seller_ids).values_list('username', flat=True))
+        return cls(shoe_ids=shoe_ids, seller_usernames=usernames, user=user, token=issuer.issue(user.email))
+
+    def upload(self, name):
+        return SimpleUploadedFile(name, self.photo, content_type='image/jpeg')
+
+
+@dataclass
+class Scenario:
+    name: str
+    # ctx -> (method, path, data)
+    request: Callable[[ScenarioContext], tuple]
+    authenticated: bool = False
+    expected_status: tuple = (200,)
+    # Regression thresholds (benchmarks/tests.py, bench_api --check)
+    max_queries: Optional[int] = None
+    max_p99_ms: Optional[float] = None
+
+
+def create_listing_request(ctx):
+    return 'post', '/api/shoes/', {
+        'title': f'{ctx.rng.choice(BRANDS)} {ctx.rng.choice(MODELS)}',
+        'brand': ctx.rng.choice(BRANDS),
+        'size': '42.0',
+        'price': '120.00',
+        'condition': 'Used',
+        'image': ctx.upload('main.jpg'),
+        'uploaded_images': [ctx.upload('gallery-1.jpg'), ctx.upload('gallery-2.jpg')],
+    }
+
+
+# max_queries are today's counts (independent of data size); the p99 budgets
+# are loose on purpose, to catch order-of-magnitude regressions, not noise.
+SCENARIOS = [
+    Scenario(
+        'browse list',
+        lambda ctx: ('get', f'/api/shoes/?page={ctx.rng.randint(1, 5)}', None),
+        # list validators, count, page and the gallery (default lists carry images)
+        max_queries=4, max_p99_ms=250),
+    Scenario(
+        'browse list (signed in)',
+        lambda ctx: ('get', f'/api/shoes/?page={ctx.rng.randint(1, 5)}', None),
+        # + the user's wishlist Count / Max for the list ETag (no response cache here)
+        authenticated=True, max_queries=5, max_p99_ms=250),
+    Scenario(
+        'filter',
+        lambda ctx: ('get', f'/api/shoes/?brand={ctx.rng.choice(BRANDS)}&min_price=50&max_price=300'
+                            f'&ordering=-price', None),
+        max_queries=4, max_p99_ms=250),
+    Scenario(
+        'search',
+        lambda ctx: ('get', f'/api/shoes/?search={ctx.rng.choice(MODELS).split()[0]}', None),
+        max_queries=4, max_p99_ms=300),
+    Scenario(
+        'detail',
+        lambda ctx: ('get', f'/api/shoes/{ctx.rng.choice(ctx.shoe_ids)}/', None),
+        max_queries=3, max_p99_ms=200),
+    Scenario(
+        'toggle wishlist',
+        lambda ctx: ('post', f'/api/shoes/{ctx.rng.choice(ctx.shoe_ids)}/toggle_wishlist/', None),
+        authenticated=True, expected_status=(200, 201), max_queries=6, max_p99_ms=200),
+    Scenario(
+        'create listing',
+        create_listing_request,
+        authenticated=True, expected_status=(201,), max_queries=8, max_p99_ms=500),
+    Scenario(
+        'profile page',
+        lambda ctx: ('get', f'/api/profiles/{ctx.rng.choice(ctx.seller_usernames)}/', None),
+        max_queries=3, max_p99_ms=200),
+    Scenario(
+        'seller page',
+        lambda ctx: ('get', f'/api/profiles/{ctx.rng.choice(ctx.seller_usernames)}/page/', None),
+        max_queries=4, max_p99_ms=250),
+]
+
+
+@dataclass
+class ScenarioResult:
+    scenario: Scenario
+    samples: list
+    queries: list
+    errors: int
+    elapsed: float
+
+    @property
+    def summary(self):
+        return summarize(self.samples)
+
+    @property
+    def throughput(self):
+        return len(self.samples) / self.elapsed if self.elapsed else 0.0
+
+    def violations(self, latency_slack=1.0):
+        """Threshold breaches as human-readable strings (empty when within budget)."""
+        problems = []
+        if self.errors:
+            problems.append(f'{self.errors} unexpected responses')
+        if self.scenario.max_queries is not None and max(self.queries, default=0) > self.scenario.max_queries:
+            problems.append(f'{max(self.queries)} queries > {self.scenario.max_queries}')
+        limit = self.scenario.max_p99_ms
+        if limit is not None and self.summary['p99'] > limit * latency_slack:
+            problems.append(f"p99 {self.summary['p99']:.1f}ms > {limit * latency_slack:.0f}ms")
+        return problems
+
+    def format(self):
+        return (
+            f'{format_summary(self.scenario.name, self.summary)} '
+            f'rps={self.throughput:7.1f} queries={max(self.queries, default=0)}'
+            + (f' errors={self.errors}' if self.errors else '')
+        )
+
+
+def run_scenario(client, scenario, ctx, iterations, warmup=2):
+    headers = {'HTTP_AUTHORIZATION': f'Bearer {ctx.token}'} if scenario.authenticated else {}
+
+    def call():
+        method, path, data = scenario.request(ctx)
+        kwargs = {'format': 'multipart'} if method == 'post' and data else {}
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = getattr(client, method)(path, data, **kwargs, **headers)
+            elapsed = time.perf_counter() - start
+        return response, elapsed, len(captured.captured_queries)
+
+    for _ in range(warmup):
+        call()
+    samples, queries, errors = [], [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        response, elapsed, query_count = call()
+        samples.append(elapsed)
+        queries.append(query_count)
+        if response.status_code not in scenario.expected_status:
+            errors += 1
+    return ScenarioResult(scenario, samples, queries, errors, time.perf_counter() - started)
+
+
+@contextmanager
+def scenario_environment():
+    """
+    Stub Supabase issuer (local HS256 verification), a throwaway MEDIA_ROOT,
+    no response cache (every request does its real work), no throttling,
+    no rendition jobs and no per-request log lines. Yields (issuer, APIClient).
+    """
+    media = tempfile.mkdtemp(prefix='bench-media-')
+    request_logger = logging.getLogger('config.requests')
+    log_level = request_logger.level
+    request_logger.setLevel(logging.WARNING)
+    try:
+        with StubIssuer() as issuer, \
+                override_settings(**issuer.settings(
+                    MEDIA_ROOT=media,
+                    RESPONSE_CACHE_ENDPOINTS=[],
+                    THROTTLE_RATES={},
+                    VIEW_COUNT_FLUSH_SECONDS=3600,
+                    SECURE_SSL_REDIRECT=False,
+                )), \
+                mock.patch.object(rendition_worker, 'schedule'):
+            yield issuer, APIClient()
+    finally:
+        request_logger.setLevel(log_level)
+        shutil.rmtree(media, ignore_errors=True)
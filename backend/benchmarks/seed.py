@@ -0,0 +1,165 @@
+"""
+Synthetic marketplace data for benchmarks. Everything is bulk inserted and
+driven by a seeded random.Random, so runs are reproducible.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from market.models import Shoe, ShoeImage, Wishlist
+from market.search import rebuild_search_index
+from reviews.models import Review
+from users.models import Profile
+
+BRANDS = [
+    'Nike', 'Adidas', 'New Balance', 'Puma', 'Asics', 'Converse', 'Vans', 'Reebok',
+    'Salomon', 'Jordan', 'Yeezy', 'Saucony', 'On', 'Hoka', 'Dr. Martens', 'Timberland',
+]
+MODELS = ['Air Max', 'Samba', '550', 'Suede', 'Gel-Lyte', 'Chuck 70', 'Old Skool', 'Club C',
+          'XT-6', 'Retro 4', 'Boost 350', 'Jazz', 'Cloud', 'Clifton', '1460', 'Premium']
+SIZES = [Decimal(s) / 2 for s in range(72, 96)]  # 36.0 - 47.5
+CURRENCIES = ['EUR', 'EUR', 'EUR', 'USD', 'GBP']
+
+# seed_marketplace() sizes: sellers, buyers, shoes, and per-row fan-out
+SCALES = {
+    'tiny': {'sellers': 10, 'buyers': 20, 'shoes': 200, 'gallery': 2, 'wishlist': 5, 'reviews': 3},
+    'small': {'sellers': 100, 'buyers': 400, 'shoes': 5_000, 'gallery': 3, 'wishlist': 10, 'reviews': 5},
+    'medium': {'sellers': 1_000, 'buyers': 5_000, 'shoes': 100_000, 'gallery': 3, 'wishlist': 20, 'reviews': 10},
+    'large': {'sellers': 10_000, 'buyers': 50_000, 'shoes': 1_000_000, 'gallery': 4, 'wishlist': 20, 'reviews': 10},
+}
+
+
+@contextmanager
+def explicit_timestamps(model, *field_names):
+    """Lets bulk_create keep the created_at values we generate instead of now()."""
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, (auto_now, auto_now_add) in zip(fields, saved):
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def seed_users(count, prefix='user', batch_size=5000):
+    """Creates users with profiles. Returns their ids."""
+    start = User.objects.count()
+    users = [
+        User(username=f'{prefix}{start + i}', email=f'{prefix}{start + i}@example.com', password='!')
+        for i in range(count)
+    ]
+    User.objects.bulk_create(users, batch_size=batch_size)
+    ids = list(
+        User.objects.filter(username__startswith=prefix)
+        .order_by('-pk').values_list('pk', flat=True)[:count]
+    )
+    Profile.objects.bulk_create(
+        [Profile(user_id=pk, phone_number=f'+1{pk:010d}', location='Zagreb') for pk in ids],
+        batch_size=batch_size,
+    )
+    return ids
+
+
+def seed_shoes(count, seller_ids, rng=None, batch_size=10000, days=730, sold_ratio=0.2):
+    """
+    Bulk inserts `count` shoes spread over the last `days` days.
+    Yields the number inserted so far after each batch, then rebuilds the
+    search index (bulk_create skips the signals that maintain it).
+    """
+    rng = rng or random.Random(42)
+    now = timezone.now()
+    inserted = 0
+    with explicit_timestamps(Shoe, 'created_at'):
+        while inserted < count:
+            batch = []
+            for _ in range(min(batch_size, count - inserted)):
+                brand = rng.choice(BRANDS)
+                batch.append(Shoe(
+                    seller_id=rng.choice(seller_ids),
+                    title=f'{brand} {rng.choice(MODELS)}',
+                    brand=brand,
+                    size=rng.choice(SIZES),
+                    price=Decimal(rng.randint(2000, 40000)) / 100,
+                    currency=rng.choice(CURRENCIES),
+                    condition=rng.choice(['New', 'Used']),
+                    description=f'{brand} in great shape, worn {rng.randint(0, 20)} times.',
+                    image=f'shoe_images/seed-{rng.randint(1, 500)}.jpg',
+                    is_sold=rng.random() < sold_ratio,
+                    views=rng.randint(0, 5000),
+                    created_at=now - timedelta(seconds=rng.randint(0, days * 86400)),
+                ))
+            Shoe.objects.bulk_create(batch)
+            inserted += len(batch)
+            yield inserted
+    rebuild_search_index()
+
+
+def seed_gallery(per_shoe, shoe_ids, batch_size=10000):
+    """Gives every shoe `per_shoe` ShoeImages (no renditions, as before they are built)."""
+    images = (
+        ShoeImage(shoe_id=pk, image=f'shoe_gallery/seed-{pk}-{i}.jpg')
+        for pk in shoe_ids for i in range(per_shoe)
+    )
+    _bulk_create_in_batches(ShoeImage, images, batch_size)
+
+
+def seed_wishlists(per_user, user_ids, shoe_ids, rng=None, batch_size=10000):
+    """Each user likes `per_user` distinct random shoes."""
+    rng = rng or random.Random(42)
+    per_user = min(per_user, len(shoe_ids))
+    likes = (
+        Wishlist(user_id=user_id, shoe_id=shoe_id)
+        for user_id in user_ids for shoe_id in rng.sample(shoe_ids, per_user)
+    )
+    _bulk_create_in_batches(Wishlist, likes, batch_size)
+
+
+def seed_reviews(per_seller, seller_ids, reviewer_ids, rng=None, batch_size=10000):
+    """
+    Each seller gets `per_seller` reviews from distinct reviewers, then the
+    denormalized Profile ratings are recomputed (bulk_create sends no signals).
+    """
+    rng = rng or random.Random(42)
+    per_seller = min(per_seller, len(reviewer_ids))
+    reviews = (
+        Review(seller_id=seller_id, reviewer_id=reviewer_id,
+               rating=rng.choice([3, 4, 4, 5, 5, 5]), comment='Smooth deal, shoes as described.')
+        for seller_id in seller_ids for reviewer_id in rng.sample(reviewer_ids, per_seller)
+    )
+    _bulk_create_in_batches(Review, reviews, batch_size)
+    Profile.refresh_ratings(seller_ids)
+
+
+def seed_marketplace(scale='small', rng=None):
+    """
+    Sellers with shoes (and galleries), buyers with wishlists, and reviews,
+    sized by SCALES[scale]. Returns the ids it created.
+    """
+    size = SCALES[scale]
+    rng = rng or random.Random(42)
+    seller_ids = seed_users(size['sellers'], prefix='seller')
+    buyer_ids = seed_users(size['buyers'], prefix='buyer')
+    for _ in seed_shoes(size['shoes'], seller_ids, rng=rng):
+        pass
+    shoe_ids = list(Shoe.objects.order_by('pk').values_list('pk', flat=True))
+    seed_gallery(size['gallery'], shoe_ids)
+    seed_wishlists(size['wishlist'], buyer_ids, shoe_ids, rng=rng)
+    seed_reviews(size['reviews'], seller_ids, buyer_ids, rng=rng)
+    return {'seller_ids': seller_ids, 'buyer_ids': buyer_ids, 'shoe_ids': shoe_ids}
+
+
+def _bulk_create_in_batches(model, objects, batch_size):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == batch_size:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
@@ -0,0 +1,16 @@
+"""
+Settings for the app servers that bench_asgi starts: config.settings, on
+the benchmark's throwaway SQLite file (BENCH_DATABASE), unthrottled.
+"""
+import os
+
+from config.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['BENCH_DATABASE'],
+    }
+}
+
+THROTTLE_RATES = {}
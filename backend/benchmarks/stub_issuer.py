@@ -0,0 +1,141 @@
+"""
+A local stand-in for the Supabase auth server.
+
+Serves the two endpoints SupabaseAuthentication talks to:
+    GET /auth/v1/.well-known/jwks.json   (local verification, JWKS mode)
+    GET /auth/v1/user                    (remote verification, auth.get_user)
+and mints HS256 / RS256 access tokens shaped like Supabase's.
+"""
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+# The stub never checks the API key, supabase-py only requires a non-empty one.
+STUB_ANON_KEY = 'stub.anon.key'
+
+
+class StubIssuer:
+    def __init__(self, secret='stub-jwt-secret-that-is-long-enough-for-hs256', latency=0.0):
+        self.secret = secret
+        self.latency = latency
+        self.kid = uuid.uuid4().hex
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.requests = 0
+        self._server = None
+        self._thread = None
+
+    # --- Tokens ---
+    def issue(self, email, algorithm='HS256', lifetime=3600, sub=None):
+        now = int(time.time())
+        claims = {
+            'sub': sub or str(uuid.uuid5(uuid.NAMESPACE_DNS, email)),
+            'email': email,
+            'aud': 'authenticated',
+            'role': 'authenticated',
+            'iat': now,
+            'exp': now + lifetime,
+        }
+        if algorithm == 'HS256':
+            return jwt.encode(claims, self.secret, algorithm='HS256')
+        return jwt.encode(claims, self.private_key, algorithm='RS256', headers={'kid': self.kid})
+
+    def decode(self, token):
+        algorithm = jwt.get_unverified_header(token).get('alg')
+        key = self.secret if algorithm == 'HS256' else self.private_key.public_key()
+        return jwt.decode(token, key, algorithms=[algorithm], audience='authenticated')
+
+    def jwks(self):
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self.private_key.public_key()))
+        jwk.update({'kid': self.kid, 'alg': 'RS256', 'use': 'sig'})
+        return {'keys': [jwk]}
+
+    def settings(self, mode='local', **overrides):
+        """
+        Settings that point SupabaseAuthentication at this issuer, for
+        override_settings(). The server must be running.
+        """
+        return {
+            'SUPABASE_URL': self.url,
+            'SUPABASE_KEY': STUB_ANON_KEY,
+            'SUPABASE_JWT_SECRET': self.secret,
+            'SUPABASE_JWKS_URL': self.jwks_url,
+            'SUPABASE_AUTH_MODE': mode,
+            'SUPABASE_AUTH_REMOTE_FALLBACK': False,
+            'SUPABASE_AUTH_SHARED_CACHE': '',
+            **overrides,
+        }
+
+    # --- Server ---
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def jwks_url(self):
+        return f'{self.url}/auth/v1/.well-known/jwks.json'
+
+    def start(self):
+        issuer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                issuer.requests += 1
+                if issuer.latency:
+                    time.sleep(issuer.latency)
+
+                if self.path.startswith('/auth/v1/.well-known/jwks.json'):
+                    return self._send(200, issuer.jwks())
+
+                if self.path.startswith('/auth/v1/user'):
+                    token = self.headers.get('Authorization', '').split(' ')[-1]
+                    try:
+                        claims = issuer.decode(token)
+                    except jwt.InvalidTokenError:
+                        return self._send(401, {'code': 401, 'msg': 'invalid JWT'})
+                    created = datetime.now(timezone.utc).isoformat()
+                    return self._send(200, {
+                        'id': claims['sub'],
+                        'aud': 'authenticated',
+                        'role': 'authenticated',
+                        'email': claims['email'],
+                        'app_metadata': {},
+                        'user_metadata': {},
+                        'created_at': created,
+                    })
+
+                return self._send(404, {'msg': 'not found'})
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,27 @@
+from decouple import config
+from django.test import TestCase
+
+from market.view_counter import view_counter
+from .scenarios import SCENARIOS, ScenarioContext, run_scenario, scenario_environment
+from .seed import seed_marketplace
+
+# Multiplier for the p99 budgets on slow CI machines
+LATENCY_SLACK = config('BENCH_LATENCY_SLACK', default=1.0, cast=float)
+
+
+class ApiScenarioRegressionTests(TestCase):
+    """Every scenario in benchmarks/scenarios.py stays within its query and latency budget."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ids = seed_marketplace('tiny')
+
+    def test_scenarios_within_thresholds(self):
+        with scenario_environment() as (issuer, client):
+            ctx = ScenarioContext.build(
+                issuer, self.ids['seller_ids'], self.ids['buyer_ids'], self.ids['shoe_ids'])
+            for scenario in SCENARIOS:
+                with self.subTest(scenario=scenario.name):
+                    result = run_scenario(client, scenario, ctx, iterations=20)
+                    self.assertEqual(result.violations(LATENCY_SLACK), [], result.format())
+        view_counter.flush()
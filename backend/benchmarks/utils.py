@@ -0,0 +1,73 @@
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test import override_settings
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """
+    Runs the benchmark against a throwaway test database (test_<NAME>),
+    so seeding never touches real data. SQLite gets a temporary file
+    rather than :memory:, so worker threads share one real database.
+    Throttling is off (THROTTLE_RATES={}) for the duration.
+    """
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    if connection.vendor == 'sqlite' and not old_test_name:
+        fd, path = tempfile.mkstemp(prefix='bench-', suffix='.sqlite3')
+        os.close(fd)
+        test_settings['NAME'] = path
+
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        with override_settings(THROTTLE_RATES={}):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        test_settings['NAME'] = old_test_name
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def time_calls(fn, iterations, warmup=0):
+    """Calls fn() warmup + iterations times and returns the timed durations (seconds)."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples):
+    """Latency summary in milliseconds."""
+    ms = [s * 1000 for s in samples]
+    return {
+        'n': len(ms),
+        'mean': statistics.fmean(ms) if ms else 0.0,
+        'p50': percentile(ms, 50),
+        'p95': percentile(ms, 95),
+        'p99': percentile(ms, 99),
+    }
+
+
+def format_summary(label, summary):
+    return (
+        f"{label:<28} n={summary['n']:<6} mean={summary['mean']:8.3f}ms "
+        f"p50={summary['p50']:8.3f}ms p95={summary['p95']:8.3f}ms p99={summary['p99']:8.3f}ms"
+    )
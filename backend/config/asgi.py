@@ -2,6 +2,9 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+An opt-in alternative to config.wsgi (the Procfile default), e.g. gunicorn
+with uvicorn workers. The read-heavy routes are served by async views here
+(ASYNC_READ_VIEWS, see config/async_views.py).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
@@ -12,5 +15,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('ASYNC_READ_VIEWS', 'True')
+# No persistent database connections under ASGI (see DB_CONN_MAX_AGE)
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
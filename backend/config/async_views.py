@@ -0,0 +1,54 @@
+"""
+Async entry points for the read-heavy API routes (ASGI deployments).
+
+Under ASGI a sync view occupies one of the server's threads for its whole
+run, including the time spent waiting on Supabase to verify a token. With
+ASYNC_READ_VIEWS on (config/asgi.py turns it on), the routes listed in a
+viewset's `async_read_actions` are served by a coroutine instead: it
+authenticates on the event loop (SupabaseAuthentication.aauthenticate,
+awaiting the Supabase call), then runs the unchanged DRF view in a thread
+for the ORM work, serialization, caching and conditional GETs. The sync
+authenticate() picks up the result stashed on the request.
+
+Writes and other actions stay sync views; under WSGI nothing changes.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework import exceptions
+
+from .authentication import SupabaseAuthentication
+
+
+async def preauthenticate(request):
+    """Runs Supabase authentication on the event loop and stashes the outcome."""
+    try:
+        result = await SupabaseAuthentication().aauthenticate(request)
+    except exceptions.APIException as exc:
+        result = exc  # re-raised by authenticate(), so DRF answers as usual
+    request.supabase_auth = result if result is not None else False
+
+
+class AsyncReadMixin:
+    """
+    ViewSet mixin: routes whose GET action is in `async_read_actions` get an
+    async view when settings.ASYNC_READ_VIEWS is on.
+    """
+    async_read_actions = ()
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not settings.ASYNC_READ_VIEWS or (actions or {}).get('get') not in cls.async_read_actions:
+            return view
+
+        sync_view = sync_to_async(view)
+
+        @functools.wraps(view)  # keeps .cls, .initkwargs, .actions, .csrf_exempt
+        async def async_view(request, *args, **kwargs):
+            if request.method in ('GET', 'HEAD'):
+                await preauthenticate(request)
+            return await sync_view(request, *args, **kwargs)
+
+        return async_view
@@ -1,50 +1,270 @@
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import jwt
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth.models import User
 from rest_framework import authentication, exceptions
-from supabase import create_client, Client
+
+from .instrumentation import timed
+from .supabase_client import SupabaseUnavailable, supabase_auth_client
+from .throttling import VerificationThrottle
+from .token_cache import token_cache
+
+# Supabase signs access tokens with the project JWT secret (HS256) or, for
+# projects using asymmetric signing keys, with a key published on the JWKS URL.
+HMAC_ALGORITHMS = ['HS256']
+JWKS_ALGORITHMS = ['RS256', 'ES256']
+
+_jwks_clients = {}
+_jwks_lock = threading.Lock()
+
+
+@dataclass
+class SupabaseIdentity:
+    """The parts of a verified Supabase token the Django bridge cares about."""
+    sub: str
+    email: str
+    exp: Optional[int] = None
+
+
+class LocalVerificationUnavailable(Exception):
+    """Raised when a token cannot be checked locally (no key, JWKS unreachable)."""
+
+
+def get_jwks_client(url):
+    """
+    One PyJWKClient per JWKS URL and process. The client caches the key set
+    for SUPABASE_JWKS_CACHE_SECONDS and refetches early when it sees an
+    unknown 'kid', so key rotation is picked up without a restart.
+    """
+    client = _jwks_clients.get(url)
+    if client is None:
+        with _jwks_lock:
+            client = _jwks_clients.get(url)
+            if client is None:
+                client = jwt.PyJWKClient(
+                    url,
+                    cache_jwk_set=True,
+                    lifespan=settings.SUPABASE_JWKS_CACHE_SECONDS,
+                    timeout=settings.SUPABASE_JWKS_TIMEOUT,
+                )
+                _jwks_clients[url] = client
+    return client
+
+
+def verify_token_locally(token):
+    """
+    Checks the signature and claims of a Supabase access token in-process.
+    Raises jwt.InvalidTokenError for bad tokens and LocalVerificationUnavailable
+    when there is no key to check the token against.
+    """
+    algorithm = jwt.get_unverified_header(token).get('alg')
+
+    if algorithm in HMAC_ALGORITHMS and settings.SUPABASE_JWT_SECRET:
+        key = settings.SUPABASE_JWT_SECRET
+    elif algorithm in JWKS_ALGORITHMS and settings.SUPABASE_JWKS_URL:
+        try:
+            key = get_jwks_client(settings.SUPABASE_JWKS_URL).get_signing_key_from_jwt(token).key
+        except jwt.PyJWKClientConnectionError as e:
+            raise LocalVerificationUnavailable(str(e))
+    else:
+        raise LocalVerificationUnavailable(f'No key configured for {algorithm} tokens')
+
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience=settings.SUPABASE_JWT_AUDIENCE,
+        options={'require': ['exp', 'sub']},
+    )
+    return SupabaseIdentity(sub=claims['sub'], email=claims.get('email') or '', exp=claims['exp'])
+
+
+def verify_token_remotely(token):
+    """Asks Supabase to verify the token (one HTTP round-trip on the pooled client)."""
+    user_data = supabase_auth_client.get_user(token)
+    if not user_data:
+        raise exceptions.AuthenticationFailed('User not found in Supabase')
+
+    # Supabase has vouched for the token, so reading 'exp' unverified is safe.
+    exp = jwt.decode(token, options={'verify_signature': False}).get('exp')
+    return SupabaseIdentity(sub=user_data.id, email=user_data.email or '', exp=exp)
+
+
+async def averify_token_remotely(token):
+    """verify_token_remotely() for async views: the same GoTrue call, awaited."""
+    user_data = await supabase_auth_client.aget_user(token)
+    if not user_data or not user_data.get('id'):
+        raise exceptions.AuthenticationFailed('User not found in Supabase')
+
+    exp = jwt.decode(token, options={'verify_signature': False}).get('exp')
+    return SupabaseIdentity(sub=user_data['id'], email=user_data.get('email') or '', exp=exp)
+
+
+def verify_token(token):
+    """
+    Verifies a token according to SUPABASE_AUTH_MODE.
+
+    'local' (default) never leaves the process unless the token cannot be
+    checked locally and SUPABASE_AUTH_REMOTE_FALLBACK is enabled. A token
+    that fails a local check (bad signature, expired, wrong audience) is
+    rejected outright; it is not retried remotely.
+    """
+    try:
+        if settings.SUPABASE_AUTH_MODE == 'remote':
+            return verify_token_remotely(token)
+
+        try:
+            return verify_token_locally(token)
+        except LocalVerificationUnavailable:
+            if not settings.SUPABASE_AUTH_REMOTE_FALLBACK:
+                raise
+            return verify_token_remotely(token)
+
+    except (exceptions.AuthenticationFailed, SupabaseUnavailable):
+        raise
+    except Exception:
+        # print(f"\n\n🚨 AUTH ERROR: {str(e)}\n\n") # Optional: Un-comment for debugging
+        raise exceptions.AuthenticationFailed('Invalid Token')
+
+
+async def averify_token(token):
+    """
+    verify_token() without blocking the event loop: HS256 checks run inline
+    (pure CPU), JWKS checks in a thread (the key set may need fetching) and
+    remote checks are awaited.
+    """
+    try:
+        if settings.SUPABASE_AUTH_MODE == 'remote':
+            return await averify_token_remotely(token)
+
+        try:
+            if jwt.get_unverified_header(token).get('alg') in JWKS_ALGORITHMS:
+                return await sync_to_async(verify_token_locally, thread_sensitive=False)(token)
+            return verify_token_locally(token)
+        except LocalVerificationUnavailable:
+            if not settings.SUPABASE_AUTH_REMOTE_FALLBACK:
+                raise
+            return await averify_token_remotely(token)
+
+    except (exceptions.AuthenticationFailed, SupabaseUnavailable):
+        raise
+    except Exception:
+        raise exceptions.AuthenticationFailed('Invalid Token')
+
+
+async def _token_cache_call(method, *args, **kwargs):
+    # In-process lookups are plain dict work; the shared tier is a cache
+    # round trip (Redis etc.), which goes to a thread.
+    if token_cache.shared is None:
+        return method(*args, **kwargs)
+    return await sync_to_async(method, thread_sensitive=False)(*args, **kwargs)
+
 
 class SupabaseAuthentication(authentication.BaseAuthentication):
-    def authenticate(self, request):
+    def get_token(self, request):
         auth_header = request.headers.get('Authorization')
-        
+
         if not auth_header:
             return None
 
+        # 1. Extract the token
         try:
-            # 1. Initialize Supabase Client
-            url: str = settings.SUPABASE_URL
-            key: str = settings.SUPABASE_KEY
-            supabase: Client = create_client(url, key)
+            return auth_header.split(' ')[1]
+        except IndexError:
+            raise exceptions.AuthenticationFailed('Invalid Token')
 
-            # 2. Extract the token
-            token = auth_header.split(' ')[1]
+    def check_verification_rate(self, request):
+        """Raises Throttled once an IP sends more new tokens than THROTTLE_RATES['auth'] allows."""
+        throttle = VerificationThrottle()
+        if not throttle.allow_request(request, None):
+            raise exceptions.Throttled(throttle.wait())
 
-            # 3. Ask Supabase to verify the User
-            user_response = supabase.auth.get_user(token)
-            user_data = user_response.user
+    def authenticate(self, request):
+        with timed('auth'):
+            return self._authenticate(request)
 
-            if not user_data:
-                raise exceptions.AuthenticationFailed('User not found in Supabase')
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views: the same steps, with the Supabase
+        call, the user lookup and any shared token-cache read awaited.
+        """
+        with timed('auth'):
+            return await self._aauthenticate(request)
 
-        except Exception as e:
-            # print(f"\n\n🚨 AUTH ERROR: {str(e)}\n\n") # Optional: Un-comment for debugging
-            raise exceptions.AuthenticationFailed('Invalid Token')
+    def _authenticate(self, request):
+        # Already done on the event loop by an async view (config.async_views)?
+        result = getattr(request, 'supabase_auth', None)
+        if result is not None:
+            if isinstance(result, exceptions.APIException):
+                raise result
+            return result or None
+
+        token = self.get_token(request)
+        if token is None:
+            return None
+
+        # 2. Seen this token recently? Skip verification and the user lookup.
+        user = token_cache.get_by_token(token)
+        if user is not None:
+            return (user, None)
+
+        # 3. Verify the token (locally by default, see SUPABASE_AUTH_MODE),
+        #    unless this IP has been sending too many new ones
+        self.check_verification_rate(request)
+        identity = verify_token(token)
 
         # 4. Get Email
-        user_email = user_data.email
+        user_email = identity.email
         if not user_email:
             raise exceptions.AuthenticationFailed('Token has no email')
 
         # 5. Bridge to Django User (STRICT READ-ONLY)
         # We DO NOT create users here. We wait for the Supabase SQL Trigger to do it.
-        try:
-            # We look up by email because the SQL trigger ensures email is synced
-            user = User.objects.get(email=user_email)
-        except User.DoesNotExist:
-            # If the user exists in Supabase but not in Django yet, 
-            # it means they haven't verified their email (or the trigger failed).
-            raise exceptions.AuthenticationFailed(
-                'Account not fully active. Please verify your email.'
-            )
-
-        return (user, None)
\ No newline at end of file
+        user = token_cache.get_by_email(user_email)
+        if user is None:
+            try:
+                # We look up by email because the SQL trigger ensures email is synced
+                user = User.objects.get(email=user_email)
+            except User.DoesNotExist:
+                # If the user exists in Supabase but not in Django yet,
+                # it means they haven't verified their email (or the trigger failed).
+                raise exceptions.AuthenticationFailed(
+                    'Account not fully active. Please verify your email.'
+                )
+
+        token_cache.set(token, user, token_expires_at=identity.exp)
+        return (user, None)
+
+    async def _aauthenticate(self, request):
+        token = self.get_token(request)
+        if token is None:
+            return None
+
+        user = await _token_cache_call(token_cache.get_by_token, token)
+        if user is not None:
+            return (user, None)
+
+        # The counter may be a cache round trip: in a thread, and only when rated
+        if settings.THROTTLE_RATES.get(VerificationThrottle.scope):
+            await sync_to_async(self.check_verification_rate, thread_sensitive=False)(request)
+        identity = await averify_token(token)
+
+        user_email = identity.email
+        if not user_email:
+            raise exceptions.AuthenticationFailed('Token has no email')
+
+        user = await _token_cache_call(token_cache.get_by_email, user_email)
+        if user is None:
+            try:
+                user = await User.objects.aget(email=user_email)
+            except User.DoesNotExist:
+                raise exceptions.AuthenticationFailed(
+                    'Account not fully active. Please verify your email.'
+                )
+
+        await _token_cache_call(token_cache.set, token, user, token_expires_at=identity.exp)
+        return (user, None)
@@ -0,0 +1,60 @@
+"""
+HTTP conditional GETs (ETag / Last-Modified) for read endpoints.
+
+A view answers get_validators() cheaply (a row's updated_at; for a list,
+the shared response cache's namespace versions, or Max(updated_at) + Count
+when that cache is off) *before* anything is serialized. If the client's If-None-Match / If-Modified-Since still match,
+it gets an empty 304; otherwise the normal response, carrying the
+validators, so the browser's HTTP cache revalidates it next time.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin: ETag / Last-Modified for list and retrieve.
+
+    Subclasses implement get_validators(request) returning
+    (parts, last_modified): `parts` is any sequence of values that changes
+    whenever the response would (hashed into the ETag) and last_modified a
+    datetime or None. Returning None skips conditional handling.
+    """
+
+    def get_validators(self, request):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
+
+    def conditional_response(self, request, build, on_not_modified=None):
+        validators = self.get_validators(request) if request.method in ('GET', 'HEAD') else None
+        if validators is None:
+            return build()
+
+        parts, last_modified = validators
+        # The URL (query string, page) is implied: validators are per URL
+        etag = quote_etag(hashlib.md5(repr(list(parts)).encode()).hexdigest())
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            if on_not_modified is not None:
+                on_not_modified()
+        else:
+            response = build()
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Always revalidate; authenticated responses differ per user
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
@@ -0,0 +1,112 @@
+"""
+Sparse fieldsets for the read endpoints.
+
+    ?fields=id,title,price    render only these fields
+    ?view=compact             leave out what a list card doesn't need (the
+                              serializer's Meta.expandable_fields)
+    ?expand=images,bio        with ?view=compact: add some of those back
+
+Without them every field is rendered, as before. SparseFieldsetMixin
+(views) passes the choice to the serializer context on GET/HEAD, and
+SparseFieldsSerializerMixin drops every other readable field.
+Unknown names are ignored. On the view's `sparse_actions` the queryset is
+narrowed to match (narrow_queryset): .only() the columns the rendered
+fields read and select_related() only the relations they traverse, so a
+compact page loads neither unused columns nor unused related rows.
+
+Fields backed by a method (source='*') declare the model paths they read in
+Meta.field_sources, e.g. {'renditions': ('image', 'renditions')}; to-many
+relations are left to the view to prefetch.
+"""
+from django.core.exceptions import FieldDoesNotExist
+
+
+def split_names(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def selected_names(serializer_class, names, context):
+    """Which of `names` to render for the context's 'fields' / 'compact' / 'expand'."""
+    expand = context.get('expand') or set()
+    requested = context.get('fields')
+    if requested:
+        return {name for name in names if name in requested or name in expand}
+    if not context.get('compact'):
+        return set(names)
+    expandable = set(getattr(serializer_class.Meta, 'expandable_fields', ()))
+    return {name for name in names if name not in expandable or name in expand}
+
+
+class SparseFieldsSerializerMixin:
+    """ModelSerializer mixin: renders only the fields selected by the request (write-only fields stay)."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        keep = selected_names(type(self), fields, self.context)
+        return {name: field for name, field in fields.items() if field.write_only or name in keep}
+
+
+def _add_path(opts, path, columns, related):
+    parts = path.split('__')
+    for depth, part in enumerate(parts):
+        try:
+            field = opts.get_field(part)
+        except FieldDoesNotExist:
+            return  # a property or annotation: nothing to load for it
+        if field.many_to_many or field.one_to_many:
+            return  # prefetched by the view, if at all
+        name = '__'.join(parts[:depth + 1])
+        if field.concrete:
+            columns.add(name)
+        if not field.is_relation or depth == len(parts) - 1:
+            return
+        related.add(name)
+        opts = field.related_model._meta
+
+
+def narrow_queryset(queryset, serializer):
+    """queryset.only() the columns `serializer`'s readable fields read, with select_related() for their relations."""
+    opts = queryset.model._meta
+    sources = getattr(serializer.Meta, 'field_sources', {})
+    columns, related = {opts.pk.name}, set()
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in sources:
+            paths = sources[name]
+        elif field.source == '*':
+            paths = ()
+        else:
+            paths = [field.source.replace('.', '__')]
+        for path in paths:
+            _add_path(opts, path, columns, related)
+    if related:
+        queryset = queryset.select_related(*sorted(related))  # select_related() alone would join everything
+    return queryset.only(*sorted(columns))
+
+
+class SparseFieldsetMixin:
+    """
+    ViewSet mixin: ?fields= / ?view=compact / ?expand= on GET and HEAD. Actions in
+    `sparse_actions` get a narrowed queryset from sparse_queryset().
+    """
+    sparse_actions = ('list',)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        request = self.request
+        if request is not None and request.method in ('GET', 'HEAD'):
+            context['fields'] = split_names(request.query_params.get('fields'))
+            context['compact'] = request.query_params.get('view') == 'compact'
+            context['expand'] = split_names(request.query_params.get('expand'))
+        return context
+
+    def sparse_serializer(self):
+        """The serializer as this request will render it, or None outside `sparse_actions`."""
+        if self.action not in self.sparse_actions:
+            return None
+        return self.get_serializer_class()(context=self.get_serializer_context())
+
+    def sparse_queryset(self, queryset):
+        serializer = self.sparse_serializer()
+        return queryset if serializer is None else narrow_queryset(queryset, serializer)
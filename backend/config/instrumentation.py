@@ -0,0 +1,263 @@
+"""
+Per-request performance instrumentation.
+
+RequestMetricsMiddleware measures every request and attributes it to a
+route: `ShoeViewSet.list`, `ProfileViewSet.retrieve`, `sitemap`... For
+each one it records
+
+    wall time, DB query count and time, Supabase auth time, serialization
+    time (serializer .data + rendering) and response size
+
+as histograms on /metrics (config.metrics) and as one JSON log line on the
+`config.requests` logger. Queries slower than SLOW_QUERY_MS are logged on
+`config.slow_queries` with their SQL and route.
+
+Measurements go to a RequestStats held in a context variable, so work done
+in threads for async views (sync_to_async copies the context) is counted
+for the right request. Queries are timed by a wrapper installed on every
+database connection; auth and serialization time are added by timed()
+blocks in SupabaseAuthentication and TimedSerializerMixin.
+"""
+import contextvars
+import json
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+from .metrics import counter, histogram
+
+request_logger = logging.getLogger('config.requests')
+slow_query_logger = logging.getLogger('config.slow_queries')
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+request_seconds = histogram(
+    'http_request_duration_seconds', 'Wall time per request', ('route', 'method', 'status'))
+db_queries = histogram(
+    'http_request_db_queries', 'Database queries per request', ('route',), buckets=QUERY_BUCKETS)
+db_seconds = histogram(
+    'http_request_db_seconds', 'Time spent in database queries per request', ('route',))
+auth_seconds = histogram(
+    'http_request_auth_seconds', 'Time spent authenticating per request', ('route',))
+serialization_seconds = histogram(
+    'http_request_serialization_seconds', 'Time spent serializing and rendering per request', ('route',))
+response_bytes = histogram(
+    'http_response_size_bytes', 'Response body size', ('route',), buckets=SIZE_BUCKETS)
+slow_queries = counter(
+    'db_slow_queries_total', 'Queries slower than SLOW_QUERY_MS', ('route',))
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+@dataclass
+class RequestStats:
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    auth_seconds: float = 0.0
+    serialization_seconds: float = 0.0
+    slow_queries: int = 0
+    route: str = 'unmatched'
+    _active: set = field(default_factory=set, repr=False)
+
+
+def current_stats():
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """Adds the block's duration to the current request's `<name>_seconds` (nested blocks count once)."""
+    stats = _current.get()
+    if stats is None or name in stats._active:
+        yield
+        return
+    stats._active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats._active.discard(name)
+        attr = f'{name}_seconds'
+        setattr(stats, attr, getattr(stats, attr) + time.perf_counter() - start)
+
+
+# --- Database ---
+
+def instrument_query(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats = _current.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+        if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+            route = stats.route if stats is not None else None
+            if stats is not None:
+                stats.slow_queries += 1
+                slow_queries.inc(route=route)
+            slow_query_logger.warning(
+                'slow query', extra={'data': {
+                    'route': route,
+                    'ms': round(elapsed * 1000, 2),
+                    'sql': sql if len(sql) <= 2000 else sql[:2000] + '...',
+                    'many': many,
+                }})
+
+
+def install_query_timer(connection):
+    if instrument_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(instrument_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    install_query_timer(connection)
+
+
+connection_created.connect(_on_connection_created)
+
+
+# --- Serialization ---
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timed('serialization'):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin: building .data counts as serialization time. Set
+    `list_serializer_class = TimedListSerializer` in Meta for many=True.
+    """
+
+    @property
+    def data(self):
+        with timed('serialization'):
+            return super().data
+
+
+# --- Middleware ---
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is not None:
+        actions = getattr(match.func, 'actions', None) or {}
+        action = actions.get(request.method.lower(), request.method.lower())
+        return f'{view_class.__name__}.{action}'
+    return match.url_name or match.view_name or 'unmatched'
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and the record's `data`."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'data', None) or {})
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, start)
+
+    async def __acall__(self, request):
+        stats, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, start)
+
+    def start(self):
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+        stats = RequestStats()
+        return stats, _current.set(stats), time.perf_counter()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = _current.get()
+        if stats is not None:
+            stats.route = route_name(request)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this: time it as serialization
+        stats = _current.get()
+        if stats is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                stats.serialization_seconds += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, stats, start):
+        elapsed = time.perf_counter() - start
+        route = stats.route
+        if response.streaming:
+            size = int(response['Content-Length']) if response.has_header('Content-Length') else None
+        else:
+            size = len(response.content)
+
+        request_seconds.observe(elapsed, route=route, method=request.method,
+                                status=f'{response.status_code // 100}xx')
+        db_queries.observe(stats.db_queries, route=route)
+        db_seconds.observe(stats.db_seconds, route=route)
+        auth_seconds.observe(stats.auth_seconds, route=route)
+        serialization_seconds.observe(stats.serialization_seconds, route=route)
+        if size is not None:
+            response_bytes.observe(size, route=route)
+
+        data = {k: v for k, v in asdict(stats).items() if not k.startswith('_')}
+        data.update({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'ms': round(elapsed * 1000, 2),
+            'db_ms': round(stats.db_seconds * 1000, 2),
+            'auth_ms': round(stats.auth_seconds * 1000, 2),
+            'serialization_ms': round(stats.serialization_seconds * 1000, 2),
+            'bytes': size,
+        })
+        for key in ('db_seconds', 'auth_seconds', 'serialization_seconds'):
+            del data[key]
+        request_logger.info('request', extra={'data': data})
+        return response
@@ -0,0 +1,168 @@
+"""
+Serving user uploads under MEDIA_URL.
+
+MEDIA_SERVE_MODE picks who moves the bytes:
+
+    django     this view streams the file itself, with single-range
+               support: under WSGI through wsgi.file_wrapper (gunicorn can
+               use sendfile()), under ASGI from an async iterator that reads
+               each chunk in a thread (a sync iterator would be read into
+               memory whole)
+    x-accel    nginx: the view only checks the path and answers with
+               X-Accel-Redirect to MEDIA_ACCEL_PREFIX (an `internal`
+               location aliased to MEDIA_ROOT); nginx sends the file
+    sendfile   Apache mod_xsendfile / lighttpd: X-Sendfile with the path
+    off        not routed at all (a CDN, bucket or the web server serves
+               MEDIA_URL directly)
+
+In every mode the response carries ETag / Last-Modified (and answers
+conditional requests with 304). Content-hashed names (config.storage) get
+`Cache-Control: public, max-age=31536000, immutable`; anything else is
+cached for MEDIA_CACHE_SECONDS and revalidated.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+from .storage import is_hashed
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+CHUNK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single 'bytes=' range, or None to send the
+    whole file (no header, several ranges, or one we don't understand).
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    """False if If-Range names an older version (then the full file is sent)."""
+    value = request.headers.get('If-Range')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+async def aread_range(path, start, length):
+    """read_range() for ASGI responses: the blocking reads run in threads."""
+    chunks = read_range(path, start, length)
+    next_chunk = sync_to_async(next, thread_sensitive=False)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        chunks.close()
+
+
+def cache_control(path):
+    if is_hashed(path):
+        return IMMUTABLE
+    return f'public, max-age={settings.MEDIA_CACHE_SECONDS}'
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (OSError, ValueError, SuspiciousFileOperation):
+        raise Http404('No such file')
+    if not os.path.isfile(full_path):
+        raise Http404('No such file')
+
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{size:x}')
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    mode = settings.MEDIA_SERVE_MODE
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        if mode == 'x-accel':
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + quote(path)
+        elif mode == 'sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = full_path
+        else:
+            response = file_response(request, full_path, size, content_type, etag, last_modified)
+
+    if response.status_code in (200, 206, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = cache_control(path)
+    return response
+
+
+def file_response(request, full_path, size, content_type, etag, last_modified):
+    """The whole file, or the one byte range the client asked for."""
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is not None and not if_range_matches(request, etag, last_modified):
+        byte_range = None
+
+    if byte_range is None and not isinstance(request, ASGIRequest):
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range or (0, size - 1)
+        reader = aread_range if isinstance(request, ASGIRequest) else read_range
+        response = StreamingHttpResponse(
+            reader(full_path, start, end - start + 1), status=206 if byte_range else 200, content_type=content_type)
+        response['Content-Length'] = str(end - start + 1)
+        if byte_range:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        else:
+            response['Content-Disposition'] = content_disposition_header(False, os.path.basename(full_path))
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,131 @@
+"""
+Tiny in-process metrics registry, rendered in the Prometheus text format
+by config.views.metrics_view.
+
+Values are per process (one set per gunicorn worker); scrape each worker or
+aggregate them in Prometheus.
+"""
+import bisect
+import threading
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+        for k, v in labels
+    )
+    return '{' + pairs + '}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple((name, labels.get(name, '')) for name in self.labelnames)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        for key, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{_format_labels(key)} {value}')
+        return lines
+
+
+class Histogram(Counter):
+    """Observations counted into cumulative `le` buckets, plus their sum and count."""
+    kind = 'histogram'
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=None):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets or self.DEFAULT_BUCKETS))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # per-bucket counts (made cumulative when rendered), then sum, count
+            entry = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                entry[index] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def inc(self, amount=1, **labels):
+        raise TypeError('Histograms are updated with observe()')
+
+    def value(self, **labels):
+        """Number of observations."""
+        entry = self._values.get(self._key(labels))
+        return entry[-1] if entry else 0
+
+    def sum(self, **labels):
+        entry = self._values.get(self._key(labels))
+        return entry[-2] if entry else 0.0
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        for key, entry in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(key + (("le", bound),))} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(key + (("le", "+Inf"),))} {entry[-1]}')
+            lines.append(f'{self.name}_sum{_format_labels(key)} {entry[-2]}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {entry[-1]}')
+        return lines
+
+
+def _register(cls, name, *args, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, *args, **kwargs)
+        return metric
+
+
+def counter(name, documentation, labelnames=()):
+    """Returns the registered counter called `name`, creating it on first use."""
+    return _register(Counter, name, documentation, labelnames)
+
+
+def histogram(name, documentation, labelnames=(), buckets=None):
+    """Returns the registered histogram called `name`, creating it on first use."""
+    return _register(Histogram, name, documentation, labelnames, buckets)
+
+
+def render_prometheus():
+    lines = []
+    for name in sorted(_registry):
+        lines.extend(_registry[name].render())
+    return '\n'.join(lines) + '\n'
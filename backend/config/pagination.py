@@ -0,0 +1,177 @@
+"""
+Pagination for list endpoints.
+
+By default this is DRF's PageNumberPagination (?page=N, with a total
+'count'). Clients can opt in to keyset ("cursor") pagination with
+?pagination=cursor and then follow the 'next' / 'previous' links, which
+carry ?cursor=<token>.
+
+Keyset pages are read with WHERE (created_at, id) < (last seen) instead of
+COUNT(*) + OFFSET, so every page costs the same however deep the client
+scrolls, and rows created meanwhile don't shift the pages. The keys follow
+the queryset's ordering (e.g. ?ordering=price or -views), with the primary
+key appended as the tie-breaker.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination:
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, page_size):
+        self.page_size = page_size
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # --- Ordering keys ---
+    def get_ordering(self, queryset):
+        """[(field name, descending)] for the queryset, ending with the pk."""
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering or ['-pk'])
+        if not all(isinstance(item, str) for item in ordering):
+            return None  # expression ordering: not supported
+        keys = [(item.lstrip('-'), item.startswith('-')) for item in ordering]
+        if any(self.get_field(queryset, name) is None for name, _ in keys):
+            return None  # related lookups etc.: not supported
+        keys = [('pk' if name == queryset.model._meta.pk.name else name, desc) for name, desc in keys]
+        if not any(name == 'pk' for name, _ in keys):
+            keys.append(('pk', keys[0][1]))
+        return keys
+
+    def get_field(self, queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        if name == 'pk':
+            return queryset.model._meta.pk
+        try:
+            return queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    # --- Cursor encoding ---
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({'v': values, 'r': reverse}, default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token, queryset, keys):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            raw_values, reverse = payload['v'], bool(payload['r'])
+            if len(raw_values) != len(keys):
+                raise ValueError
+            values = [
+                self.get_field(queryset, name).to_python(value)
+                for (name, _), value in zip(keys, raw_values)
+            ]
+        except (TypeError, ValueError, KeyError, AttributeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def position(self, obj, keys):
+        if isinstance(obj, dict):  # values() rows (config/values_serialization.py)
+            return [obj[self.pk_name if name == 'pk' else name] for name, _ in keys]
+        return [getattr(obj, name) for name, _ in keys]
+
+    def after(self, keys, values, reverse):
+        """Rows strictly after `values` in the (possibly reversed) ordering."""
+        condition = Q()
+        equal = Q()
+        for (name, desc), value in zip(keys, values):
+            lookup = 'lt' if desc != reverse else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    # --- Paginator API ---
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        keys = self.get_ordering(queryset)
+        if keys is None:
+            return None
+        self.keys = keys
+        self.pk_name = queryset.model._meta.pk.name
+        page_size = self.get_page_size(request)
+
+        token = request.query_params.get(self.cursor_query_param)
+        reverse = False
+        if token:
+            values, reverse = self.decode_cursor(token, queryset, keys)
+            queryset = queryset.filter(self.after(keys, values, reverse))
+
+        order = [('-' if desc != reverse else '') + name for name, desc in keys]
+        rows = list(queryset.order_by(*order)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = bool(token) if not reverse else has_more
+        self.first = self.position(rows[0], keys) if rows else None
+        self.last = self.position(rows[-1], keys) if rows else None
+        return rows
+
+    def link(self, values, reverse):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values, reverse))
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.link(self.last, False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first is None:
+            return None
+        return self.link(self.first, True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class OptInCursorPagination(PageNumberPagination):
+    """PageNumberPagination unless the client asks for ?pagination=cursor (or sends ?cursor=)."""
+    mode_query_param = 'pagination'
+
+    def wants_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.wants_cursor(request):
+            keyset = KeysetPagination(self.page_size)
+            page = keyset.paginate_queryset(queryset, request, view)
+            if page is not None:
+                self.keyset = keyset
+                return page
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
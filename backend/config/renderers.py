@@ -0,0 +1,79 @@
+"""
+JSON rendering for the API (REST_FRAMEWORK's DEFAULT_RENDERER_CLASSES,
+chosen with API_JSON_RENDERER).
+
+FastJSONRenderer writes the same bytes as DRF's JSONRenderer, up to several times
+faster, using orjson when it is installed. Without orjson, and for anything
+orjson can't or wouldn't write the same way, it is DRF's JSONRenderer
+(stdlib json):
+
+    ?indent= / non-compact / ASCII-only settings     JSONRenderer
+    datetimes, Decimals, lazy strings, sets...       DRF's JSONEncoder.default()
+    ints over 64 bits, lone surrogates               JSONRenderer (orjson refuses them)
+    U+2028 / U+2029                                  escaped, as JSONRenderer does
+    floats under 1e-4, NaN, Infinity                 JSONRenderer (orjson writes 0.00001
+                                                     for 1e-05, and null for NaN where
+                                                     JSONRenderer raises)
+
+Those floats are spotted in orjson's output, which is cheap: a tiny float
+is the only thing orjson writes as a bare 0.0000... (a string that merely
+contains it just costs the fallback), and NaN / Infinity become null: as a
+key that is "null": (left to JSONRenderer outright), as a value it could be
+None, so only output with a null in it has its values walked.
+"""
+import math
+import re
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional: JSONRenderer's stdlib json is used instead
+    orjson = None
+
+if orjson is not None:
+    # Datetimes go through the encoder's default() ('Z', milliseconds), like JSONRenderer
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+# How orjson writes 0 < |x| < 1e-4 (json writes 1e-05)
+TINY_FLOAT = re.compile(rb'0\.0000')
+# Skipped by has_odd_floats without a call
+SCALARS = frozenset((str, int, bool, type(None)))
+
+
+def has_odd_floats(data):
+    """True if `data` holds a float value orjson writes differently from json: NaN, Infinity or 0 < |x| < 1e-4."""
+    if isinstance(data, float):
+        return data != 0 and not 1e-4 <= abs(data) < math.inf
+    if isinstance(data, dict):
+        data = data.values()
+    elif not isinstance(data, (list, tuple)):
+        return False
+    for value in data:
+        if type(value) not in SCALARS and has_odd_floats(value):
+            return True
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        encode = self.encoder_class().default
+
+        def default(obj):
+            value = encode(obj)  # e.g. a Decimal comes back as a float
+            if has_odd_floats(value):
+                raise TypeError('left to JSONRenderer')
+            return value
+
+        try:
+            ret = orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if (TINY_FLOAT.search(ret) or b'"null":' in ret
+                or (b'null' in ret and has_odd_floats(data))):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Valid JSON but not valid JavaScript: escaped like JSONRenderer does
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,170 @@
+"""
+Response cache for anonymous GETs on the read-heavy endpoints.
+
+Only the response *data* is cached (it is rendered per request, so JSON and
+the browsable API share entries). Keys are built from the endpoint name,
+the normalized URL (host, path, sorted query params) and the current
+version of every namespace the endpoint depends on:
+
+    shoes      Shoe, ShoeImage                  (market.signals)
+    profiles   Profile, User, seller ratings    (users.signals, reviews.signals)
+    reviews    Review                           (reviews.signals)
+
+A model change bumps its namespace version, which orphans every key built
+with the old one; orphans simply expire after RESPONSE_CACHE_TIMEOUT.
+Versions live in the same cache alias, so with Redis every worker sees the
+bump at once.
+
+RESPONSE_CACHE_ENDPOINTS switches endpoints on individually; hit/miss
+counts are exported on /metrics as response_cache_requests_total.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from . import metrics
+
+cache_requests = metrics.counter(
+    'response_cache_requests_total',
+    'Anonymous GETs served from (hit) or stored in (miss) the response cache, by endpoint.',
+    labelnames=('endpoint', 'result'),
+)
+cache_invalidations = metrics.counter(
+    'response_cache_invalidations_total',
+    'Response cache namespace version bumps.',
+    labelnames=('namespace',),
+)
+
+PREFIX = 'response-cache'
+
+
+class ResponseCache:
+    # --- Settings (read lazily so override_settings works in tests) ---
+    @property
+    def cache(self):
+        return caches[settings.RESPONSE_CACHE_ALIAS]
+
+    @property
+    def timeout(self):
+        return settings.RESPONSE_CACHE_TIMEOUT
+
+    def is_enabled(self, endpoint):
+        return endpoint in settings.RESPONSE_CACHE_ENDPOINTS
+
+    # --- Keys ---
+    def versions(self, namespaces):
+        keys = [f'{PREFIX}:version:{ns}' for ns in namespaces]
+        found = self.cache.get_many(keys)
+        missing = {key: self.new_version() for key in keys if key not in found}
+        if missing:
+            # add() so two workers initializing at once agree on one value
+            for key, version in missing.items():
+                self.cache.add(key, version, timeout=None)
+            found.update(self.cache.get_many(list(missing)))
+        return [found.get(key, 0) for key in keys]
+
+    @staticmethod
+    def new_version():
+        # Time based, so a version that was evicted never comes back as an old number
+        return int(time.time() * 1000)
+
+    def make_key(self, endpoint, request, namespaces):
+        params = sorted(
+            (name, sorted(values)) for name, values in request.query_params.lists()
+        )
+        url = f'{request.scheme}://{request.get_host()}{request.path}?{params}'
+        versions = '.'.join(str(v) for v in self.versions(namespaces))
+        digest = hashlib.md5(url.encode()).hexdigest()
+        return f'{PREFIX}:{endpoint}:{versions}:{digest}'
+
+    # --- Entries ---
+    def get(self, key, endpoint):
+        data = self.cache.get(key)
+        cache_requests.inc(endpoint=endpoint, result='miss' if data is None else 'hit')
+        return data
+
+    def set(self, key, data):
+        self.cache.set(key, data, timeout=self.timeout)
+
+    # --- Invalidation ---
+    def bump(self, *namespaces):
+        """
+        Invalidates every cached response that depends on these namespaces.
+        Bumps again once the surrounding transaction commits, so a request
+        that read the old rows in between can't leave them cached.
+        """
+        self._bump(namespaces)
+        transaction.on_commit(lambda: self._bump(namespaces))
+
+    def _bump(self, namespaces):
+        cache = self.cache
+        for ns in namespaces:
+            key = f'{PREFIX}:version:{ns}'
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, self.new_version(), timeout=None)
+            cache_invalidations.inc(namespace=ns)
+
+    def stats(self):
+        """{endpoint: {'hits', 'misses', 'hit_ratio'}} for the enabled endpoints (this process)."""
+        stats = {}
+        for endpoint in settings.RESPONSE_CACHE_ENDPOINTS:
+            hits = cache_requests.value(endpoint=endpoint, result='hit')
+            misses = cache_requests.value(endpoint=endpoint, result='miss')
+            stats[endpoint] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+            }
+        return stats
+
+
+response_cache = ResponseCache()
+
+
+class CachedResponseMixin:
+    """
+    ViewSet mixin: caches list/retrieve responses for anonymous users.
+
+    cached_actions maps a DRF action to (endpoint name, namespaces), e.g.
+        cached_actions = {'list': ('shoes-list', ('shoes', 'profiles'))}
+    Actions in shared_cached_actions don't depend on who asks, so signed-in
+    users are served from (and fill) the cache too.
+    """
+    cached_actions = {}
+    shared_cached_actions = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
+
+    def cached_response(self, request, build, on_hit=None):
+        """
+        Returns the cached response data if there is any, else build() and
+        caches its data. on_hit(data) may adjust a hit or return None to
+        treat it as a miss.
+        """
+        endpoint, namespaces = self.cached_actions.get(self.action, (None, ()))
+        shared = self.action in self.shared_cached_actions
+        if (endpoint is None or request.method != 'GET'
+                or (request.user.is_authenticated and not shared) or not response_cache.is_enabled(endpoint)):
+            return build()
+
+        key = response_cache.make_key(endpoint, request, namespaces)
+        data = response_cache.get(key, endpoint)
+        if data is not None and on_hit is not None:
+            data = on_hit(data)
+        if data is not None:
+            return Response(data)
+
+        response = build()
+        if response.status_code == 200:
+            response_cache.set(key, response.data)
+        return response
@@ -5,7 +5,8 @@ Generated by 'django-admin startproject' using Django 6.0.
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
 import dj_database_url
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -41,10 +42,12 @@ INSTALLED_APPS = [
     "users",
     "market",
     "reviews",
+    "benchmarks",
 ]
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",  # MUST BE AT THE TOP
+    "config.instrumentation.RequestMetricsMiddleware",  # per-route timings -> /metrics + logs
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # Static files
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -78,12 +81,16 @@ WSGI_APPLICATION = "config.wsgi.application"
 # DATABASE
 # -----------------------------------------------------------------------------
 DATABASE_URL = config("DATABASE_URL", default="")
+# Seconds a connection is kept for reuse. config/asgi.py sets 0: under ASGI each
+# sync_to_async thread would hold its own persistent connection and nothing
+# closes them, so they pile up until Postgres runs out of max_connections.
+DB_CONN_MAX_AGE = config("DB_CONN_MAX_AGE", default=600, cast=int)
 
 if DATABASE_URL:
     DATABASES = {
         "default": dj_database_url.config(
             default=DATABASE_URL,
-            conn_max_age=600,
+            conn_max_age=DB_CONN_MAX_AGE,
             ssl_require=True,
         )
     }
@@ -105,6 +112,75 @@ AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
 ]
 
+# -----------------------------------------------------------------------------
+# CACHE
+# -----------------------------------------------------------------------------
+# Shared cache (Redis) in production, per-process memory locally and in tests.
+REDIS_URL = config("REDIS_URL", default="")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Cached anonymous GET responses (see config/response_cache.py).
+# Endpoints: shoes-list, shoes-detail, shoes-facets, profiles-detail, profiles-page, reviews-list
+# The versions that invalidate them live in the cache too, so a per-process
+# LocMemCache would only see its own worker's writes: on by default with
+# REDIS_URL, and refused without it unless DEBUG (one runserver process).
+RESPONSE_CACHE_ALIAS = config("RESPONSE_CACHE_ALIAS", default="default")
+RESPONSE_CACHE_TIMEOUT = config("RESPONSE_CACHE_TIMEOUT", default=300, cast=int)
+RESPONSE_CACHE_ENDPOINTS = config(
+    "RESPONSE_CACHE_ENDPOINTS",
+    default="shoes-list,shoes-detail,shoes-facets,profiles-detail,profiles-page,reviews-list" if REDIS_URL else "",
+    cast=Csv(),
+)
+if RESPONSE_CACHE_ENDPOINTS and not REDIS_URL and not DEBUG:
+    raise ImproperlyConfigured(
+        "RESPONSE_CACHE_ENDPOINTS needs a cache shared by all workers (REDIS_URL): "
+        "with per-process memory, writes would not invalidate the other workers' copies."
+    )
+
+# Per-user liked-shoe id sets behind ShoeSerializer.is_liked (market/wishlist.py)
+LIKED_SHOES_CACHE_ALIAS = config("LIKED_SHOES_CACHE_ALIAS", default="default")
+LIKED_SHOES_CACHE_TIMEOUT = config("LIKED_SHOES_CACHE_TIMEOUT", default=3600, cast=int)
+
+# Shoe view counting (see market/view_counter.py)
+VIEW_COUNT_STORE = config("VIEW_COUNT_STORE", default="market.view_counter.LocalViewCountStore")
+VIEW_COUNT_CACHE_ALIAS = config("VIEW_COUNT_CACHE_ALIAS", default="default")
+VIEW_COUNT_FLUSH_SECONDS = config("VIEW_COUNT_FLUSH_SECONDS", default=10, cast=float)
+# A viewer is counted once per shoe per window (0 disables deduplication)
+VIEW_COUNT_DEDUPE_SECONDS = config("VIEW_COUNT_DEDUPE_SECONDS", default=1800, cast=int)
+
+# URLs per sitemap-<n>.xml file (the sitemaps.org limit is 50,000)
+SITEMAP_PAGE_SIZE = config("SITEMAP_PAGE_SIZE", default=50000, cast=int)
+
+# Price bucket edges for /api/shoes/facets/ (market/facets.py): 0-50, 50-100, ..., 500+
+FACET_PRICE_BUCKETS = config("FACET_PRICE_BUCKETS", default="50,100,200,500", cast=Csv(int))
+
+# Listing archive (market/archive.py, `manage.py archive_shoes`): sold shoes
+# move out of the Shoe table this many days after their last update; with
+# ARCHIVE_STALE_AFTER_DAYS > 0, so does any listing untouched for that long.
+ARCHIVE_SOLD_AFTER_DAYS = config("ARCHIVE_SOLD_AFTER_DAYS", default=30, cast=int)
+ARCHIVE_STALE_AFTER_DAYS = config("ARCHIVE_STALE_AFTER_DAYS", default=0, cast=int)
+
+# Reviews and listings per page on /api/profiles/<username>/page/ (users/seller_page.py)
+SELLER_PAGE_REVIEWS = config("SELLER_PAGE_REVIEWS", default=10, cast=int)
+SELLER_PAGE_LISTINGS = config("SELLER_PAGE_LISTINGS", default=12, cast=int)
+
+# Async views for shoe list/detail/favorites, profile detail and seller page, and the sitemap
+# (config/async_views.py). config/asgi.py turns this on; leave it off under WSGI.
+ASYNC_READ_VIEWS = config("ASYNC_READ_VIEWS", default=False, cast=bool)
+
 # -----------------------------------------------------------------------------
 # I18N
 # -----------------------------------------------------------------------------
@@ -118,11 +194,33 @@ USE_TZ = True
 # -----------------------------------------------------------------------------
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
-
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# STATICFILES_STORAGE is ignored since Django 5.1; both backends live here.
+# Uploads get content-hashed names (config/storage.py).
+STORAGES = {
+    "default": {"BACKEND": "config.storage.HashedMediaStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
+
+# How MEDIA_URL is served (see config/media.py): django, x-accel, sendfile or off
+MEDIA_SERVE_MODE = config("MEDIA_SERVE_MODE", default="django")
+# nginx `internal` location aliased to MEDIA_ROOT, for x-accel
+MEDIA_ACCEL_PREFIX = config("MEDIA_ACCEL_PREFIX", default="/protected-media/")
+# Browser cache lifetime for media without a content hash in the name
+MEDIA_CACHE_SECONDS = config("MEDIA_CACHE_SECONDS", default=86400, cast=int)
+
+# Listing creation (see market/services.py)
+LISTING_MAX_IMAGES = config("LISTING_MAX_IMAGES", default=10, cast=int)  # gallery images per listing
+LISTING_UPLOAD_WORKERS = config("LISTING_UPLOAD_WORKERS", default=4, cast=int)  # parallel storage writes
+
+# Resized upload renditions (see market/renditions.py)
+IMAGE_RENDITION_FORMAT = config("IMAGE_RENDITION_FORMAT", default="webp")  # or "jpeg"
+IMAGE_RENDITION_WORKERS = config("IMAGE_RENDITION_WORKERS", default=2, cast=int)
+# Build them inside the request instead of on the worker pool
+IMAGE_RENDITIONS_SYNC = config("IMAGE_RENDITIONS_SYNC", default=False, cast=bool)
+
 # -----------------------------------------------------------------------------
 # CORS & CSRF (CRITICAL FIXES)
 # -----------------------------------------------------------------------------
@@ -144,6 +242,34 @@ CSRF_TRUSTED_ORIGINS = [
 # -----------------------------------------------------------------------------
 # DRF
 # -----------------------------------------------------------------------------
+# JSON renderer (config/renderers.py): orjson-backed, same bytes as DRF's
+# JSONRenderer ("rest_framework.renderers.JSONRenderer" to go back to it)
+API_JSON_RENDERER = config("API_JSON_RENDERER", default="config.renderers.FastJSONRenderer")
+# List pages rendered from queryset.values() rows (config/values_serialization.py)
+VALUES_LIST_SERIALIZATION = config("VALUES_LIST_SERIALIZATION", default=True, cast=bool)
+
+# Throttling (config/throttling.py): scope=rate pairs, a scope without a rate
+# isn't throttled. user/anon: any API request per user / IP; listings,
+# wishlist, reviews, emergency-delete: those endpoints' writes; auth: tokens
+# verified per IP. `manage.py test` runs unthrottled (config.testing.TestRunner)
+# unless a test sets rates.
+THROTTLE_RATES = config(
+    "THROTTLE_RATES",
+    default=(
+        "user=600/min,anon=300/min,listings=60/hour,wishlist=120/min,"
+        "reviews=20/hour,emergency-delete=10/hour,auth=60/min"
+    ),
+    cast=Csv(cast=lambda pair: pair.split("=", 1), post_process=dict),
+)
+# Counters per process (LocalThrottleStore) or shared by all workers
+# (config.throttling.CacheThrottleStore, in THROTTLE_CACHE_ALIAS)
+THROTTLE_STORE = config("THROTTLE_STORE", default="config.throttling.LocalThrottleStore")
+THROTTLE_CACHE_ALIAS = config("THROTTLE_CACHE_ALIAS", default="default")
+# Reverse proxies in front of the app, for client IPs from X-Forwarded-For.
+# 0 uses REMOTE_ADDR and ignores the header; behind a proxy it must be set,
+# or every client shares the proxy's address in the throttles
+NUM_PROXIES = config("NUM_PROXIES", default=0, cast=int)
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         # We will create this class in the next step
@@ -152,33 +278,65 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    # Page numbers by default, keyset pages with ?pagination=cursor
+    "DEFAULT_PAGINATION_CLASS": "config.pagination.OptInCursorPagination",
     "PAGE_SIZE": 12,
+    "DEFAULT_RENDERER_CLASSES": [
+        API_JSON_RENDERER,
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    # Rates in THROTTLE_RATES; EndpointThrottle only counts views that name a scope
+    "DEFAULT_THROTTLE_CLASSES": [
+        "config.throttling.ClientThrottle",
+        "config.throttling.EndpointThrottle",
+    ],
+    "NUM_PROXIES": NUM_PROXIES,
 }
 
+# `manage.py test` (config/testing.py)
+TEST_RUNNER = "config.testing.TestRunner"
 
 # -----------------------------------------------------------------------------
 # LOGGING
 # -----------------------------------------------------------------------------
+# Per-request log lines (set WARNING to keep only slow queries) and the slow query threshold.
+# `manage.py test` runs with WARNING (config.testing.TestRunner) so test output isn't buried.
+REQUEST_LOG_LEVEL = config("REQUEST_LOG_LEVEL", default="INFO")
+SLOW_QUERY_MS = config("SLOW_QUERY_MS", default=200, cast=int)
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "formatters": {
+        "json": {
+            "()": "config.instrumentation.JsonFormatter",
+        },
+    },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
         },
+        "structured": {
+            "class": "logging.StreamHandler",
+            "formatter": "json",
+        },
     },
     "loggers": {
-        "werkzeug": {
-            "handlers": ["console"],
-            "level": "INFO",
-            "propagate": True,
-        },
         "django": {
             "handlers": ["console"],
             "level": "INFO",
         },
-       
+        # One JSON line per request (config/instrumentation.py)
+        "config.requests": {
+            "handlers": ["structured"],
+            "level": REQUEST_LOG_LEVEL,
+            "propagate": False,
+        },
+        "config.slow_queries": {
+            "handlers": ["structured"],
+            "level": "WARNING",
+            "propagate": False,
+        },
     },
 }
 
@@ -205,5 +363,39 @@ else:
 # SUPABASE SETTINGS
 SUPABASE_URL = config("SUPABASE_URL", default="")
 SUPABASE_KEY = config("SUPABASE_KEY", default="")
-# You can keep JWT_SECRET, but we won't use it for this new method
-SUPABASE_JWT_SECRET = config("SUPABASE_JWT_SECRET", default="")
\ No newline at end of file
+# Used to verify HS256 access tokens locally (Project Settings -> API -> JWT Secret)
+SUPABASE_JWT_SECRET = config("SUPABASE_JWT_SECRET", default="")
+
+# "local": check signature + claims in-process (JWT secret or cached JWKS).
+# "remote": ask Supabase (auth.get_user) on every authenticated request.
+SUPABASE_AUTH_MODE = config("SUPABASE_AUTH_MODE", default="local")
+# Opt-in: fall back to auth.get_user when a token can't be checked locally
+# (e.g. no secret configured or the JWKS endpoint is unreachable).
+SUPABASE_AUTH_REMOTE_FALLBACK = config("SUPABASE_AUTH_REMOTE_FALLBACK", default=False, cast=bool)
+SUPABASE_JWT_AUDIENCE = config("SUPABASE_JWT_AUDIENCE", default="authenticated")
+SUPABASE_JWKS_URL = config(
+    "SUPABASE_JWKS_URL",
+    default=f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else "",
+)
+SUPABASE_JWKS_CACHE_SECONDS = config("SUPABASE_JWKS_CACHE_SECONDS", default=600, cast=int)
+SUPABASE_JWKS_TIMEOUT = config("SUPABASE_JWKS_TIMEOUT", default=5, cast=int)
+
+# Token -> user cache in front of SupabaseAuthentication (see config/token_cache.py)
+SUPABASE_AUTH_CACHE_SIZE = config("SUPABASE_AUTH_CACHE_SIZE", default=10000, cast=int)  # 0 disables it
+SUPABASE_AUTH_CACHE_TTL = config("SUPABASE_AUTH_CACHE_TTL", default=60, cast=int)
+# Optional shared tier: name of a CACHES alias (e.g. "default" when REDIS_URL is set)
+SUPABASE_AUTH_SHARED_CACHE = config("SUPABASE_AUTH_SHARED_CACHE", default="")
+
+# Remote token checks: one pooled keep-alive client per process (config/supabase_client.py)
+SUPABASE_HTTP_TIMEOUT = config("SUPABASE_HTTP_TIMEOUT", default=5, cast=float)
+SUPABASE_HTTP_CONNECT_TIMEOUT = config("SUPABASE_HTTP_CONNECT_TIMEOUT", default=2, cast=float)
+SUPABASE_HTTP_MAX_CONNECTIONS = config("SUPABASE_HTTP_MAX_CONNECTIONS", default=20, cast=int)
+SUPABASE_HTTP_KEEPALIVE_SECONDS = config("SUPABASE_HTTP_KEEPALIVE_SECONDS", default=30, cast=float)
+# Fail fast (503) for SUPABASE_BREAKER_RESET_SECONDS after this many failures in a row
+SUPABASE_BREAKER_FAILURES = config("SUPABASE_BREAKER_FAILURES", default=5, cast=int)
+SUPABASE_BREAKER_RESET_SECONDS = config("SUPABASE_BREAKER_RESET_SECONDS", default=30, cast=float)
+
+# -----------------------------------------------------------------------------
+# METRICS
+# Bearer token required to scrape /metrics. When empty, /metrics is only served with DEBUG on.
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
@@ -0,0 +1,62 @@
+"""
+Media storage with content-hashed file names.
+
+Every upload is renamed to <upload_to>/<stem>-<hash>.<ext>, where hash is
+the first 12 hex digits of the file's SHA-256. A URL therefore always
+names the same bytes, which is what lets config.media serve media with
+`Cache-Control: immutable`. Re-uploading identical bytes reuses the
+stored file.
+
+A name that already looks hashed is not trusted: a client could pick one
+that doesn't match its bytes, or upload different bytes under it later.
+Only the files the app writes under GENERATED_DIRS (market.renditions
+names them by their hash itself) are stored as named.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASH_LENGTH = 12
+HASHED_NAME = re.compile(r'-[0-9a-f]{%d}(\.[A-Za-z0-9]+)?$' % HASH_LENGTH)
+GENERATED_DIRS = ('renditions/',)
+
+
+def is_hashed(name):
+    return bool(HASHED_NAME.search(name))
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+class HashedMediaStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        if not (name.startswith(GENERATED_DIRS) and is_hashed(name)):
+            name = self.hashed_name(name, content_hash(content), max_length)
+            if self.exists(name):
+                return name  # same bytes already stored under this name
+        return super().save(name, content, max_length=max_length)
+
+    def hashed_name(self, name, digest, max_length=None):
+        directory, filename = os.path.split(name)
+        stem, ext = os.path.splitext(filename)
+        suffix = f'-{digest}{ext.lower()}'
+        if max_length is not None:
+            room = max_length - len(suffix) - (len(directory) + 1 if directory else 0)
+            stem = stem[:max(room, 0)]
+        return os.path.join(directory, f'{stem}{suffix}')
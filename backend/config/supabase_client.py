@@ -0,0 +1,219 @@
+"""
+One Supabase Auth client per process, for remote token checks.
+
+verify_token_remotely() used to call create_client() per request: a new
+client, a new HTTP session and a fresh TLS handshake every time. Now each
+process keeps
+
+  * one supabase Client over a pooled keep-alive httpx.Client, and one
+    httpx.AsyncClient per event loop for the async views, both with the
+    SUPABASE_HTTP_* timeouts and pool limits;
+  * a circuit breaker: after SUPABASE_BREAKER_FAILURES consecutive failures
+    (timeouts, connection errors, 5xx) calls fail fast with a 503 for
+    SUPABASE_BREAKER_RESET_SECONDS, then one trial call decides whether to
+    close it again. A rejected token (4xx) is an answer, not a failure;
+  * latency histograms, rendered on /metrics.
+
+Clients are rebuilt when the pid changes, so a client created before
+gunicorn forks (--preload) is never shared between workers.
+"""
+import asyncio
+import os
+import threading
+import time
+import weakref
+
+import httpx
+from django.conf import settings
+from rest_framework import exceptions
+from supabase import ClientOptions, create_client
+from supabase_auth.errors import AuthApiError
+
+from .metrics import counter, histogram
+
+request_seconds = histogram(
+    'supabase_auth_request_seconds',
+    'Latency of Supabase Auth calls (outcome: ok, rejected token, error)',
+    ('operation', 'outcome'),
+)
+breaker_events = counter(
+    'supabase_auth_breaker_events_total',
+    'Circuit breaker transitions and calls refused while it was open',
+    ('event',),
+)
+
+
+class SupabaseUnavailable(exceptions.APIException):
+    status_code = 503
+    default_detail = 'Authentication service unavailable, try again shortly.'
+    default_code = 'auth_unavailable'
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one trial) -> closed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < settings.SUPABASE_BREAKER_RESET_SECONDS:
+            return 'open'
+        return 'half-open'
+
+    def before_call(self):
+        """Raises SupabaseUnavailable unless a call may go out now."""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return
+            if state == 'half-open' and not self._trial:
+                self._trial = True
+                return
+        breaker_events.inc(event='short_circuited')
+        raise SupabaseUnavailable()
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                breaker_events.inc(event='closed')
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def release_trial(self):
+        """The call ended without an outcome (cancelled): the next one may be the trial."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            reopen = self._trial
+            self._trial = False
+            if reopen or (self.opened_at is None and self.failures >= settings.SUPABASE_BREAKER_FAILURES):
+                self.opened_at = time.monotonic()
+                breaker_events.inc(event='opened')
+
+
+def http_options():
+    return {
+        'timeout': httpx.Timeout(settings.SUPABASE_HTTP_TIMEOUT, connect=settings.SUPABASE_HTTP_CONNECT_TIMEOUT),
+        'limits': httpx.Limits(
+            max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=settings.SUPABASE_HTTP_KEEPALIVE_SECONDS,
+        ),
+    }
+
+
+class SupabaseAuthClient:
+    def __init__(self):
+        self.breaker = CircuitBreaker()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._config = None
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+    def reset(self):
+        """Drops the clients (without closing them) and closes the breaker."""
+        self._pid = self._config = self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self.breaker.reset()
+
+    def _check_process(self):
+        # Forked (gunicorn --preload) or settings changed (tests): start over.
+        # The parent's sockets are left alone, not closed from the child.
+        config = (settings.SUPABASE_URL, settings.SUPABASE_KEY)
+        if self._pid != os.getpid() or self._config != config:
+            self.reset()
+            self._pid, self._config = os.getpid(), config
+
+    @property
+    def client(self):
+        with self._lock:
+            self._check_process()
+            if self._client is None:
+                options = ClientOptions(
+                    httpx_client=httpx.Client(**http_options()),
+                    auto_refresh_token=False,
+                    persist_session=False,
+                )
+                self._client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY, options=options)
+            return self._client
+
+    @property
+    def async_client(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._check_process()
+            http = self._async_clients.get(loop)
+            if http is None:
+                http = self._async_clients[loop] = httpx.AsyncClient(**http_options())
+            return http
+
+    def get_user(self, token):
+        """The Supabase user for `token` (None if there is none). Raises SupabaseUnavailable when the breaker is open."""
+        client = self.client
+        self.breaker.before_call()
+        start, outcome = time.perf_counter(), 'error'
+        try:
+            response = client.auth.get_user(token)
+            outcome = 'ok'
+        except AuthApiError as exc:
+            if exc.status >= 500:
+                self.breaker.record_failure()
+            else:
+                outcome = 'rejected'
+                self.breaker.record_success()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release_trial()
+            raise
+        finally:
+            request_seconds.observe(time.perf_counter() - start, operation='get_user', outcome=outcome)
+        self.breaker.record_success()
+        return response.user if response else None
+
+    async def aget_user(self, token):
+        """get_user() for async views: {'id', 'email', ...} or None."""
+        http = self.async_client
+        self.breaker.before_call()
+        start, outcome = time.perf_counter(), 'error'
+        try:
+            response = await http.get(
+                f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/user",
+                headers={'apikey': settings.SUPABASE_KEY, 'Authorization': f'Bearer {token}'},
+            )
+            if response.status_code >= 500:
+                response.raise_for_status()
+        except Exception:
+            self.breaker.record_failure()
+            request_seconds.observe(time.perf_counter() - start, operation='get_user', outcome=outcome)
+            raise
+        except BaseException:
+            # Cancelled (e.g. the client disconnected): says nothing about
+            # Supabase, but a half-open trial must not stay claimed for good.
+            self.breaker.release_trial()
+            raise
+        outcome = 'ok' if response.status_code == 200 else 'rejected'
+        self.breaker.record_success()
+        request_seconds.observe(time.perf_counter() - start, operation='get_user', outcome=outcome)
+        response.raise_for_status()
+        return response.json() or None
+
+
+supabase_auth_client = SupabaseAuthClient()
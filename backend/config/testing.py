@@ -0,0 +1,27 @@
+"""The test runner for `manage.py test` (TEST_RUNNER)."""
+import logging
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    DiscoverRunner that keeps per-request log lines out of the test output
+    and turns throttling off (THROTTLE_RATES={}); throttle tests set their
+    own rates with override_settings.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._unthrottled = override_settings(THROTTLE_RATES={})
+        self._unthrottled.enable()
+        requests = logging.getLogger('config.requests')
+        self._request_log_level = requests.level
+        requests.setLevel(logging.WARNING)
+
+    def teardown_test_environment(self, **kwargs):
+        logging.getLogger('config.requests').setLevel(self._request_log_level)
+        self._unthrottled.disable()
+        super().teardown_test_environment(**kwargs)
+
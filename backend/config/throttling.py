@@ -0,0 +1,219 @@
+"""
+Request throttling: DRF throttle classes over a sliding-window counter in a
+pluggable store.
+
+THROTTLE_RATES maps scopes to DRF-style rates ('30/min'); a scope without a
+rate is not throttled, and nothing is throttled while it is empty (as under
+`manage.py test`, see config.testing.TestRunner):
+
+    user / anon       ClientThrottle, every API request: per signed-in user,
+                      else per client IP (REST_FRAMEWORK's NUM_PROXIES)
+    <view scope>      EndpointThrottle, per user or IP for the views and
+                      actions that name a scope (`throttle_scopes` on
+                      viewsets, e.g. 'listings', 'wishlist', 'reviews')
+    auth              VerificationThrottle, tokens SupabaseAuthentication
+                      has to verify (token-cache misses) per IP
+
+The window is approximated from two fixed windows, the current one weighted
+fully and the previous one by how much of it still overlaps:
+
+    estimate = previous * (1 - elapsed fraction of this window) + current
+
+so a check is one atomic incr of the current window's counter. The previous
+window's count no longer changes once the window is over, so a process reads
+it once per client and window. A refused request is taken back out (decr),
+and the 429 carries Retry-After: the seconds until the estimate leaves room
+for one more request.
+
+Stores are pluggable through THROTTLE_STORE (a dotted path):
+    config.throttling.LocalThrottleStore   per-process memory (default, tests)
+    config.throttling.CacheThrottleStore   shared Django cache (e.g. Redis)
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework import throttling
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class LocalThrottleStore:
+    """Counters in this process's memory: limits are per worker. The stand-in for tests."""
+
+    def __init__(self):
+        self._counts = {}  # key -> [count, expires at]
+        self._lock = threading.Lock()
+        self._sweep_at = 1024
+
+    def incr(self, key, timeout):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry is None or entry[1] <= now:
+                entry = self._counts[key] = [0, now + timeout]
+                if len(self._counts) >= self._sweep_at:
+                    self._sweep(now)
+            entry[0] += 1
+            return entry[0]
+
+    def decr(self, key):
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry is not None:
+                entry[0] -= 1
+
+    def closed(self, key):
+        """The count of a window that has ended."""
+        entry = self._counts.get(key)
+        return entry[0] if entry is not None and entry[1] > time.monotonic() else 0
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+    def _sweep(self, now):
+        self._counts = {key: entry for key, entry in self._counts.items() if entry[1] > now}
+        self._sweep_at = max(1024, 2 * len(self._counts))
+
+
+class CacheThrottleStore:
+    """
+    Counters in a shared Django cache, so limits hold across workers. Needs
+    a backend with atomic incr/decr (Redis, Memcached, LocMem).
+    """
+    prefix = 'throttle'
+    max_closed = 10000
+
+    def __init__(self):
+        self._closed = {}
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def incr(self, key, timeout):
+        key = f'{self.prefix}:{key}'
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            if self.cache.add(key, 1, timeout=timeout):
+                return 1
+            return self.cache.incr(key)
+
+    def decr(self, key):
+        try:
+            self.cache.decr(f'{self.prefix}:{key}')
+        except ValueError:
+            pass  # expired in between
+
+    def closed(self, key):
+        count = self._closed.get(key)
+        if count is None:
+            if len(self._closed) >= self.max_closed:
+                self._closed = {}  # keys of past windows: nothing worth keeping
+            count = self._closed[key] = self.cache.get(f'{self.prefix}:{key}', 0)
+        return count
+
+    def clear(self):
+        self._closed = {}
+
+
+_stores = {}
+
+
+def throttle_store():
+    path = settings.THROTTLE_STORE
+    store = _stores.get(path)
+    if store is None:
+        store = _stores.setdefault(path, import_string(path)())
+    return store
+
+
+def parse_rate(rate):
+    """'30/min' -> (30, 60): requests per period, period in seconds ('s', 'm', 'h', 'd' prefixes)."""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period.strip()[0]]
+
+
+def sliding_window_hit(key, limit, duration, now):
+    """
+    Counts a request against `limit` per `duration` seconds under `key`.
+    Returns None if it is allowed, else the seconds until one would be.
+    """
+    store = throttle_store()
+    window = int(now // duration)
+    current = store.incr(f'{key}:{window}', timeout=2 * duration)
+    previous = store.closed(f'{key}:{window - 1}')
+    overlap = 1 - (now / duration - window)  # of the previous window with the last `duration` seconds
+    if previous * overlap + current <= limit:
+        return None
+
+    store.decr(f'{key}:{window}')  # refused requests don't count
+    current -= 1
+    if current < limit and previous:
+        # Room once the previous window's share has shrunk enough
+        return (overlap - (limit - current - 1) / previous) * duration
+    # Not before the next window, where this one's requests weigh in
+    share = 1 - (limit - 1) / current if current else 0
+    return (overlap + max(0, share)) * duration
+
+
+class SlidingWindowThrottle(throttling.BaseThrottle):
+    """Base class: a `scope` and an identity per request, limited to THROTTLE_RATES[scope]."""
+    scope = None
+    timer = time.time
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_client(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'u{user.pk}'
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        scope = self.get_scope(request, view)
+        rate = settings.THROTTLE_RATES.get(scope) if scope else None
+        if not rate:
+            return True
+        limit, duration = parse_rate(rate)
+        self.retry_after = sliding_window_hit(f'{scope}:{self.get_client(request)}', limit, duration, self.timer())
+        return self.retry_after is None
+
+    def wait(self):
+        # Whole seconds, as Retry-After is sent (rounded first: 80.00000000000001 is 80)
+        return None if self.retry_after is None else max(1, math.ceil(round(self.retry_after, 6)))
+
+
+class ClientThrottle(SlidingWindowThrottle):
+    """Every API request: 'user' per signed-in user, 'anon' per client IP."""
+
+    def get_scope(self, request, view):
+        return 'user' if request.user.is_authenticated else 'anon'
+
+
+class EndpointThrottle(SlidingWindowThrottle):
+    """
+    Per user (or IP) and endpoint: the scope is the view's
+    `throttle_scopes[action]`, or its `throttle_scope`.
+    """
+
+    def get_scope(self, request, view):
+        scopes = getattr(view, 'throttle_scopes', None)
+        if scopes is not None:
+            return scopes.get(getattr(view, 'action', None))
+        return getattr(view, 'throttle_scope', None) or self.scope
+
+
+class VerificationThrottle(SlidingWindowThrottle):
+    """'auth': tokens SupabaseAuthentication has to verify, per client IP."""
+    scope = 'auth'
+
+    def get_client(self, request):
+        return self.get_ident(request)
@@ -0,0 +1,179 @@
+"""
+Token -> Django user cache for SupabaseAuthentication.
+
+Tier 1 is a bounded, per-process LRU with a TTL. Tier 2 (optional) is a
+Django cache alias shared by all workers (SUPABASE_AUTH_SHARED_CACHE).
+An entry never outlives the token's own 'exp' claim.
+
+Entries are dropped through invalidate_user(), which users.signals calls
+whenever a User is saved or deleted (e.g. emergency_delete_view or an email
+change). Other processes' local tiers catch up within SUPABASE_AUTH_CACHE_TTL;
+their shared-tier reads are fenced by a per-user generation number.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics
+
+cache_requests = metrics.counter(
+    'supabase_auth_cache_requests_total',
+    'Token-to-user cache lookups by tier and result.',
+    labelnames=('tier', 'result'),
+)
+cache_evictions = metrics.counter(
+    'supabase_auth_cache_evictions_total',
+    'Local token-to-user cache entries evicted (LRU size limit).',
+)
+cache_invalidations = metrics.counter(
+    'supabase_auth_cache_invalidations_total',
+    'Users whose cached tokens were dropped (user saved or deleted).',
+)
+
+SHARED_PREFIX = 'supabase-auth'
+
+
+def _token_key(token):
+    return 'token:' + hashlib.sha256(token.encode()).hexdigest()
+
+
+def _email_key(email):
+    return 'email:' + email.lower()
+
+
+class TokenUserCache:
+    def __init__(self, maxsize=None, ttl=None, shared_alias=None):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._shared_alias = shared_alias
+        self._entries = OrderedDict()   # key -> (expires_at, user)
+        self._keys_by_user = {}         # user pk -> set of keys
+        self._lock = threading.Lock()
+
+    # --- Settings (read lazily so override_settings works in tests) ---
+    @property
+    def maxsize(self):
+        return self._maxsize if self._maxsize is not None else settings.SUPABASE_AUTH_CACHE_SIZE
+
+    @property
+    def ttl(self):
+        return self._ttl if self._ttl is not None else settings.SUPABASE_AUTH_CACHE_TTL
+
+    @property
+    def shared(self):
+        alias = self._shared_alias if self._shared_alias is not None else settings.SUPABASE_AUTH_SHARED_CACHE
+        return caches[alias] if alias else None
+
+    # --- Public API ---
+    def get_by_token(self, token):
+        return self._get(_token_key(token))
+
+    def get_by_email(self, email):
+        return self._get(_email_key(email))
+
+    def set(self, token, user, token_expires_at=None):
+        """Remembers the user for this token (until the token expires) and for its email."""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        token_expires_at = min(expires_at, token_expires_at) if token_expires_at else expires_at
+        self._store(_token_key(token), user, token_expires_at)
+        if user.email:
+            self._store(_email_key(user.email), user, expires_at)
+
+    def invalidate_user(self, user_pk):
+        with self._lock:
+            for key in self._keys_by_user.pop(user_pk, ()):
+                self._entries.pop(key, None)
+        shared = self.shared
+        if shared is not None:
+            # Bump the generation so other workers ignore shared entries for this user.
+            generation_key = f'{SHARED_PREFIX}:generation:{user_pk}'
+            if not shared.add(generation_key, 1, timeout=None):
+                try:
+                    shared.incr(generation_key)
+                except ValueError:
+                    shared.set(generation_key, 1, timeout=None)
+        cache_invalidations.inc()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'local_hits': cache_requests.value(tier='local', result='hit'),
+            'local_misses': cache_requests.value(tier='local', result='miss'),
+            'shared_hits': cache_requests.value(tier='shared', result='hit'),
+            'shared_misses': cache_requests.value(tier='shared', result='miss'),
+            'evictions': cache_evictions.value(),
+            'invalidations': cache_invalidations.value(),
+        }
+
+    # --- Internals ---
+    def _get(self, key):
+        if self.maxsize <= 0:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    cache_requests.inc(tier='local', result='hit')
+                    # Each request gets its own instance; the cached one is never handed out.
+                    return copy.copy(entry[1])
+                self._discard(key)
+        cache_requests.inc(tier='local', result='miss')
+
+        shared = self.shared
+        if shared is None:
+            return None
+        found = shared.get(f'{SHARED_PREFIX}:{key}')
+        if found is not None:
+            expires_at, generation, user = found
+            current = shared.get(f'{SHARED_PREFIX}:generation:{user.pk}', 0)
+            if expires_at > now and generation == current:
+                cache_requests.inc(tier='shared', result='hit')
+                self._store(key, user, expires_at, write_through=False)
+                return copy.copy(user)
+        cache_requests.inc(tier='shared', result='miss')
+        return None
+
+    def _store(self, key, user, expires_at, write_through=True):
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (expires_at, copy.copy(user))
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                cache_evictions.inc()
+
+        shared = self.shared
+        if write_through and shared is not None:
+            generation = shared.get(f'{SHARED_PREFIX}:generation:{user.pk}', 0)
+            timeout = max(1, int(expires_at - time.time()))
+            shared.set(f'{SHARED_PREFIX}:{key}', (expires_at, generation, user), timeout=timeout)
+
+    def _discard(self, key):
+        # Caller holds the lock.
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[1].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry[1].pk]
+
+
+token_cache = TokenUserCache()
@@ -3,8 +3,9 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.conf import settings
-from django.views.static import serve
 from django.urls import re_path
+from .media import serve_media
+from .views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -12,14 +13,16 @@ urlpatterns = [
     path('api-auth/', include('rest_framework.urls')),  # DRF login/logout
     path('api/', include('reviews.urls')),  # Include reviews app URLs
     path('api/', include('users.urls')),  # Include users app URLs
+    path('metrics', metrics_view, name='metrics'),  # Prometheus scrape endpoint
 
 ]
 
-urlpatterns += [
-    re_path(r'^media/(?P<path>.*)$', serve, {
-        'document_root': settings.MEDIA_ROOT,
-    }),
-]
+# Uploads: served, offloaded (X-Accel-Redirect / X-Sendfile) or left to the
+# web server / CDN depending on MEDIA_SERVE_MODE (see config/media.py)
+if settings.MEDIA_SERVE_MODE != 'off':
+    urlpatterns += [
+        re_path(r'^media/(?P<path>.*)$', serve_media, name='media'),
+    ]
 
 
 # This allows us to see images during development
@@ -0,0 +1,154 @@
+"""
+Read-only fast path for list pages: queryset.values() rows instead of model
+instances.
+
+ModelSerializer builds a model instance per row and then walks every field
+through get_attribute(); on a page of cards that is most of the
+serialization time. ValuesSerializerMixin.row_plan() works out once per
+request what each rendered field reads, and rows_data() renders plain
+values() dicts with the same field objects' to_representation(), so the
+data (and the JSON) is the same as serializer.data:
+
+    column or forward relation     field.to_representation(row['seller__username'])
+    ('price', 'seller.username')
+    primary key related field      the foreign key column ('seller' -> seller_id)
+    file / image field             a FieldFile on the stored name (same .url)
+    method field                   serializer.values_<name>(row), reading the
+                                   paths in Meta.field_sources and an
+                                   annotation of the same name, if any
+
+Anything else (nested serializers, to-many relations, nullable foreign keys
+on the way, method fields without a values_<name>) makes row_plan() return
+None and the view serializes instances as before, e.g. shoe lists that
+render images (everything but ?view=compact). ValuesListMixin (views) uses it for `values_actions`;
+VALUES_LIST_SERIALIZATION turns it off.
+"""
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+from .instrumentation import timed
+
+
+def _model_field(opts, path):
+    """The model field `path` ends on, or None if values() can't stand in for the instance."""
+    parts = path.split('__')
+    field = None
+    for depth, part in enumerate(parts):
+        try:
+            field = opts.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if field.many_to_many or field.one_to_many:
+            return None
+        if depth < len(parts) - 1:
+            if not field.is_relation or (field.concrete and field.null):
+                return None  # an instance would stop at None (and DRF skip the field)
+            opts = field.related_model._meta
+    return field
+
+
+def _present(field, value):
+    # As Serializer.to_representation: None stays None
+    return None if value is None else field.to_representation(value)
+
+
+def _column_reader(field, path, model_field):
+    if model_field.is_relation and path != model_field.attname:
+        if not (isinstance(field, PrimaryKeyRelatedField) and field.pk_field is None
+                and field.use_pk_only_optimization()):
+            return None
+        return lambda row: row[path]  # the related pk, as PKOnlyObject gives it
+    if isinstance(model_field, models.FileField):
+        attr_class = model_field.attr_class
+        return lambda row: field.to_representation(attr_class(None, model_field, row[path]))
+    return lambda row: _present(field, row[path])
+
+
+class ValuesSerializerMixin:
+    """ModelSerializer mixin: renders values() rows for the read-only list fast path."""
+
+    def row_plan(self, queryset):
+        """(values() paths, [(field name, row -> data)]) for the rendered fields, or None."""
+        opts = queryset.model._meta
+        annotations = queryset.query.annotations
+        sources = getattr(self.Meta, 'field_sources', {})
+        paths, readers = {opts.pk.name}, []
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                read = getattr(self, f'values_{name}', None)
+                if read is None:
+                    return None
+                paths.update(sources.get(name, ()))
+                if name in annotations:
+                    paths.add(name)
+            elif isinstance(field, serializers.BaseSerializer) or field.source == '*':
+                return None
+            else:
+                path = field.source.replace('.', '__')
+                if path in annotations:
+                    read = lambda row, field=field, path=path: _present(field, row[path])
+                else:
+                    model_field = _model_field(opts, path)
+                    read = _column_reader(field, path, model_field) if model_field else None
+                    if read is None:
+                        return None
+                paths.add(path)
+            readers.append((name, read))
+        return sorted(paths), readers
+
+    def rows_data(self, rows, readers):
+        with timed('serialization'):
+            return [{name: read(row) for name, read in readers} for row in rows]
+
+    def values_data(self, queryset):
+        """The serialized list for `queryset` from values() rows, or None (use instances)."""
+        plan = self.row_plan(queryset)
+        if plan is None:
+            return None
+        paths, readers = plan
+        return self.rows_data(queryset.values(*paths), readers)
+
+
+class ValuesListMixin:
+    """
+    ViewSet mixin: list pages of `values_actions` come from values() rows
+    when the serializer can render them (ValuesSerializerMixin.row_plan).
+    Goes right before the generic viewset; other actions can call
+    list_response(queryset).
+    """
+    values_actions = ('list',)
+
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    def list_response(self, queryset):
+        plan = None
+        if settings.VALUES_LIST_SERIALIZATION and self.action in self.values_actions:
+            serializer = self.get_serializer()
+            plan = serializer.row_plan(queryset)
+
+        if plan is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        paths, readers = plan
+        rows = queryset.values(*paths, *self.ordering_paths(queryset, paths))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.rows_data(page, readers))
+        return Response(serializer.rows_data(rows, readers))
+
+    @staticmethod
+    def ordering_paths(queryset, paths):
+        # Keyset pages read their cursor from the last row (config/pagination.py)
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        names = {item.lstrip('-') for item in ordering if isinstance(item, str)}
+        return sorted(name for name in names - set(paths) if name not in ('pk', '?') and '__' not in name)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Shoe, ShoeImage
+from .models import ArchivedShoe, Shoe, ShoeImage
 
 # This allows you to add images directly inside the Shoe page
 
@@ -13,5 +13,11 @@ class ShoeAdmin(admin.ModelAdmin):
     list_display = ('title', 'brand', 'price', 'seller', 'created_at')
 
 
+class ArchivedShoeAdmin(admin.ModelAdmin):
+    list_display = ('title', 'brand', 'price', 'seller', 'is_sold', 'archived_at')
+    readonly_fields = [field.name for field in ArchivedShoe._meta.fields]
+
+
 admin.site.register(Shoe, ShoeAdmin)
 admin.site.register(ShoeImage)
+admin.site.register(ArchivedShoe, ArchivedShoeAdmin)
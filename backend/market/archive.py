@@ -0,0 +1,141 @@
+"""
+Hot/cold split of the listings: sold and stale shoes move to ArchivedShoe.
+
+Every list, filter, search and sitemap query reads the Shoe table, and sold
+listings used to stay there for good. archive_shoes() (run by
+`manage.py archive_shoes`, e.g. nightly) moves out
+
+  * sold listings not updated for ARCHIVE_SOLD_AFTER_DAYS, and
+  * with ARCHIVE_STALE_AFTER_DAYS set, any listing not updated for that long,
+
+in batches: pending view counts are flushed, the shoe, its gallery and
+the ids of the users who wishlisted it are copied into one ArchivedShoe row
+(same id) and the live rows are deleted, all in one transaction per batch.
+
+The rows are deleted with plain DELETEs, without the per-row post_delete
+signals (market/signals.py): the search index, the cached shoe responses
+and the likers' cached wishlists are updated once per batch instead.
+
+Archived listings are still served by /api/shoes/<id>/ (read-only, with
+'archived_at') and listed on /api/profiles/<username>/archived_shoes/.
+Their seller can restore_shoe() them (POST /api/shoes/<id>/restore/, the
+gallery and wishlist entries come back) or delete them (DELETE
+/api/shoes/<id>/). Image files are left where they are.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from config.response_cache import response_cache
+from .models import ArchivedShoe, Shoe, ShoeImage, Wishlist
+from .search import unindex_shoes
+from .view_counter import view_counter
+from .wishlist import liked_shoes
+
+# Columns copied as they are from Shoe to ArchivedShoe (plus the image path)
+COPIED_FIELDS = (
+    'id', 'seller_id', 'title', 'brand', 'size', 'price', 'currency', 'condition',
+    'description', 'renditions', 'contact_info', 'is_sold', 'views',
+    'created_at', 'updated_at',
+)
+
+
+def archivable_shoes(now=None):
+    """Shoes due for the archive under the ARCHIVE_* settings."""
+    now = now or timezone.now()
+    due = Q(is_sold=True, updated_at__lt=now - timedelta(days=settings.ARCHIVE_SOLD_AFTER_DAYS))
+    if settings.ARCHIVE_STALE_AFTER_DAYS:
+        due |= Q(updated_at__lt=now - timedelta(days=settings.ARCHIVE_STALE_AFTER_DAYS))
+    return Shoe.objects.filter(due)
+
+
+def archive_batch(shoe_ids):
+    """Moves these shoes to the archive in one transaction. Returns how many moved."""
+    view_counter.flush(shoe_ids)  # the archived copy carries the final count
+    with transaction.atomic():
+        shoes = list(
+            Shoe.objects.filter(pk__in=shoe_ids).select_for_update()
+            .prefetch_related('gallery', 'wishlisted_by'))
+        if not shoes:
+            return 0
+        ArchivedShoe.objects.bulk_create([
+            ArchivedShoe(
+                **{field: getattr(shoe, field) for field in COPIED_FIELDS},
+                image=shoe.image.name,
+                gallery=[
+                    {'id': image.pk, 'image': image.image.name, 'renditions': image.renditions}
+                    for image in shoe.gallery.all()
+                ],
+                wishlisted_by=[like.user_id for like in shoe.wishlisted_by.all()],
+            )
+            for shoe in shoes
+        ])
+        ids = [shoe.pk for shoe in shoes]
+        # No Collector: it would send post_delete per row, and each gallery
+        # image's touch_shoe would UPDATE a shoe that is going anyway.
+        delete_rows(Wishlist, 'shoe_id', ids)
+        delete_rows(ShoeImage, 'shoe_id', ids)
+        delete_rows(Shoe, 'id', ids)
+        unindex_shoes(ids)
+        for user_id in {like.user_id for shoe in shoes for like in shoe.wishlisted_by.all()}:
+            liked_shoes.invalidate(user_id)
+    response_cache.bump('shoes')
+    return len(shoes)
+
+
+def delete_rows(model, column, ids):
+    """DELETE ... WHERE column IN ids, sending no signals."""
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(column)} IN ({", ".join(["%s"] * len(ids))})',
+            ids,
+        )
+
+
+def restore_shoe(archived):
+    """Moves an archived listing back to Shoe (same id), with its gallery and wishlist entries."""
+    with transaction.atomic():
+        shoe = Shoe(**{field: getattr(archived, field) for field in COPIED_FIELDS}, image=archived.image.name)
+        shoe.save(force_insert=True)
+        Shoe.objects.filter(pk=shoe.pk).update(created_at=archived.created_at)  # not auto_now_add's now
+        shoe.created_at = archived.created_at
+        ShoeImage.objects.bulk_create([
+            ShoeImage(id=image['id'], shoe=shoe, image=image['image'], renditions=image['renditions'])
+            for image in archived.gallery
+        ])
+        likers = list(User.objects.filter(pk__in=archived.wishlisted_by).values_list('pk', flat=True))
+        Wishlist.objects.bulk_create([Wishlist(user_id=user_id, shoe=shoe) for user_id in likers])
+        for user_id in likers:
+            liked_shoes.invalidate(user_id)  # bulk_create sends no post_save
+        archived.delete()
+    response_cache.bump('shoes')  # again, now that the gallery is back
+    return shoe
+
+
+def delete_archived(archived):
+    archived.delete()
+    response_cache.bump('shoes')  # the cached /api/shoes/<id>/ answer
+
+
+def archive_shoes(queryset=None, batch_size=500, limit=None):
+    """
+    Archives `queryset` (default: archivable_shoes()) batch by batch, in
+    primary-key order. Yields the number moved per batch.
+    """
+    queryset = (archivable_shoes() if queryset is None else queryset).order_by('pk')
+    last_pk, remaining = 0, limit
+    while remaining is None or remaining > 0:
+        size = batch_size if remaining is None else min(batch_size, remaining)
+        ids = list(queryset.filter(pk__gt=last_pk).values_list('pk', flat=True)[:size])
+        if not ids:
+            return
+        last_pk = ids[-1]
+        moved = archive_batch(ids)
+        if remaining is not None:
+            remaining -= len(ids)
+        yield moved
@@ -0,0 +1,59 @@
+"""
+Facet counts for the listing filters (GET /api/shoes/facets/).
+
+For the shoes matching the request's filters and search, how many fall on
+each brand, size, condition and price bucket (FACET_PRICE_BUCKETS edges):
+
+    {"count": 42,
+     "brand": [{"value": "Nike", "count": 20}, ...],       most listings first
+     "size": [{"value": "42.0", "count": 7}, ...],         ascending
+     "condition": [{"value": "New", "count": 30}, ...],
+     "price": [{"min": 0, "max": 50, "count": 3}, ..., {"min": 500, "max": null, "count": 1}]}
+
+All four come from one GROUP BY (brand, size, condition, price bucket) that
+is folded in Python, and the result is cached per filter set in the
+response cache ('shoes-facets'), invalidated with the 'shoes' namespace.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, Value, When
+
+
+def price_buckets():
+    """[(min, max), ...] from FACET_PRICE_BUCKETS; the last bucket has no max."""
+    edges = sorted(settings.FACET_PRICE_BUCKETS)
+    return list(zip([0, *edges], [*edges, None]))
+
+
+def facet_counts(queryset):
+    buckets = price_buckets()
+    bucket = Case(
+        *[When(price__lt=upper, then=Value(i)) for i, (_, upper) in enumerate(buckets[:-1])],
+        default=Value(len(buckets) - 1),
+        output_field=IntegerField(),
+    )
+    rows = (
+        queryset.order_by()
+        .annotate(price_bucket=bucket)
+        .values('brand', 'size', 'condition', 'price_bucket')
+        .annotate(listings=Count('pk'))
+    )
+
+    brands, sizes, conditions, prices = Counter(), Counter(), Counter(), Counter()
+    for row in rows:
+        count = row['listings']
+        brands[row['brand']] += count
+        sizes[row['size']] += count
+        conditions[row['condition']] += count
+        prices[row['price_bucket']] += count
+
+    return {
+        'count': sum(prices.values()),
+        'brand': [{'value': brand, 'count': count}
+                  for brand, count in sorted(brands.items(), key=lambda item: (-item[1], item[0]))],
+        'size': [{'value': f'{size:.1f}', 'count': count} for size, count in sorted(sizes.items())],
+        'condition': [{'value': condition, 'count': count}
+                      for condition, count in sorted(conditions.items(), key=lambda item: (-item[1], item[0]))],
+        'price': [{'min': low, 'max': high, 'count': prices[i]} for i, (low, high) in enumerate(buckets)],
+    }
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from market.archive import archivable_shoes, archive_shoes
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves sold listings older than ARCHIVE_SOLD_AFTER_DAYS (and, if set, listings "
+        "untouched for ARCHIVE_STALE_AFTER_DAYS) from the Shoe table to ArchivedShoe, "
+        "one transaction per batch. Run it once to backfill, then from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--limit', type=int, default=None, help='Archive at most this many shoes.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the archivable shoes.')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f'{archivable_shoes().count()} shoes would be archived.')
+            return
+
+        archived = 0
+        for moved in archive_shoes(batch_size=options['batch_size'], limit=options['limit']):
+            archived += moved
+            self.stdout.write(f'  {archived} archived...')
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} shoes.'))
@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from market.models import Shoe, ShoeImage
+from market.renditions import build_renditions, needs_renditions
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the resized, EXIF-free renditions for shoe photos that don't have "
+        "them yet (uploads from before the pipeline, or jobs lost on a restart)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild every rendition.')
+        parser.add_argument('--workers', type=int, default=4)
+
+    def build(self, instance):
+        try:
+            return bool(build_renditions(instance).keys() - {'source'})
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        for model in (Shoe, ShoeImage):
+            pending = [
+                instance for instance in model.objects.exclude(image='').iterator()
+                if options['force'] or needs_renditions(instance)
+            ]
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                built = sum(pool.map(self.build, pending))
+            self.stdout.write(
+                f'{model.__name__}: {built} built, {len(pending) - built} unreadable')
+        self.stdout.write(self.style.SUCCESS('Renditions up to date.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from market.models import Shoe
+from market.view_counter import view_counter
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes buffered shoe view counts to the database. With the shared "
+        "cache store, sweeps every shoe id so counts left by stopped workers "
+        "are not stranded. Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        updated = view_counter.flush()
+
+        ids = Shoe.objects.order_by('pk').values_list('pk', flat=True)
+        batch = []
+        for shoe_id in ids.iterator(chunk_size=batch_size):
+            batch.append(shoe_id)
+            if len(batch) == batch_size:
+                updated += view_counter.flush(batch)
+                batch = []
+        if batch:
+            updated += view_counter.flush(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Flushed view counts for {updated} shoes.'))
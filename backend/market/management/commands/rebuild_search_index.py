@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from market.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the SQLite full-text search table from market_shoe, e.g. after "
+        "bulk inserts or queryset updates that bypass signals. Postgres keeps its "
+        "search_vector column up to date by itself."
+    )
+
+    def handle(self, *args, **options):
+        if rebuild_search_index():
+            self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
+        else:
+            self.stdout.write('Nothing to rebuild on this database.')
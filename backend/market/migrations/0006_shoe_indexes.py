@@ -0,0 +1,60 @@
+# Generated by Django 6.0 on 2026-10-18 11:56
+
+import logging
+
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+# ShoeFilter's brand__icontains compiles to UPPER("brand"::text) LIKE UPPER('%term%')
+# on Postgres; a trigram GIN index on the same expression serves it.
+BRAND_TRGM_INDEX = 'shoe_brand_upper_trgm_idx'
+
+logger = logging.getLogger(__name__)
+
+
+def create_brand_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return  # SQLite: no trigram support, LIKE '%term%' stays a scan
+    try:
+        with transaction.atomic():
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {BRAND_TRGM_INDEX} '
+                f'ON market_shoe USING gin (UPPER(brand) gin_trgm_ops)'
+            )
+    except Exception as e:
+        # e.g. the database role may not create extensions; the index is an optimisation only
+        logger.warning('Skipping %s: %s', BRAND_TRGM_INDEX, e)
+
+
+def drop_brand_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {BRAND_TRGM_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0005_shoe_views_wishlist'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shoe',
+            index=models.Index(fields=['-created_at'], name='shoe_created_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shoe',
+            index=models.Index(fields=['is_sold', 'created_at'], name='shoe_sold_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shoe',
+            index=models.Index(fields=['brand', 'size'], name='shoe_brand_size_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shoe',
+            index=models.Index(fields=['price'], name='shoe_price_idx'),
+        ),
+        migrations.RunPython(create_brand_trigram_index, drop_brand_trigram_index),
+    ]
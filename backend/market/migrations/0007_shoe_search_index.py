@@ -0,0 +1,67 @@
+import logging
+
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+# Postgres: a generated tsvector column (title/brand weighted above description)
+# with a GIN index. The 'simple' config avoids English stemming, since
+# listings are written in several languages.
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE market_shoe ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(brand, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX IF NOT EXISTS shoe_search_vector_idx ON market_shoe USING gin (search_vector)',
+]
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS shoe_search_vector_idx',
+    'ALTER TABLE market_shoe DROP COLUMN IF EXISTS search_vector',
+]
+
+# SQLite: an FTS5 table keyed by shoe id, kept in sync by market.signals
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS market_shoe_fts USING fts5(
+        title, brand, description, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO market_shoe_fts (rowid, title, brand, description)
+    SELECT id, title, brand, description FROM market_shoe
+    """,
+]
+SQLITE_BACKWARD = ['DROP TABLE IF EXISTS market_shoe_fts']
+
+
+def run(statements_by_vendor):
+    def apply(apps, schema_editor):
+        statements = statements_by_vendor.get(schema_editor.connection.vendor, [])
+        for sql in statements:
+            try:
+                schema_editor.execute(sql)
+            except Exception as e:
+                if schema_editor.connection.vendor == 'sqlite':
+                    # SQLite built without FTS5: search falls back to LIKE matching
+                    logger.warning('Skipping full-text index: %s', e)
+                    return
+                raise
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0006_shoe_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-18 12:06
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing listings were last changed (as far as we know) when created
+    Shoe = apps.get_model('market', 'Shoe')
+    Shoe.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0007_shoe_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
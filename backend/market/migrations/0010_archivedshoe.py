@@ -0,0 +1,42 @@
+# Generated by Django 6.0 on 2026-10-18 12:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0009_renditions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedShoe',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100)),
+                ('brand', models.CharField(max_length=50)),
+                ('size', models.DecimalField(decimal_places=1, max_digits=4)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('currency', models.CharField(choices=[('EUR', '€'), ('USD', '$'), ('GBP', '£')], default='EUR', max_length=3)),
+                ('condition', models.CharField(choices=[('New', 'New'), ('Used', 'Used')], default='New', max_length=10)),
+                ('description', models.TextField(blank=True)),
+                ('image', models.ImageField(upload_to='shoe_images/')),
+                ('renditions', models.JSONField(blank=True, default=dict)),
+                ('contact_info', models.CharField(blank=True, max_length=100)),
+                ('is_sold', models.BooleanField(default=False)),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('gallery', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_shoes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['seller', '-archived_at'], name='archived_seller_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0010_archivedshoe'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedshoe',
+            name='wishlisted_by',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
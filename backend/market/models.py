@@ -27,6 +27,8 @@ class Shoe(models.Model):
         max_length=10, choices=CONDITION_CHOICES, default='New')
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='shoe_images/')
+    # Resized, EXIF-free copies of `image` (market/renditions.py)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     # --- THIS WAS LIKELY MISSING ---
     contact_info = models.CharField(max_length=100, blank=True)
@@ -34,6 +36,20 @@ class Shoe(models.Model):
 
     is_sold = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Drives ETag / Last-Modified (config/conditional.py). Also bumped by gallery
+    # changes (market.signals); buffered view counts don't touch it.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Matched to ShoeViewSet's access paths (default ordering, ShoeFilter,
+        # ordering_fields). The case-insensitive brand search index is a
+        # Postgres-only trigram index, see migration 0006.
+        indexes = [
+            models.Index(fields=['-created_at'], name='shoe_created_desc_idx'),
+            models.Index(fields=['is_sold', 'created_at'], name='shoe_sold_created_idx'),
+            models.Index(fields=['brand', 'size'], name='shoe_brand_size_idx'),
+            models.Index(fields=['price'], name='shoe_price_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.brand})"
@@ -43,6 +59,7 @@ class ShoeImage(models.Model):
     shoe = models.ForeignKey(
         Shoe, on_delete=models.CASCADE, related_name='gallery')
     image = models.ImageField(upload_to='shoe_gallery/')
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"Image for {self.shoe.title}"
@@ -53,4 +70,43 @@ class Wishlist(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ('user', 'shoe') # User can't like the same shoe twice
\ No newline at end of file
+        unique_together = ('user', 'shoe') # User can't like the same shoe twice
+
+class ArchivedShoe(models.Model):
+    """
+    Cold storage for sold and stale listings (market/archive.py). Rows keep
+    the Shoe's id, so /api/shoes/<id>/ still answers, and carry the gallery
+    inline; the Shoe table, which every list, search and sitemap query
+    scans, only holds live inventory.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    seller = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='archived_shoes')
+    title = models.CharField(max_length=100)
+    brand = models.CharField(max_length=50)
+    size = models.DecimalField(max_digits=4, decimal_places=1)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, choices=Shoe.CURRENCY_CHOICES, default='EUR')
+    condition = models.CharField(max_length=10, choices=Shoe.CONDITION_CHOICES, default='New')
+    description = models.TextField(blank=True)
+    image = models.ImageField(upload_to='shoe_images/')
+    renditions = models.JSONField(default=dict, blank=True)
+    contact_info = models.CharField(max_length=100, blank=True)
+    is_sold = models.BooleanField(default=False)
+    views = models.PositiveIntegerField(default=0)
+    # [{'id', 'image', 'renditions'}, ...] from the ShoeImage rows
+    gallery = models.JSONField(default=list, blank=True)
+    # Ids of the users whose Wishlist had the shoe (restored with it)
+    wishlisted_by = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Seller profile pages: a seller's archive, newest first
+            models.Index(fields=['seller', '-archived_at'], name='archived_seller_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.brand}, archived)"
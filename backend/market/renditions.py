@@ -0,0 +1,158 @@
+"""
+Resized, EXIF-free renditions of shoe photos.
+
+Uploads are stored as-is (Shoe.image, ShoeImage.image); once the row is
+committed, market.signals schedules build_renditions() on a local thread
+pool. It writes one file per size next to the media root
+
+    renditions/<shoe|gallery>/<pk>/<name>-<hash>.webp
+
+and records them in the row's `renditions` JSON ({'source': <original>,
+'thumb': <path>, ...}). Serializers turn those into URLs and fall back to
+the original image until the renditions exist.
+
+Orientation from EXIF is applied to the pixels, then all metadata (EXIF
+incl. GPS, ICC, comments) is dropped. WebP is used unless the Pillow build
+lacks it or IMAGE_RENDITION_FORMAT says 'jpeg'.
+
+IMAGE_RENDITIONS_SYNC runs the work inline instead (tests, management
+commands); `manage.py build_renditions` backfills existing rows.
+"""
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from config.response_cache import response_cache
+from .models import Shoe
+
+logger = logging.getLogger(__name__)
+
+# name -> longest edge in pixels (never upscaled)
+RENDITION_SIZES = {
+    'thumb': 200,
+    'card': 600,
+    'full': 1600,
+}
+
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def output_format():
+    name = settings.IMAGE_RENDITION_FORMAT
+    if name == 'webp' and not features.check('webp'):
+        name = 'jpeg'
+    return FORMATS[name]
+
+
+def needs_renditions(instance):
+    return bool(instance.image) and (instance.renditions or {}).get('source') != instance.image.name
+
+
+def render(source, sizes=RENDITION_SIZES):
+    """{name: encoded bytes} for each size, from a file-like image."""
+    pil_format, _, options = output_format()
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if pil_format == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if pil_format == 'WEBP' and 'A' in image.getbands() else 'RGB')
+
+        encoded = {}
+        for name, edge in sorted(sizes.items(), key=lambda item: -item[1]):
+            resized = image.copy()
+            resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            resized.info.clear()  # no EXIF / GPS / ICC / comments in the output
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **options)
+            encoded[name] = buffer.getvalue()
+        return encoded
+
+
+def build_renditions(instance):
+    """
+    Renders and stores the renditions for a Shoe or ShoeImage, then records
+    them with a queryset update (no signals, so no re-scheduling).
+    Returns the new `renditions` dict (only 'source' if the image is unreadable).
+    """
+    source = instance.image.name
+    _, extension, _ = output_format()
+    label = 'shoe' if isinstance(instance, Shoe) else 'gallery'
+    try:
+        with default_storage.open(source, 'rb') as f:
+            encoded = render(f)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        # Recorded without sizes, so it isn't retried on every save
+        # (`manage.py build_renditions --force` tries again).
+        logger.warning('Cannot build renditions for %s %s (%s): %s', label, instance.pk, source, exc)
+        encoded = {}
+
+    renditions = {'source': source}
+    for name, data in encoded.items():
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        path = f'renditions/{label}/{instance.pk}/{name}-{digest}.{extension}'
+        if not default_storage.exists(path):
+            path = default_storage.save(path, ContentFile(data))
+        renditions[name] = path
+
+    # Only record them if the image wasn't replaced while we were working
+    model = type(instance)
+    updated = model.objects.filter(pk=instance.pk, image=source).update(renditions=renditions)
+    if updated:
+        shoe_id = instance.pk if model is Shoe else instance.shoe_id
+        Shoe.objects.filter(pk=shoe_id).update(updated_at=timezone.now())
+        response_cache.bump('shoes')
+    instance.renditions = renditions
+    return renditions
+
+
+class RenditionWorker:
+    """Runs build_renditions() on a small thread pool, after the upload commits."""
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_RENDITION_WORKERS, thread_name_prefix='renditions')
+            return self._executor
+
+    def schedule(self, instance):
+        if settings.IMAGE_RENDITIONS_SYNC:
+            build_renditions(instance)
+            return
+        model, pk = type(instance), instance.pk
+        transaction.on_commit(lambda: self.executor.submit(self._run, model, pk))
+
+    def _run(self, model, pk):
+        try:
+            instance = model.objects.filter(pk=pk).first()
+            if instance is not None and needs_renditions(instance):
+                build_renditions(instance)
+        except Exception:
+            logger.exception('Rendition job failed for %s %s', model.__name__, pk)
+        finally:
+            connection.close()  # this worker thread's own connection
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+rendition_worker = RenditionWorker()
@@ -0,0 +1,133 @@
+"""
+Full-text search for ShoeViewSet (?search=).
+
+DRF's SearchFilter turns every term into LIKE '%term%' ORs over title,
+description and brand: a full table scan with no ranking. ShoeSearchFilter
+hands the terms to a backend picked by database vendor instead:
+
+    postgresql  market_shoe.search_vector, a generated tsvector column with a
+                GIN index (migration 0007), ranked with ts_rank_cd
+    sqlite      market_shoe_fts, an FTS5 table kept in sync by market.signals,
+                ranked with bm25
+
+Every term is matched as a prefix ("nik" finds "Nike"), all terms must match,
+and results come back best match first unless ?ordering= is given.
+Without a usable backend it falls back to the plain SearchFilter.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+FTS_TABLE = 'market_shoe_fts'
+
+# title, brand and description weights (title/brand matches rank first)
+FTS_WEIGHTS = (10.0, 10.0, 2.0)
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(terms):
+    return [token.lower() for term in terms for token in _TOKEN.findall(term)]
+
+
+class PostgresSearchBackend:
+    def search(self, queryset, tokens):
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        table = queryset.model._meta.db_table
+        return queryset.filter(
+            RawSQL(f"{table}.search_vector @@ to_tsquery('simple', %s)", [tsquery], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f"ts_rank_cd({table}.search_vector, to_tsquery('simple', %s))", [tsquery],
+                               output_field=FloatField())
+        ).order_by('-search_rank', '-created_at')
+
+
+class SQLiteSearchBackend:
+    def search(self, queryset, tokens):
+        match = ' '.join('"{}"*'.format(token.replace('"', '')) for token in tokens)
+        table = queryset.model._meta.db_table
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        return queryset.filter(
+            RawSQL(f'{table}.id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)', [match],
+                   output_field=BooleanField())
+        ).annotate(
+            # bm25() is lower-is-better; negate it so both backends sort descending
+            search_rank=RawSQL(
+                f'(SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id)', [match],
+                output_field=FloatField())
+        ).order_by('-search_rank', '-created_at')
+
+
+def fts_table_exists(using):
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        return FTS_TABLE in connection.introspection.table_names(cursor)
+
+
+_backends = {}
+
+
+def get_search_backend(using):
+    """The search backend for a database alias, or None to use LIKE matching."""
+    if using not in _backends:
+        vendor = connections[using].vendor
+        if vendor == 'postgresql':
+            _backends[using] = PostgresSearchBackend()
+        elif vendor == 'sqlite' and fts_table_exists(using):
+            _backends[using] = SQLiteSearchBackend()
+        else:
+            _backends[using] = None
+    return _backends[using]
+
+
+class ShoeSearchFilter(filters.SearchFilter):
+    def filter_queryset(self, request, queryset, view):
+        tokens = tokenize(self.get_search_terms(request))
+        if not tokens:
+            return queryset
+
+        backend = get_search_backend(queryset.db)
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+        return backend.search(queryset, tokens)
+
+
+# --- SQLite index maintenance (called from market.signals) ---
+def index_shoe(shoe, using='default'):
+    if connections[using].vendor != 'sqlite' or get_search_backend(using) is None:
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [shoe.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, brand, description) VALUES (%s, %s, %s, %s)',
+            [shoe.pk, shoe.title, shoe.brand, shoe.description],
+        )
+
+
+def unindex_shoe(shoe_id, using='default'):
+    unindex_shoes([shoe_id], using=using)
+
+
+def unindex_shoes(shoe_ids, using='default'):
+    if connections[using].vendor != 'sqlite' or get_search_backend(using) is None or not shoe_ids:
+        return
+    with connections[using].cursor() as cursor:
+        placeholders = ', '.join(['%s'] * len(shoe_ids))
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', list(shoe_ids))
+
+
+def rebuild_search_index(using='default'):
+    """Re-fills the SQLite FTS table from market_shoe (after bulk inserts/updates)."""
+    if connections[using].vendor != 'sqlite' or get_search_backend(using) is None:
+        return False
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, brand, description) '
+            f'SELECT id, title, brand, description FROM market_shoe'
+        )
+    return True
@@ -1,15 +1,54 @@
 from rest_framework import serializers
-from .models import Shoe, ShoeImage, Wishlist
-from django.db.models import Avg
+from .models import ArchivedShoe, Shoe, ShoeImage
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.conf import settings
+from django.core.files.storage import default_storage
+from .renditions import RENDITION_SIZES
+from .services import create_listing
+from .wishlist import liked_shoe_ids
+from config.fieldsets import SparseFieldsSerializerMixin
+from config.instrumentation import TimedListSerializer, TimedSerializerMixin
+from config.values_serialization import ValuesSerializerMixin
+
+
+def rendition_urls(obj, request=None):
+    """
+    {'thumb': url, 'card': url, 'full': url} for a Shoe / ShoeImage.
+    Sizes that haven't been built yet (see market/renditions.py) fall back
+    to the original upload.
+    """
+    if not obj.image:
+        return None
+    return stored_rendition_urls(obj.image.name, obj.renditions, request)
+
+
+def stored_url(path, request=None):
+    url = default_storage.url(path)
+    return request.build_absolute_uri(url) if request else url
+
+
+def stored_rendition_urls(image_path, renditions, request=None):
+    """rendition_urls() from a stored path and renditions dict (archived galleries)."""
+    renditions = renditions or {}
+    return {name: stored_url(renditions.get(name) or image_path, request) for name in RENDITION_SIZES}
+
 
 # 1. Serializer for the Gallery Images
 class ShoeImageSerializer(serializers.ModelSerializer):
+    # Resized copies: use these instead of 'image' (the original upload)
+    renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = ShoeImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'renditions']
+
+    def get_renditions(self, obj):
+        return rendition_urls(obj, self.context.get('request'))
 
 # 2. Main Shoe Serializer
-class ShoeSerializer(serializers.ModelSerializer):
+class ShoeSerializer(SparseFieldsSerializerMixin, ValuesSerializerMixin, TimedSerializerMixin,
+                     serializers.ModelSerializer):
     seller_username = serializers.ReadOnlyField(source='seller.username')
     
     # Fetches the phone number from the User's Profile
@@ -19,6 +58,8 @@ class ShoeSerializer(serializers.ModelSerializer):
     seller_rating = serializers.SerializerMethodField()
     views = serializers.ReadOnlyField() 
     is_liked = serializers.SerializerMethodField()
+    # thumb / card / full URLs of 'image' (list pages should use 'card')
+    renditions = serializers.SerializerMethodField()
 
     # Read-only nested images (for display)
     images = ShoeImageSerializer(source='gallery', many=True, read_only=True)
@@ -33,6 +74,7 @@ class ShoeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Shoe
+        list_serializer_class = TimedListSerializer
         fields = [
             'id',
             'seller',
@@ -47,6 +89,7 @@ class ShoeSerializer(serializers.ModelSerializer):
             'condition',
             'description',
             'image',        
+            'renditions',
             'images',
             'uploaded_images', # <--- Add the new field here
             'contact_info',
@@ -56,27 +99,138 @@ class ShoeSerializer(serializers.ModelSerializer):
             'is_liked'
         ]
         read_only_fields = ['seller', 'views', 'is_liked']
+        # What the method fields read, for sparse querysets (config/fieldsets.py);
+        # seller_rating and images come from setup_eager_loading()
+        field_sources = {'renditions': ('image', 'renditions'), 'seller_rating': (), 'images': ()}
+
+    @staticmethod
+    def setup_eager_loading(queryset, fields=None):
+        """
+        Loads everything this serializer reads in a fixed number of queries,
+        however many shoes are on the page: seller + profile are joined,
+        the gallery is prefetched, and the seller rating comes back as an
+        annotation instead of one query per row (is_liked is answered from
+        the user's liked set, see market/wishlist.py).
+        The rating is the seller's stored Profile.rating_avg, so it can
+        also be used for ordering and filtering.
+
+        With `fields` (a sparse request, already narrowed with
+        config.fieldsets.narrow_queryset) only the gallery and the rating
+        are added, and only if they are among the fields.
+        """
+        if fields is None:
+            queryset = queryset.select_related('seller__profile')
+        if fields is None or 'images' in fields:
+            queryset = queryset.prefetch_related('gallery')
+        if fields is None or 'seller_rating' in fields:
+            queryset = queryset.annotate(seller_rating=Coalesce(F('seller__profile__rating_avg'), Value(0.0)))
+        return queryset
 
     def get_seller_rating(self, obj):
-        avg = obj.seller.received_reviews.aggregate(Avg('rating'))['rating__avg']
+        if hasattr(obj, 'seller_rating'):
+            avg = obj.seller_rating
+        else:
+            profile = getattr(obj.seller, 'profile', None)
+            avg = profile.rating_avg if profile else None
         return round(avg, 1) if avg else 0
 
+    def get_renditions(self, obj):
+        return rendition_urls(obj, self.context.get('request'))
+
     def get_is_liked(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Wishlist.objects.filter(user=request.user, shoe=obj).exists()
-        return False 
+        # One set lookup per request, no query per row
+        return obj.pk in liked_shoe_ids(self.context.get('request'))
+
+    # The same three from values() rows (list pages, config/values_serialization.py)
+    def values_seller_rating(self, row):
+        avg = row['seller_rating']
+        return round(avg, 1) if avg else 0
+
+    def values_renditions(self, row):
+        if not row['image']:
+            return None
+        return stored_rendition_urls(row['image'], row['renditions'], self.context.get('request'))
 
-    # --- NEW: Custom Create Method to save gallery images ---
+    def values_is_liked(self, row):
+        return row['id'] in liked_shoe_ids(self.context.get('request'))
+
+    def validate_uploaded_images(self, images):
+        # Every file was already checked by ImageField; cap how many come in one listing
+        limit = settings.LISTING_MAX_IMAGES
+        if len(images) > limit:
+            raise serializers.ValidationError(f"You can upload at most {limit} images.")
+        return images
+
+    # --- Creation goes through market.services (parallel uploads, one bulk insert) ---
     def create(self, validated_data):
-        # 1. Pop the uploaded_images list so it doesn't crash the Shoe creation
         uploaded_images = validated_data.pop('uploaded_images', [])
-        
-        # 2. Create the main Shoe instance
-        shoe = Shoe.objects.create(**validated_data)
+        main_image = validated_data.pop('image', None)
+        seller = validated_data.pop('seller')
+        return create_listing(seller, validated_data, main_image, uploaded_images)
+
+
+# Compact cards for list pages with ?view=compact: the rest comes back with ?expand=<field>
+class ShoeListSerializer(ShoeSerializer):
+    class Meta(ShoeSerializer.Meta):
+        expandable_fields = ['seller_phone', 'seller_rating', 'description', 'contact_info', 'images']
+
 
-        # 3. Create ShoeImage objects for the gallery
-        for image in uploaded_images:
-            ShoeImage.objects.create(shoe=shoe, image=image)
+# 3. Batch wishlist changes (POST /api/shoes/wishlist/)
+class WishlistBatchSerializer(serializers.Serializer):
+    max_ids = 100
 
-        return shoe
\ No newline at end of file
+    add = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list,
+                                max_length=max_ids)
+    remove = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list,
+                                   max_length=max_ids)
+
+    def validate(self, attrs):
+        if not attrs['add'] and not attrs['remove']:
+            raise serializers.ValidationError("Nothing to add or remove.")
+        if set(attrs['add']) & set(attrs['remove']):
+            raise serializers.ValidationError("A shoe can't be both added and removed.")
+        return attrs
+
+
+# 4. Archived listings (market/archive.py): read-only, in ShoeSerializer's shape
+class ArchivedShoeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    seller_username = serializers.ReadOnlyField(source='seller.username')
+    seller_phone = serializers.ReadOnlyField(source='seller.profile.phone_number')
+    seller_rating = serializers.SerializerMethodField()
+    renditions = serializers.SerializerMethodField()
+    images = serializers.SerializerMethodField()
+    is_liked = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedShoe
+        list_serializer_class = TimedListSerializer
+        fields = [
+            'id', 'seller', 'seller_username', 'seller_phone', 'seller_rating',
+            'title', 'brand', 'price', 'currency', 'size', 'condition', 'description',
+            'image', 'renditions', 'images', 'contact_info', 'is_sold', 'created_at',
+            'views', 'is_liked', 'archived_at',
+        ]
+        read_only_fields = fields
+
+    def get_seller_rating(self, obj):
+        profile = getattr(obj.seller, 'profile', None)
+        avg = profile.rating_avg if profile else None
+        return round(avg, 1) if avg else 0
+
+    def get_renditions(self, obj):
+        return rendition_urls(obj, self.context.get('request'))
+
+    def get_is_liked(self, obj):
+        user = getattr(self.context.get('request'), 'user', None)
+        return bool(user and user.is_authenticated and user.pk in obj.wishlisted_by)
+
+    def get_images(self, obj):
+        request = self.context.get('request')
+        return [
+            {
+                'id': image['id'],
+                'image': stored_url(image['image'], request),
+                'renditions': stored_rendition_urls(image['image'], image['renditions'], request),
+            }
+            for image in obj.gallery
+        ]
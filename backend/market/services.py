@@ -0,0 +1,88 @@
+"""
+Listing creation: the one place a Shoe and its gallery get written.
+
+ShoeSerializer has already validated every upload. create_listing() then
+writes the files to storage in parallel (LISTING_UPLOAD_WORKERS threads;
+storage latency, not CPU, is the cost with S3-like backends) and inserts
+the shoe plus all its ShoeImage rows in one transaction, the gallery
+with a single bulk_create. If the insert fails, the written files are
+deleted again.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .models import Shoe, ShoeImage
+from .renditions import rendition_worker
+
+logger = logging.getLogger(__name__)
+
+
+def store_uploads(uploads):
+    """
+    Saves (field, file) pairs to storage concurrently. Returns the stored
+    names in the same order. On any failure, deletes what was written.
+    """
+    def save(item):
+        field, upload = item
+        name = field.generate_filename(None, upload.name)
+        return field.storage.save(name, upload, max_length=field.max_length)
+
+    if not uploads:
+        return []
+    workers = max(1, min(settings.LISTING_UPLOAD_WORKERS, len(uploads)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='uploads') as pool:
+        futures = [pool.submit(save, item) for item in uploads]
+    names, error = [], None
+    for future in futures:
+        try:
+            names.append(future.result())
+        except Exception as exc:
+            error = error or exc
+    if error is not None:
+        delete_stored(names)
+        raise error
+    return names
+
+
+def delete_stored(names):
+    for name in names:
+        # Identical bytes map to one hashed file (config.storage): keep it if
+        # another listing uses it.
+        if Shoe.objects.filter(image=name).exists() or ShoeImage.objects.filter(image=name).exists():
+            continue
+        try:
+            default_storage.delete(name)
+        except Exception:
+            logger.warning('Could not delete orphaned upload %s', name, exc_info=True)
+
+
+def create_listing(seller, data, main_image=None, gallery=()):
+    """
+    Creates a shoe for `seller` from validated serializer data, with
+    `main_image` as Shoe.image and `gallery` as its ShoeImages.
+    """
+    shoe_field = Shoe._meta.get_field('image')
+    gallery_field = ShoeImage._meta.get_field('image')
+    uploads = [(gallery_field, upload) for upload in gallery]
+    if main_image is not None:
+        uploads.insert(0, (shoe_field, main_image))
+    names = store_uploads(uploads)
+
+    if main_image is not None:
+        data = {**data, 'image': names.pop(0)}
+    try:
+        with transaction.atomic():
+            shoe = Shoe.objects.create(seller=seller, **data)
+            images = ShoeImage.objects.bulk_create(
+                [ShoeImage(shoe=shoe, image=name) for name in names])
+            # bulk_create sends no post_save: schedule their renditions here
+            for image in images:
+                rendition_worker.schedule(image)
+    except Exception:
+        delete_stored(names + ([data['image']] if main_image is not None else []))
+        raise
+    return shoe
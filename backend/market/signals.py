@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from config.response_cache import response_cache
+from .models import Shoe, ShoeImage, Wishlist
+from .renditions import needs_renditions, rendition_worker
+from .search import index_shoe, unindex_shoe
+from .wishlist import liked_shoes
+
+
+# Keep the SQLite full-text table in sync (Postgres maintains its own
+# generated search_vector column, so these are no-ops there).
+@receiver(post_save, sender=Shoe)
+def index_shoe_for_search(sender, instance, using, **kwargs):
+    index_shoe(instance, using=using)
+
+
+@receiver(post_delete, sender=Shoe)
+def unindex_shoe_for_search(sender, instance, using, **kwargs):
+    unindex_shoe(instance.pk, using=using)
+
+
+# Resize / strip new uploads off the request path (market/renditions.py)
+@receiver(post_save, sender=Shoe)
+@receiver(post_save, sender=ShoeImage)
+def schedule_renditions(sender, instance, **kwargs):
+    if needs_renditions(instance):
+        rendition_worker.schedule(instance)
+
+
+# The gallery is part of the shoe's representation, so it moves the shoe's
+# updated_at (ETag / Last-Modified).
+@receiver(post_save, sender=ShoeImage)
+@receiver(post_delete, sender=ShoeImage)
+def touch_shoe(sender, instance, **kwargs):
+    Shoe.objects.filter(pk=instance.shoe_id).update(updated_at=timezone.now())
+
+
+# Cached anonymous shoe responses (config.response_cache) embed the gallery too.
+@receiver(post_save, sender=Shoe)
+@receiver(post_delete, sender=Shoe)
+@receiver(post_save, sender=ShoeImage)
+@receiver(post_delete, sender=ShoeImage)
+def invalidate_cached_shoe_responses(sender, **kwargs):
+    response_cache.bump('shoes')
+
+
+# Cached liked-shoe sets behind is_liked (market/wishlist.py)
+@receiver(post_save, sender=Wishlist)
+@receiver(post_delete, sender=Wishlist)
+def invalidate_liked_shoes(sender, instance, **kwargs):
+    liked_shoes.invalidate(instance.user_id)
@@ -0,0 +1,24 @@
+"""Fixture factories shared by the apps' tests."""
+from django.contrib.auth.models import User
+
+from market.models import Shoe
+from users.models import Profile
+
+
+def make_user(username, phone=None):
+    """A User with a Profile (unique phone number unless one is given)."""
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='x')
+    Profile.objects.create(user=user, phone_number=phone or f'+385{user.pk:07d}')
+    return user
+
+
+def make_shoe(seller, **fields):
+    data = {
+        'title': 'Air Max 90',
+        'brand': 'Nike',
+        'size': '42.0',
+        'price': '120.00',
+        'image': 'shoe_images/air-max.jpg',
+    }
+    data.update(fields)
+    return Shoe.objects.create(seller=seller, **data)
@@ -0,0 +1,1081 @@
+import asyncio
+import io
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from reviews.models import Review
+from benchmarks.stub_issuer import StubIssuer
+from ..archive import archivable_shoes, archive_shoes
+from ..models import ArchivedShoe, Shoe, ShoeImage, Wishlist
+from ..search import FTS_TABLE, fts_table_exists
+from ..views import ShoeViewSet, async_sitemap_page_view
+from config.instrumentation import db_queries, request_seconds
+from config.renderers import FastJSONRenderer
+from config.response_cache import response_cache
+from config.throttling import CacheThrottleStore, SlidingWindowThrottle, throttle_store
+from config.values_serialization import ValuesSerializerMixin
+from ..view_counter import CacheViewCountStore, view_counter
+from .factories import make_shoe, make_user
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class MarketTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.seller = make_user('seller')
+        self.buyer = make_user('buyer')
+
+    def make_shoes(self, count, seller=None):
+        shoes = []
+        for i in range(count):
+            shoe = make_shoe(seller or self.seller, title=f'Shoe {i}')
+            ShoeImage.objects.create(shoe=shoe, image=f'shoe_gallery/{shoe.pk}-a.jpg')
+            ShoeImage.objects.create(shoe=shoe, image=f'shoe_gallery/{shoe.pk}-b.jpg')
+            shoes.append(shoe)
+        return shoes
+
+    def count_queries(self, url, user=None):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+
+class ShoeListQueryCountTests(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        Review.objects.create(seller=self.seller, reviewer=self.buyer, rating=4, comment='ok')
+        Review.objects.create(seller=self.seller, reviewer=make_user('other'), rating=5, comment='great')
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        self.make_shoes(2)
+        small, _ = self.count_queries('/api/shoes/', self.buyer)
+
+        self.make_shoes(10)
+        cache.clear()  # both requests load the buyer's liked set
+        full, response = self.count_queries('/api/shoes/', self.buyer)
+
+        self.assertEqual(len(response.data['results']), 12)
+        self.assertEqual(small, full)
+
+    def test_anonymous_list_query_count_is_constant(self):
+        self.make_shoes(2)
+        small, _ = self.count_queries('/api/shoes/')
+        self.make_shoes(10)
+        full, _ = self.count_queries('/api/shoes/')
+        self.assertEqual(small, full)
+
+    def test_favorites_query_count_is_constant(self):
+        for shoe in self.make_shoes(2):
+            Wishlist.objects.create(user=self.buyer, shoe=shoe)
+        small, _ = self.count_queries('/api/shoes/favorites/', self.buyer)
+        for shoe in self.make_shoes(10):
+            Wishlist.objects.create(user=self.buyer, shoe=shoe)
+        full, _ = self.count_queries('/api/shoes/favorites/', self.buyer)
+        self.assertEqual(small, full)
+
+    def test_annotated_fields_match_per_row_values(self):
+        liked, not_liked = self.make_shoes(2)
+        Wishlist.objects.create(user=self.buyer, shoe=liked)
+        _, response = self.count_queries('/api/shoes/?expand=seller_rating,seller_phone,images', self.buyer)
+
+        rows = {row['id']: row for row in response.data['results']}
+        self.assertTrue(rows[liked.pk]['is_liked'])
+        self.assertFalse(rows[not_liked.pk]['is_liked'])
+        self.assertEqual(rows[liked.pk]['seller_rating'], 4.5)
+        self.assertEqual(rows[liked.pk]['seller_username'], 'seller')
+        self.assertEqual(rows[liked.pk]['seller_phone'], self.seller.profile.phone_number)
+        self.assertEqual(len(rows[liked.pk]['images']), 2)
+
+
+@override_settings(VIEW_COUNT_FLUSH_SECONDS=3600, VIEW_COUNT_DEDUPE_SECONDS=1800)
+class ViewCounterTests(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shoe = make_shoe(self.seller)
+        view_counter.store.claim()
+        self.addCleanup(view_counter.store.claim)
+
+    def views(self):
+        return Shoe.objects.values_list('views', flat=True).get(pk=self.shoe.pk)
+
+    def test_detail_hit_is_buffered_then_flushed(self):
+        response = self.client.get(f'/api/shoes/{self.shoe.pk}/')
+        self.assertEqual(response.data['views'], 1)
+        self.assertEqual(self.views(), 0)
+
+        view_counter.flush()
+        self.assertEqual(self.views(), 1)
+
+    def test_refreshes_by_the_same_viewer_count_once(self):
+        for _ in range(5):
+            self.client.get(f'/api/shoes/{self.shoe.pk}/', REMOTE_ADDR='10.0.0.1')
+        self.client.get(f'/api/shoes/{self.shoe.pk}/', REMOTE_ADDR='10.0.0.2')
+        view_counter.flush()
+        self.assertEqual(self.views(), 2)
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        for i in range(3):
+            self.client.get(f'/api/shoes/{self.shoe.pk}/', HTTP_X_FORWARDED_FOR=f'1.2.3.{i}')
+        view_counter.flush()
+        self.assertEqual(self.views(), 1)
+
+    def test_rotating_forwarded_for_does_not_dodge_dedupe(self):
+        rest_framework = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            for i in range(3):
+                # The proxy appends the address it saw; what comes before is up to the client
+                self.client.get(f'/api/shoes/{self.shoe.pk}/', HTTP_X_FORWARDED_FOR=f'1.2.3.{i}, 10.0.0.1')
+        view_counter.flush()
+        self.assertEqual(self.views(), 1)
+
+    def test_seller_views_are_not_counted(self):
+        self.client.force_authenticate(self.seller)
+        self.client.get(f'/api/shoes/{self.shoe.pk}/')
+        view_counter.flush()
+        self.assertEqual(self.views(), 0)
+
+    def test_flush_is_batched_by_increment(self):
+        other = make_shoe(self.seller)
+        for viewer in ('a', 'b'):
+            view_counter.record(self.shoe.pk, viewer)
+            view_counter.record(other.pk, viewer)
+        with CaptureQueriesContext(connection) as ctx:
+            view_counter.flush()
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.views(), 2)
+
+    def hammer(self, threads=8, hits=250):
+        def worker(n):
+            for i in range(hits):
+                view_counter.record(self.shoe.pk, f'viewer-{n}-{i}')
+
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        return threads * hits
+
+    def test_no_lost_increments_under_concurrent_hits(self):
+        expected = self.hammer()
+        view_counter.flush()
+        self.assertEqual(self.views(), expected)
+
+    @override_settings(VIEW_COUNT_STORE='market.view_counter.CacheViewCountStore')
+    def test_shared_store_has_no_lost_increments_with_competing_flushers(self):
+        expected = self.hammer()
+        # A second worker sweeping the same ids must not double count
+        other_worker = CacheViewCountStore()
+        claimed = other_worker.claim([self.shoe.pk])
+        Shoe.objects.filter(pk=self.shoe.pk).update(views=claimed.get(self.shoe.pk, 0))
+        view_counter.flush()
+        self.assertEqual(self.views(), expected)
+
+
+class ShoeSearchTests(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        self.air_max = make_shoe(self.seller, title='Air Max 90', brand='Nike', description='Classic runner')
+        self.samba = make_shoe(self.seller, title='Samba OG', brand='Adidas', description='Goes well with Nike socks')
+        self.gel = make_shoe(self.seller, title='Gel-Lyte III', brand='Asics', description='Retro runner')
+
+    def search(self, term, **params):
+        response = self.client.get('/api/shoes/', {'search': term, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_prefix_match_ranks_title_and_brand_above_description(self):
+        self.assertEqual(self.search('nik'), [self.air_max.pk, self.samba.pk])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search('retro runner'), [self.gel.pk])
+        self.assertEqual(self.search('samba runner'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.gel.title = 'Gel Kayano'
+        self.gel.save()
+        self.assertEqual(self.search('kayano'), [self.gel.pk])
+
+        self.gel.delete()
+        self.assertEqual(self.search('kayano'), [])
+
+    def test_explicit_ordering_wins_over_rank(self):
+        Shoe.objects.filter(pk=self.samba.pk).update(price='10.00')
+        self.assertEqual(self.search('nike', ordering='price'), [self.samba.pk, self.air_max.pk])
+
+    def test_punctuation_only_search_returns_everything(self):
+        self.assertEqual(len(self.search('"*')), 3)
+
+
+class CursorPaginationTests(MarketTestCase):
+    def walk(self, url, params=None):
+        seen, pages = [], 0
+        response = self.client.get(url, {'pagination': 'cursor', **(params or {})})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(row['id'] for row in response.data['results'])
+            pages += 1
+            if not response.data['next']:
+                return seen, pages
+            response = self.client.get(response.data['next'])
+
+    def test_pages_cover_every_shoe_once_newest_first(self):
+        shoes = self.make_shoes(30)
+        seen, pages = self.walk('/api/shoes/')
+        self.assertEqual(seen, [s.pk for s in reversed(shoes)])
+        self.assertEqual(pages, 3)
+
+    def test_new_shoes_do_not_shift_pages(self):
+        self.make_shoes(15)
+        first = self.client.get('/api/shoes/', {'pagination': 'cursor'})
+        make_shoe(self.seller, title='Brand new')
+        second = self.client.get(first.data['next'])
+        ids = [row['id'] for row in first.data['results'] + second.data['results']]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(second.data['results']), 3)
+
+    def test_other_orderings_with_ties(self):
+        for i, shoe in enumerate(self.make_shoes(20)):
+            Shoe.objects.filter(pk=shoe.pk).update(price=[50, 75][i % 2])
+        seen, _ = self.walk('/api/shoes/', {'ordering': 'price', 'page_size': 7})
+        expected = list(Shoe.objects.order_by('price', 'pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_the_page_before(self):
+        self.make_shoes(30)
+        first = self.client.get('/api/shoes/', {'pagination': 'cursor'})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNone(first.data['previous'])
+
+    def test_no_count_query(self):
+        self.make_shoes(5)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/shoes/', {'pagination': 'cursor'})
+        self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+
+    def test_favorites_and_reviews_support_cursor_mode(self):
+        for shoe in self.make_shoes(14):
+            Wishlist.objects.create(user=self.buyer, shoe=shoe)
+        self.client.force_authenticate(self.buyer)
+        seen, pages = self.walk('/api/shoes/favorites/')
+        self.assertEqual((len(seen), pages), (14, 2))
+
+        Review.objects.create(seller=self.seller, reviewer=self.buyer, rating=5, comment='ok')
+        seen, _ = self.walk('/api/reviews/')
+        self.assertEqual(len(seen), 1)
+
+    def test_bad_cursor_is_404(self):
+        response = self.client.get('/api/shoes/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_numbers_stay_the_default(self):
+        self.make_shoes(3)
+        response = self.client.get('/api/shoes/')
+        self.assertEqual(response.data['count'], 3)
+
+
+@override_settings(SITEMAP_PAGE_SIZE=2)
+class SitemapTests(MarketTestCase):
+    def content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def page_of(self, shoe):
+        return (shoe.pk - 1) // 2 + 1
+
+    def test_index_lists_one_file_per_id_range(self):
+        shoes = self.make_shoes(5)
+        response = self.client.get('/api/sitemap.xml')
+        self.assertEqual(response.status_code, 200)
+        body = self.content(response)
+        self.assertIn('<sitemapindex', body)
+        pages = sorted({self.page_of(s) for s in shoes})
+        for page in pages:
+            self.assertIn(f'/api/sitemap-{page}.xml</loc>', body)
+        self.assertEqual(body.count('<sitemap>'), len(pages))
+
+    def test_page_streams_its_shoes(self):
+        shoes = self.make_shoes(4)
+        page = self.page_of(shoes[-1])
+        body = self.content(self.client.get(f'/api/sitemap-{page}.xml'))
+        in_page = [s for s in shoes if self.page_of(s) == page]
+        self.assertEqual(body.count('<url>'), len(in_page) + (page == 1))
+        for shoe in in_page:
+            self.assertIn(f'/shoes/{shoe.pk}</loc>', body)
+
+    def test_empty_page_is_404(self):
+        self.make_shoes(1)
+        self.assertEqual(self.client.get('/api/sitemap-9999.xml').status_code, 404)
+
+    def test_conditional_get_is_304(self):
+        self.make_shoes(2)
+        response = self.client.get('/api/sitemap.xml')
+        again = self.client.get('/api/sitemap.xml', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+        make_shoe(self.seller, title='New arrival')
+        changed = self.client.get('/api/sitemap.xml', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+
+
+@override_settings(
+    VIEW_COUNT_FLUSH_SECONDS=3600, RESPONSE_CACHE_ENDPOINTS=['shoes-list', 'shoes-detail', 'profiles-detail'])
+class ResponseCacheTests(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shoe = self.make_shoes(1)[0]
+        view_counter.store.claim()
+        self.addCleanup(view_counter.store.claim)
+
+    def test_second_anonymous_list_is_served_without_queries(self):
+        self.count_queries('/api/shoes/?brand=Nike&size=42.0')
+        queries, response = self.count_queries('/api/shoes/?size=42.0&brand=Nike')
+        self.assertEqual(queries, 0)
+        self.assertEqual(response.data['count'], 1)
+        stats = response_cache.stats()['shoes-list']
+        self.assertGreaterEqual(stats['hits'], 1)
+
+    def test_writes_invalidate_cached_responses(self):
+        self.client.get('/api/shoes/')
+        make_shoe(self.seller, title='Fresh listing')
+        self.assertEqual(self.client.get('/api/shoes/').data['count'], 2)
+
+        url = f'/api/shoes/{self.shoe.pk}/'
+        self.client.get(url)
+        ShoeImage.objects.create(shoe=self.shoe, image='shoe_gallery/extra.jpg')
+        self.assertEqual(len(self.client.get(url).data['images']), 3)
+
+        self.client.get(url)
+        Review.objects.create(seller=self.seller, reviewer=self.buyer, rating=4, comment='ok')
+        self.assertEqual(self.client.get(url).data['seller_rating'], 4.0)
+
+    def test_cached_detail_still_counts_views(self):
+        url = f'/api/shoes/{self.shoe.pk}/'
+        self.client.get(url, REMOTE_ADDR='10.0.0.1')
+        response = self.client.get(url, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.data['views'], 2)
+        view_counter.flush()
+        self.assertEqual(Shoe.objects.get(pk=self.shoe.pk).views, 2)
+
+    def test_profile_page_is_invalidated_by_reviews(self):
+        url = '/api/profiles/seller/'
+        self.assertEqual(self.client.get(url).data['review_count'], 0)
+        Review.objects.create(seller=self.seller, reviewer=self.buyer, rating=5, comment='great')
+        self.assertEqual(self.client.get(url).data['review_count'], 1)
+
+    def test_authenticated_requests_bypass_the_cache(self):
+        self.client.force_authenticate(self.buyer)
+        self.count_queries('/api/shoes/', user=self.buyer)
+        queries, _ = self.count_queries('/api/shoes/', user=self.buyer)
+        self.assertGreater(queries, 0)
+
+    @override_settings(RESPONSE_CACHE_ENDPOINTS=['shoes-detail'])
+    def test_endpoints_can_be_switched_off(self):
+        self.count_queries('/api/shoes/')
+        queries, _ = self.count_queries('/api/shoes/')
+        self.assertGreater(queries, 0)
+
+
+@override_settings(VIEW_COUNT_FLUSH_SECONDS=3600)
+class ConditionalGetTests(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shoe = self.make_shoes(1)[0]
+        self.url = f'/api/shoes/{self.shoe.pk}/'
+        view_counter.store.claim()
+        self.addCleanup(view_counter.store.claim)
+
+    def revalidate(self, url, response, **extra):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **extra)
+
+    def test_unchanged_detail_is_304_without_serializing(self):
+        first = self.client.get(self.url, REMOTE_ADDR='10.0.0.1')
+        self.assertIn('Last-Modified', first)
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.revalidate(self.url, first, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+        self.assertEqual(again['ETag'], first['ETag'])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        # ...and it still counts as a view
+        self.assertEqual(view_counter.pending(self.shoe.pk), 2)
+
+    def test_edits_and_gallery_changes_change_the_etag(self):
+        first = self.client.get(self.url)
+        Shoe.objects.get(pk=self.shoe.pk).save()
+        second = self.revalidate(self.url, first)
+        self.assertEqual(second.status_code, 200)
+
+        ShoeImage.objects.filter(shoe=self.shoe).first().delete()
+        third = self.revalidate(self.url, second)
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(len(third.data['images']), 1)
+
+    def test_list_revalidates_on_new_listings_and_likes(self):
+        self.client.force_authenticate(self.buyer)
+        first = self.client.get('/api/shoes/?brand=Nike')
+        self.assertEqual(self.revalidate('/api/shoes/?brand=Nike', first).status_code, 304)
+
+        Wishlist.objects.create(user=self.buyer, shoe=self.shoe)
+        liked = self.revalidate('/api/shoes/?brand=Nike', first)
+        self.assertEqual(liked.status_code, 200)
+        self.assertTrue(liked.data['results'][0]['is_liked'])
+
+        make_shoe(self.seller, title='New drop')
+        self.assertEqual(self.revalidate('/api/shoes/?brand=Nike', liked).status_code, 200)
+
+    def test_list_etag_comes_from_the_database_without_the_response_cache(self):
+        # queryset.update() sends no signals: like a write another worker's cache saw
+        first = self.client.get('/api/shoes/')
+        Shoe.objects.filter(pk=self.shoe.pk).update(title='Renamed', updated_at=timezone.now())
+        self.assertEqual(self.revalidate('/api/shoes/', first).status_code, 200)
+
+        with self.settings(RESPONSE_CACHE_ENDPOINTS=['shoes-list']):
+            first = self.client.get('/api/shoes/')
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.revalidate('/api/shoes/', first).status_code, 304)
+            self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_profile_revalidates_on_new_reviews(self):
+        url = '/api/profiles/seller/'
+        first = self.client.get(url)
+        self.assertEqual(self.revalidate(url, first).status_code, 304)
+        Review.objects.create(seller=self.seller, reviewer=self.buyer, rating=5, comment='great')
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+
+def make_photo(name='photo.jpg', size=(3000, 2000)):
+    """A JPEG like a phone's: big, rotated via EXIF, with a GPS tag."""
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise
+    exif[0x8825] = {2: (45.0, 48.0, 0.0)}  # GPSInfo: latitude
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class RenditionTests(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        overrides = self.settings(MEDIA_ROOT=media, IMAGE_RENDITIONS_SYNC=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def create_listing(self):
+        self.client.force_authenticate(self.seller)
+        return self.client.post('/api/shoes/', {
+            'title': 'Samba OG', 'brand': 'Adidas', 'size': '42.0', 'price': '90.00',
+            'image': make_photo(), 'uploaded_images': [make_photo('side.jpg')],
+        }, format='multipart')
+
+    def test_uploads_get_small_exif_free_renditions(self):
+        response = self.create_listing()
+        self.assertEqual(response.status_code, 201, response.data)
+
+        shoe = Shoe.objects.get(pk=response.data['id'])
+        for name, edge in (('thumb', 200), ('card', 600), ('full', 1600)):
+            with default_storage.open(shoe.renditions[name]) as f, Image.open(f) as image:
+                self.assertEqual(max(image.size), edge)
+                self.assertGreater(image.height, image.width)  # EXIF orientation applied
+                self.assertFalse(image.getexif())
+        self.assertTrue(shoe.gallery.get().renditions.get('card'))
+
+    def test_serializer_exposes_rendition_urls(self):
+        shoe_id = self.create_listing().data['id']
+        self.client.force_authenticate(None)
+        data = self.client.get(f'/api/shoes/{shoe_id}/').data
+        self.assertIn('/media/renditions/shoe/', data['renditions']['card'])
+        self.assertIn('/media/renditions/gallery/', data['images'][0]['renditions']['thumb'])
+
+    def test_unreadable_images_fall_back_to_the_original(self):
+        shoe = make_shoe(self.seller)  # points at a file that doesn't exist
+        self.assertEqual(shoe.renditions, {'source': shoe.image.name})
+        data = self.client.get(f'/api/shoes/{shoe.pk}/').data
+        self.assertTrue(data['renditions']['card'].endswith(shoe.image.name))
+
+
+class ListingCreationTests(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        overrides = self.settings(MEDIA_ROOT=self.media, IMAGE_RENDITIONS_SYNC=False)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client.force_authenticate(self.seller)
+
+    def post(self, gallery):
+        return self.client.post('/api/shoes/', {
+            'title': 'Samba OG', 'brand': 'Adidas', 'size': '42.0', 'price': '90.00',
+            'image': make_photo(size=(40, 30)),
+            'uploaded_images': [make_photo(f'{i}.jpg', size=(40, 30)) for i in range(gallery)],
+        }, format='multipart')
+
+    def stored_files(self):
+        return [name for folder in ('shoe_images', 'shoe_gallery')
+                for name in (default_storage.listdir(folder)[1] if default_storage.exists(folder) else [])]
+
+    def test_gallery_is_saved_once_with_one_insert(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(gallery=3)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(response.data['images']), 3)
+        self.assertEqual(ShoeImage.objects.filter(shoe_id=response.data['id']).count(), 3)
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "market_shoeimage"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(len(self.stored_files()), 4)
+
+    @override_settings(LISTING_MAX_IMAGES=2)
+    def test_too_many_images_are_rejected_before_anything_is_written(self):
+        response = self.post(gallery=3)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('uploaded_images', response.data)
+        self.assertEqual(self.stored_files(), [])
+        self.assertFalse(Shoe.objects.exists())
+
+    def test_failed_insert_removes_the_written_files(self):
+        with mock.patch('market.services.ShoeImage.objects.bulk_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.post(gallery=2)
+        self.assertEqual(self.stored_files(), [])
+        self.assertFalse(Shoe.objects.exists())
+
+
+class MediaServingTests(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        overrides = self.settings(MEDIA_ROOT=media)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.body = bytes(range(256)) * 40
+        self.name = default_storage.save('shoe_images/photo.jpg', ContentFile(self.body))
+        self.url = f'/media/{self.name}'
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, content
+
+    def test_uploads_get_content_hashed_immutable_urls(self):
+        self.assertRegex(self.name, r'^shoe_images/photo-[0-9a-f]{12}\.jpg$')
+        self.assertEqual(default_storage.save('shoe_images/copy.jpg', ContentFile(self.body)),
+                         self.name.replace('photo', 'copy'))
+        response, content = self.get()
+        self.assertEqual(content, self.body)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        again, content = self.get(If_None_Match=response['ETag'])
+        self.assertEqual((again.status_code, content), (304, b''))
+
+    def test_names_that_look_hashed_are_hashed_anyway(self):
+        pinned = default_storage.save('shoe_images/pinned-0123456789ab.jpg', ContentFile(self.body))
+        self.assertEqual(pinned, f"shoe_images/pinned-0123456789ab-{self.name[-16:-4]}.jpg")
+        other = default_storage.save('shoe_images/pinned-0123456789ab.jpg', ContentFile(b'other bytes'))
+        self.assertNotEqual(other, pinned)
+
+    def test_range_requests(self):
+        response, content = self.get(Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(content, self.body[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.body)}')
+
+        response, content = self.get(Range='bytes=-5')
+        self.assertEqual(content, self.body[-5:])
+
+        response, _ = self.get(Range=f'bytes={len(self.body)}-')
+        self.assertEqual(response.status_code, 416)
+
+        # If-Range naming another version gets the whole (new) file
+        response, content = self.get(Range='bytes=0-9', If_Range='"stale"')
+        self.assertEqual((response.status_code, content), (200, self.body))
+
+    def test_asgi_streams_from_an_async_iterator(self):
+        async def get(**headers):
+            response = await self.async_client.get(self.url, headers=headers)
+            self.assertTrue(response.is_async)  # no sync iterator buffered whole by the handler
+            return response, b''.join([chunk async for chunk in response])
+
+        response, content = async_to_sync(get)()
+        self.assertEqual((response.status_code, content), (200, self.body))
+        self.assertEqual(response['Content-Length'], str(len(self.body)))
+        response, content = async_to_sync(get)(Range='bytes=10-19')
+        self.assertEqual((response.status_code, content), (206, self.body[10:20]))
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel', MEDIA_ACCEL_PREFIX='/protected-media/')
+    def test_x_accel_offload(self):
+        response, content = self.get()
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(content, b'')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_paths_outside_media_root_are_404(self):
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/shoe_images/').status_code, 404)
+
+
+@override_settings(ASYNC_READ_VIEWS=True, SUPABASE_AUTH_MODE='local', SUPABASE_JWT_SECRET='async-read-view-tests-secret-key')
+class AsyncReadViewTests(MarketTestCase):
+    def test_read_routes_get_async_views(self):
+        for actions, is_async in (
+            ({'get': 'list', 'post': 'create'}, True),
+            ({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}, True),
+            ({'get': 'favorites'}, True),
+            ({'post': 'toggle_wishlist'}, False),
+        ):
+            self.assertEqual(asyncio.iscoroutinefunction(ShoeViewSet.as_view(actions)), is_async, actions)
+        with self.settings(ASYNC_READ_VIEWS=False):
+            self.assertFalse(asyncio.iscoroutinefunction(ShoeViewSet.as_view({'get': 'list'})))
+
+    def test_favorites_authenticate_on_the_event_loop(self):
+        liked, _ = self.make_shoes(2)
+        Wishlist.objects.create(user=self.buyer, shoe=liked)
+        token = StubIssuer(secret='async-read-view-tests-secret-key').issue(self.buyer.email)
+
+        view = ShoeViewSet.as_view({'get': 'favorites'}, **ShoeViewSet.favorites.kwargs)
+        request = AsyncRequestFactory().get('/api/shoes/favorites/', headers={'Authorization': f'Bearer {token}'})
+        response = async_to_sync(view)(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([shoe['id'] for shoe in response.data['results']], [liked.pk])
+        self.assertTrue(response.data['results'][0]['is_liked'])
+
+        anonymous = async_to_sync(view)(AsyncRequestFactory().get('/api/shoes/favorites/'))
+        self.assertEqual(anonymous.status_code, 403)
+
+    def test_async_sitemap_page_streams_its_shoes(self):
+        async def read(response):
+            return b''.join([chunk async for chunk in response]).decode()
+
+        shoes = self.make_shoes(3)
+        with self.settings(SITEMAP_PAGE_SIZE=1000):
+            response = async_to_sync(async_sitemap_page_view)(AsyncRequestFactory().get('/api/sitemap-1.xml'), page=1)
+            body = async_to_sync(read)(response)
+        self.assertEqual(body.count('<url>'), len(shoes) + 1)
+        self.assertTrue(body.endswith('</urlset>\n'))
+
+
+@override_settings(SUPABASE_AUTH_MODE='local', SUPABASE_JWT_SECRET='request-metrics-tests-secret-key')
+class RequestMetricsTests(MarketTestCase):
+    def get_logged(self, url, **headers):
+        with self.assertLogs('config.requests', 'INFO') as logs, \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return response, logs.records[-1].data, len(queries.captured_queries)
+
+    def test_request_is_attributed_to_its_viewset_action(self):
+        self.make_shoes(3)
+        before = request_seconds.value(route='ShoeViewSet.list', method='GET', status='2xx')
+        queries_before = db_queries.sum(route='ShoeViewSet.list')
+
+        response, data, query_count = self.get_logged('/api/shoes/')
+        self.assertEqual(data['route'], 'ShoeViewSet.list')
+        self.assertEqual(data['status'], 200)
+        self.assertEqual(data['db_queries'], query_count)
+        self.assertEqual(data['bytes'], len(response.content))
+        self.assertGreater(data['serialization_ms'], 0)
+        self.assertEqual(request_seconds.value(route='ShoeViewSet.list', method='GET', status='2xx'), before + 1)
+        self.assertEqual(db_queries.sum(route='ShoeViewSet.list'), queries_before + query_count)
+
+        _, data, _ = self.get_logged(f'/api/profiles/{self.seller.username}/')
+        self.assertEqual(data['route'], 'ProfileViewSet.retrieve')
+
+    def test_auth_time_is_recorded(self):
+        token = StubIssuer(secret='request-metrics-tests-secret-key').issue(self.buyer.email)
+        _, data, _ = self.get_logged('/api/shoes/favorites/', Authorization=f'Bearer {token}')
+        self.assertEqual(data['route'], 'ShoeViewSet.favorites')
+        self.assertGreater(data['auth_ms'], 0)
+
+    def test_slow_queries_are_logged(self):
+        self.make_shoes(1)
+        with self.settings(SLOW_QUERY_MS=0), self.assertLogs('config.slow_queries', 'WARNING') as logs:
+            self.client.get('/api/shoes/')
+        entry = logs.records[0].data
+        self.assertEqual(entry['route'], 'ShoeViewSet.list')
+        self.assertIn('SELECT', entry['sql'])
+
+
+class ArchiveTests(MarketTestCase):
+    def age(self, shoe, days):
+        Shoe.objects.filter(pk=shoe.pk).update(updated_at=timezone.now() - timedelta(days=days))
+
+    def test_only_old_sold_listings_are_archivable(self):
+        old_sold, new_sold, old_live = self.make_shoes(3)
+        Shoe.objects.filter(pk__in=[old_sold.pk, new_sold.pk]).update(is_sold=True)
+        self.age(old_sold, 40)
+        self.age(old_live, 400)
+        self.assertEqual(list(archivable_shoes()), [old_sold])
+        with self.settings(ARCHIVE_STALE_AFTER_DAYS=365):
+            self.assertEqual(set(archivable_shoes()), {old_sold, old_live})
+
+    def test_archived_listing_leaves_the_live_table_but_keeps_its_url(self):
+        sold, live = self.make_shoes(2)
+        Wishlist.objects.create(user=self.buyer, shoe=sold)
+        Shoe.objects.filter(pk=sold.pk).update(is_sold=True, views=7)
+        self.age(sold, 40)
+        before = self.client.get(f'/api/shoes/{sold.pk}/').data
+
+        self.assertEqual(sum(archive_shoes(batch_size=1)), 1)
+        self.assertFalse(Shoe.objects.filter(pk=sold.pk).exists())
+        self.assertFalse(ShoeImage.objects.filter(shoe_id=sold.pk).exists())
+        self.assertFalse(Wishlist.objects.filter(shoe_id=sold.pk).exists())
+        self.assertEqual(ArchivedShoe.objects.get().pk, sold.pk)
+
+        listed = self.client.get('/api/shoes/').data['results']
+        self.assertEqual([row['id'] for row in listed], [live.pk])
+
+        response = self.client.get(f'/api/shoes/{sold.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('archived_at', response.data)
+        for field in ('title', 'seller_username', 'image', 'renditions', 'images', 'is_sold', 'created_at'):
+            self.assertEqual(response.data[field], before[field], field)
+        self.assertGreaterEqual(response.data['views'], 7)
+
+        self.client.force_authenticate(self.seller)
+        self.assertEqual(self.client.patch(f'/api/shoes/{sold.pk}/', {'price': '1.00'}).status_code, 404)
+
+    def test_batch_deletes_without_per_row_signals(self):
+        def archive(shoes):
+            Shoe.objects.filter(pk__in=[s.pk for s in shoes]).update(is_sold=True)
+            for shoe in shoes:
+                self.age(shoe, 40)
+                Wishlist.objects.create(user=self.buyer, shoe=shoe)
+            version = response_cache.versions(['shoes'])
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(sum(archive_shoes()), len(shoes))
+            self.assertNotEqual(response_cache.versions(['shoes']), version)
+            return [q['sql'] for q in ctx.captured_queries]
+
+        one = archive(self.make_shoes(1))
+        three = archive(self.make_shoes(3))
+        self.assertEqual(len(three), len(one))
+        self.assertFalse([sql for sql in three if sql.startswith('UPDATE')])
+        self.assertFalse(Wishlist.objects.exists())
+        if fts_table_exists('default'):
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+                self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_seller_can_restore_or_delete_archived_listings(self):
+        sold, other = self.make_shoes(2)
+        Wishlist.objects.create(user=self.buyer, shoe=sold)
+        Shoe.objects.filter(pk__in=[sold.pk, other.pk]).update(is_sold=True)
+        for shoe in (sold, other):
+            self.age(shoe, 40)
+        list(archive_shoes())
+        self.assertEqual(ArchivedShoe.objects.get(pk=sold.pk).wishlisted_by, [self.buyer.pk])
+
+        self.client.force_authenticate(self.buyer)
+        self.assertTrue(self.client.get(f'/api/shoes/{sold.pk}/').data['is_liked'])
+        self.assertEqual(self.client.post(f'/api/shoes/{sold.pk}/restore/').status_code, 403)
+        self.assertEqual(self.client.delete(f'/api/shoes/{other.pk}/').status_code, 403)
+
+        self.client.force_authenticate(self.seller)
+        response = self.client.post(f'/api/shoes/{sold.pk}/restore/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['images']), 2)
+        self.assertEqual(Shoe.objects.get(pk=sold.pk).created_at, sold.created_at)
+        self.assertTrue(Wishlist.objects.filter(user=self.buyer, shoe=sold).exists())
+        self.assertFalse(ArchivedShoe.objects.filter(pk=sold.pk).exists())
+        self.assertEqual(self.client.patch(f'/api/shoes/{sold.pk}/', {'is_sold': False}).status_code, 200)
+
+        self.assertEqual(self.client.delete(f'/api/shoes/{other.pk}/').status_code, 204)
+        self.assertFalse(ArchivedShoe.objects.exists())
+        self.assertEqual(self.client.get(f'/api/shoes/{other.pk}/').status_code, 404)
+
+    def test_seller_profile_lists_archived_listings(self):
+        shoes = self.make_shoes(3)
+        Shoe.objects.filter(pk__in=[s.pk for s in shoes[:2]]).update(is_sold=True)
+        for shoe in shoes:
+            self.age(shoe, 40)
+        list(archive_shoes())
+
+        response = self.client.get(f'/api/profiles/{self.seller.username}/archived_shoes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['results'][0]['images']), 2)
+        self.assertEqual(self.client.get(f'/api/profiles/{self.buyer.username}/archived_shoes/').data['count'], 0)
+
+
+class FacetTests(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        make_shoe(self.seller, brand='Nike', size='42.0', price='40.00')
+        make_shoe(self.seller, brand='Nike', size='43.0', price='150.00', condition='Used')
+        make_shoe(self.seller, brand='Adidas', size='42.0', price='90.00')
+        make_shoe(self.seller, brand='Adidas', size='42.0', price='900.00', title='Samba')
+
+    def test_counts_per_facet_in_one_query(self):
+        queries, response = self.count_queries('/api/shoes/facets/')
+        self.assertEqual(queries, 1)
+        data = response.data
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(data['brand'], [{'value': 'Adidas', 'count': 2}, {'value': 'Nike', 'count': 2}])
+        self.assertEqual(data['size'], [{'value': '42.0', 'count': 3}, {'value': '43.0', 'count': 1}])
+        self.assertEqual(data['condition'], [{'value': 'New', 'count': 3}, {'value': 'Used', 'count': 1}])
+        self.assertEqual([b['count'] for b in data['price']], [1, 1, 1, 0, 1])
+        self.assertEqual(data['price'][-1], {'min': 500, 'max': None, 'count': 1})
+
+    def test_counts_follow_the_filters_and_search(self):
+        _, response = self.count_queries('/api/shoes/facets/?brand=nike&max_price=100')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['size'], [{'value': '42.0', 'count': 1}])
+        _, response = self.count_queries('/api/shoes/facets/?search=samba')
+        self.assertEqual(response.data['brand'], [{'value': 'Adidas', 'count': 1}])
+
+    @override_settings(RESPONSE_CACHE_ENDPOINTS=['shoes-facets'])
+    def test_cached_for_everyone_until_a_shoe_changes(self):
+        self.count_queries('/api/shoes/facets/')
+        queries, _ = self.count_queries('/api/shoes/facets/', self.buyer)
+        self.assertEqual(queries, 0)
+
+        make_shoe(self.seller, brand='Puma')
+        _, response = self.count_queries('/api/shoes/facets/')
+        self.assertEqual(response.data['count'], 5)
+
+
+class WishlistBatchTests(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shoes = self.make_shoes(4)
+        self.own = make_shoe(self.buyer, title='Mine')
+        self.client.force_authenticate(self.buyer)
+
+    def test_adds_and_removes_in_fixed_queries(self):
+        Wishlist.objects.create(user=self.buyer, shoe=self.shoes[3])
+        ids = [s.pk for s in self.shoes]
+        with CaptureQueriesContext(connection) as one:
+            self.client.post('/api/shoes/wishlist/', {'add': ids[:1], 'remove': [ids[3]]}, format='json')
+        Wishlist.objects.create(user=self.buyer, shoe=self.shoes[3])
+        Wishlist.objects.filter(user=self.buyer, shoe=self.shoes[0]).delete()
+
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.post('/api/shoes/wishlist/', {
+                'add': ids[:3] + [self.own.pk, 999999], 'remove': [ids[3]],
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data, {
+            'added': ids[:3], 'removed': [ids[3]], 'skipped': sorted([self.own.pk, 999999])})
+        self.assertEqual(set(Wishlist.objects.filter(user=self.buyer).values_list('shoe_id', flat=True)),
+                         set(ids[:3]))
+        self.assertEqual(len(many.captured_queries), len(one.captured_queries))
+
+    def test_rejects_conflicting_or_empty_requests(self):
+        pk = self.shoes[0].pk
+        self.assertEqual(self.client.post('/api/shoes/wishlist/', {'add': [pk], 'remove': [pk]},
+                                          format='json').status_code, 400)
+        self.assertEqual(self.client.post('/api/shoes/wishlist/', {}, format='json').status_code, 400)
+
+    def test_is_liked_comes_from_the_cached_set(self):
+        self.client.post('/api/shoes/wishlist/', {'add': [self.shoes[0].pk]}, format='json')
+        queries, response = self.count_queries('/api/shoes/', self.buyer)
+        liked = {row['id'] for row in response.data['results'] if row['is_liked']}
+        self.assertEqual(liked, {self.shoes[0].pk})
+
+        warm, _ = self.count_queries('/api/shoes/', self.buyer)
+        self.assertEqual(warm, queries - 1)  # the liked set came from the cache
+
+        self.client.post(f'/api/shoes/{self.shoes[1].pk}/toggle_wishlist/')
+        _, response = self.count_queries('/api/shoes/', self.buyer)
+        liked = {row['id'] for row in response.data['results'] if row['is_liked']}
+        self.assertEqual(liked, {self.shoes[0].pk, self.shoes[1].pk})
+
+
+class SparseFieldsetTests(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shoes = self.make_shoes(3)
+        Review.objects.create(seller=self.seller, reviewer=self.buyer, rating=4, comment='ok')
+
+    def test_list_renders_compact_cards_on_request(self):
+        default = self.client.get('/api/shoes/').data['results'][0]
+        for field in ('description', 'contact_info', 'seller_phone', 'seller_rating', 'images'):
+            self.assertIn(field, default)
+
+        compact_queries, compact = self.count_queries('/api/shoes/?view=compact')
+        row = compact.data['results'][0]
+        for field in ('id', 'title', 'brand', 'price', 'currency', 'image', 'renditions', 'seller_username'):
+            self.assertIn(field, row)
+        for field in ('description', 'contact_info', 'seller_phone', 'seller_rating', 'images'):
+            self.assertNotIn(field, row)
+
+        full_queries, full = self.count_queries('/api/shoes/?view=compact&expand=images,description')
+        self.assertEqual(len(full.data['results'][0]['images']), 2)
+        self.assertIn('description', full.data['results'][0])
+        self.assertNotIn('contact_info', full.data['results'][0])
+        self.assertEqual(compact_queries, full_queries - 1)  # no gallery prefetch
+
+        detail = self.client.get(f'/api/shoes/{self.shoes[0].pk}/').data
+        self.assertIn('images', detail)
+        view_counter.flush()
+
+    def test_fields_narrow_the_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/shoes/?fields=id,title,price')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'price'})
+        page_query = next(q['sql'] for q in ctx.captured_queries if 'LIMIT' in q['sql'])
+        self.assertNotIn('description', page_query)
+        self.assertNotIn('auth_user', page_query)
+
+        ordered = self.client.get('/api/shoes/?fields=id&ordering=-seller_rating')
+        self.assertEqual(ordered.status_code, 200)
+
+    def test_profiles_and_reviews(self):
+        profiles = self.client.get('/api/profiles/?ordering=-rating_avg').data['results']
+        self.assertIn('reviews_list', profiles[0])
+        compact = self.client.get('/api/profiles/?ordering=-rating_avg&view=compact').data['results']
+        self.assertNotIn('reviews_list', compact[0])
+        expanded = self.client.get('/api/profiles/?ordering=-rating_avg&view=compact&expand=reviews_list')
+        self.assertIn('reviews_list', expanded.data['results'][0])
+        profile = self.client.get(f'/api/profiles/{self.seller.username}/?fields=username,seller_rating').data
+        self.assertEqual(profile, {'username': 'seller', 'seller_rating': 4.0})
+
+        with CaptureQueriesContext(connection) as ctx:
+            reviews = self.client.get('/api/reviews/?fields=rating,reviewer_username').data
+        rows = reviews['results'] if isinstance(reviews, dict) else reviews
+        self.assertEqual(rows, [{'reviewer_username': 'buyer', 'rating': 4}])
+        self.assertEqual(len(ctx.captured_queries), 2)  # count + page, reviewer joined
+
+
+class ValuesSerializationTests(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shoes = self.make_shoes(3)
+        self.shoes[0].renditions = {'card': 'shoe_images/renditions/air-max-card.webp'}
+        self.shoes[0].save()
+        make_shoe(self.seller, title='No photo', image='', is_sold=True)
+        make_shoe(User.objects.create_user(username='no-profile'), title='Bare seller \u2028 ünïcode')
+        Wishlist.objects.create(user=self.buyer, shoe=self.shoes[1])
+        Review.objects.create(seller=self.seller, reviewer=self.buyer, rating=5, comment='great')
+
+    def assertSameAsInstances(self, url, user=None):
+        self.client.force_authenticate(user)
+        with mock.patch.object(ValuesSerializerMixin, 'rows_data', autospec=True,
+                               side_effect=ValuesSerializerMixin.rows_data) as rows_data:
+            fast = self.client.get(url)
+        self.assertTrue(rows_data.called, url)
+        with override_settings(VALUES_LIST_SERIALIZATION=False):
+            slow = self.client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content, url)
+        return fast
+
+    def test_list_pages_match_instance_serialization(self):
+        for url in [
+            '/api/shoes/?view=compact',
+            '/api/shoes/?view=compact&expand=seller_phone,seller_rating,description,contact_info&ordering=price',
+            '/api/shoes/?fields=id,seller,image,created_at,is_sold&pagination=cursor&ordering=-seller_rating',
+            '/api/profiles/?ordering=-rating_avg&view=compact',
+            '/api/reviews/',
+        ]:
+            self.assertSameAsInstances(url)
+        liked = self.assertSameAsInstances('/api/shoes/?view=compact', self.buyer)
+        self.assertEqual([row['id'] for row in liked.data['results'] if row['is_liked']], [self.shoes[1].pk])
+        self.assertSameAsInstances('/api/shoes/favorites/?view=compact', self.buyer)
+
+    def test_nested_fields_fall_back_to_instances(self):
+        response = self.client.get('/api/shoes/')
+        self.assertEqual(len(response.data['results'][-1]['images']), 2)
+        reviews = self.client.get(f'/api/profiles/{self.seller.username}/').data['reviews_list']
+        self.assertEqual([(r['reviewer_username'], r['rating']) for r in reviews], [('buyer', 5)])
+
+    def test_renderer_writes_the_same_bytes_as_json_renderer(self):
+        from decimal import Decimal
+        from django.utils.translation import gettext_lazy
+        data = {
+            'when': timezone.now().replace(microsecond=123456),
+            'price': Decimal('12.50'),
+            'lazy': gettext_lazy('Not found.'),
+            'text': 'line\u2028separator \u2029 ünïcode "quoted"',
+            1: [1.5, None, True, {'nested': ()}],
+        }
+        too_big = {'id': 2 ** 70}  # over 64 bits: rendered by JSONRenderer itself
+        tiny = {'rows': [{'x': 1e-05}], 0.00002: ('key',), 'decimal': Decimal('0.000001'), 'big': 1e16}
+        for value, media_type in ((data, 'application/json'), (data, 'application/json; indent=2'),
+                                  (too_big, 'application/json'), (tiny, 'application/json')):
+            self.assertEqual(FastJSONRenderer().render(value, media_type),
+                             JSONRenderer().render(value, media_type))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        for value in (float('nan'), [None, float('inf')], {'x': Decimal('NaN')}, {float('-inf'): 1}):
+            with self.assertRaises(ValueError):
+                JSONRenderer().render(value)
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render(value)
+
+
+
+class ThrottleTests(MarketTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shoes = self.make_shoes(2)
+        rates = override_settings(THROTTLE_RATES={'user': '100/min', 'wishlist': '3/min'},
+                                  THROTTLE_STORE='config.throttling.LocalThrottleStore')
+        rates.enable()
+        self.addCleanup(rates.disable)
+        throttle_store().clear()
+        self.now = mock.Mock(return_value=120.0)  # the start of a minute
+        timer = mock.patch.object(SlidingWindowThrottle, 'timer', self.now)
+        timer.start()
+        self.addCleanup(timer.stop)
+
+    def toggle(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post(f'/api/shoes/{self.shoes[0].pk}/toggle_wishlist/')
+
+    def test_sliding_window_with_retry_after(self):
+        for _ in range(3):
+            self.assertIn(self.toggle(self.buyer).status_code, (200, 201))
+        response = self.toggle(self.buyer)
+        self.assertEqual(response.status_code, 429)
+        # 3 in the last minute: room for one more once a third of them has slid out
+        self.assertEqual(response['Retry-After'], '80')
+        self.assertEqual(self.toggle(make_user('other')).status_code, 201)  # per user
+
+        self.now.return_value = 180.0  # a fixed window would start over here
+        self.assertEqual(self.toggle(self.buyer).status_code, 429)
+        self.now.return_value = 200.0
+        self.assertIn(self.toggle(self.buyer).status_code, (200, 201))
+
+    def test_refused_requests_do_not_count(self):
+        for _ in range(6):
+            self.toggle(self.buyer)
+        self.now.return_value = 200.0
+        self.assertIn(self.toggle(self.buyer).status_code, (200, 201))
+
+    @override_settings(THROTTLE_STORE='config.throttling.CacheThrottleStore')
+    def test_shared_store_costs_one_cache_op_per_check(self):
+        throttle_store().clear()
+        spy = mock.Mock(wraps=cache)
+        with mock.patch.object(CacheThrottleStore, 'cache', new_callable=mock.PropertyMock, return_value=spy):
+            for _ in range(5):
+                self.count_queries('/api/shoes/', self.buyer)
+        # The first check creates the counter and reads the previous minute's
+        self.assertEqual([call[0] for call in spy.method_calls], ['incr', 'add', 'get'] + ['incr'] * 4)
@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework.urlpatterns import format_suffix_patterns
-from .views import ShoeViewSet, sitemap_view
+from .views import (
+    ShoeViewSet, sitemap_view, sitemap_page_view, async_sitemap_view, async_sitemap_page_view,
+)
 
 
 class NoFormatSuffixRouter(DefaultRouter):
@@ -16,5 +19,11 @@ router.register(r'shoes', ShoeViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
-    path('sitemap.xml', sitemap_view, name='sitemap'),
+    # ASGI deployments serve the sitemap from async views (config/async_views.py)
+    path('sitemap.xml', async_sitemap_view if settings.ASYNC_READ_VIEWS else sitemap_view, name='sitemap'),
+    path(
+        'sitemap-<int:page>.xml',
+        async_sitemap_page_view if settings.ASYNC_READ_VIEWS else sitemap_page_view,
+        name='sitemap-page',
+    ),
 ]
@@ -0,0 +1,209 @@
+"""
+Buffered, deduplicated view counting for ShoeViewSet.retrieve.
+
+Detail hits only bump an in-memory (or shared cache) counter. Every
+VIEW_COUNT_FLUSH_SECONDS the pending counts are written with one
+`UPDATE ... SET views = views + n` per distinct n, so no increment is lost
+to concurrent read-modify-write and hot listings don't serialize on their
+row lock. A per-viewer window (VIEW_COUNT_DEDUPE_SECONDS) stops refreshes
+from inflating the count.
+
+Stores are pluggable through VIEW_COUNT_STORE (a dotted path):
+    market.view_counter.LocalViewCountStore   per-process memory (default)
+    market.view_counter.CacheViewCountStore   shared Django cache (e.g. Redis)
+"""
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+from .models import Shoe
+
+logger = logging.getLogger(__name__)
+
+
+class LocalViewCountStore:
+    """Pending increments in this process. Lost only if the process is killed before a flush."""
+
+    def __init__(self):
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, shoe_id, amount=1):
+        with self._lock:
+            self._pending[shoe_id] += amount
+
+    def pending(self, shoe_id):
+        return self._pending.get(shoe_id, 0)
+
+    def claim(self, shoe_ids=None):
+        """Takes pending counts out of the store: {shoe_id: n}."""
+        with self._lock:
+            if shoe_ids is None:
+                claimed, self._pending = dict(self._pending), defaultdict(int)
+                return claimed
+            return {i: self._pending.pop(i) for i in shoe_ids if i in self._pending}
+
+    def restore(self, counts):
+        """Puts claimed counts back (the flush that claimed them failed)."""
+        for shoe_id, amount in counts.items():
+            self.add(shoe_id, amount)
+
+
+class CacheViewCountStore:
+    """
+    Pending increments in a shared Django cache, so counts survive a worker
+    restart and any process can flush them. Needs a backend with atomic
+    incr/decr (Redis, Memcached, LocMem).
+
+    Each process flushes the ids it recorded; `manage.py flush_view_counts`
+    sweeps every shoe id, which also picks up counts left by dead workers.
+    """
+    prefix = 'views:pending'
+
+    def __init__(self):
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[settings.VIEW_COUNT_CACHE_ALIAS]
+
+    def _key(self, shoe_id):
+        return f'{self.prefix}:{shoe_id}'
+
+    def add(self, shoe_id, amount=1):
+        key = self._key(shoe_id)
+        try:
+            self.cache.incr(key, amount)
+        except ValueError:
+            if not self.cache.add(key, amount, timeout=None):
+                self.cache.incr(key, amount)
+        with self._lock:
+            self._dirty.add(shoe_id)
+
+    def pending(self, shoe_id):
+        return self.cache.get(self._key(shoe_id), 0)
+
+    def claim(self, shoe_ids=None):
+        with self._lock:
+            if shoe_ids is None:
+                shoe_ids, self._dirty = self._dirty, set()
+            else:
+                self._dirty.difference_update(shoe_ids)
+
+        keys = {self._key(i): i for i in shoe_ids}
+        claimed = {}
+        for key, amount in self.cache.get_many(list(keys)).items():
+            if not amount:
+                continue
+            # decr is atomic: if another flusher claimed part of it first, the
+            # counter goes negative and we hand that part back.
+            try:
+                remaining = self.cache.decr(key, amount)
+            except ValueError:
+                continue  # evicted between get_many and decr
+            if remaining < 0:
+                self.cache.incr(key, -remaining)
+                amount += remaining
+            if amount > 0:
+                claimed[keys[key]] = amount
+        return claimed
+
+    def restore(self, counts):
+        for shoe_id, amount in counts.items():
+            self.add(shoe_id, amount)
+
+
+class ViewCounter:
+    def __init__(self):
+        self._stores = {}
+        self._last_flush = time.monotonic()
+        self._flush_lock = threading.Lock()
+
+    @property
+    def store(self):
+        path = settings.VIEW_COUNT_STORE
+        store = self._stores.get(path)
+        if store is None:
+            store = self._stores.setdefault(path, import_string(path)())
+        return store
+
+    def record(self, shoe_id, viewer):
+        """
+        Counts one view of shoe_id by viewer (see viewer_key). Returns False
+        if the viewer was already counted within the dedupe window.
+        """
+        window = settings.VIEW_COUNT_DEDUPE_SECONDS
+        if window and viewer:
+            seen_key = f'views:seen:{shoe_id}:{viewer}'
+            if not caches[settings.VIEW_COUNT_CACHE_ALIAS].add(seen_key, 1, timeout=window):
+                return False
+
+        self.store.add(shoe_id)
+        if time.monotonic() - self._last_flush >= settings.VIEW_COUNT_FLUSH_SECONDS:
+            self.flush(blocking=False)
+        return True
+
+    def pending(self, shoe_id):
+        return self.store.pending(shoe_id)
+
+    def flush(self, shoe_ids=None, blocking=True):
+        """Writes pending counts to the database. Returns the number of shoes updated."""
+        if not self._flush_lock.acquire(blocking=blocking):
+            return 0  # another thread is already flushing
+        try:
+            self._last_flush = time.monotonic()
+            counts = self.store.claim(shoe_ids)
+            if not counts:
+                return 0
+
+            # One UPDATE per distinct increment instead of one per shoe
+            by_amount = defaultdict(list)
+            for shoe_id, amount in counts.items():
+                by_amount[amount].append(shoe_id)
+
+            try:
+                with transaction.atomic():
+                    for amount, ids in by_amount.items():
+                        Shoe.objects.filter(pk__in=ids).update(views=F('views') + amount)
+            except Exception:
+                self.store.restore(counts)
+                raise
+            return len(counts)
+        finally:
+            self._flush_lock.release()
+
+
+def viewer_key(request):
+    """
+    Identifies a viewer for deduplication: the user id, else a hash of IP +
+    user agent. The IP is the one the throttles use (DRF's get_ident with
+    NUM_PROXIES), not whatever X-Forwarded-For the client sends.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'u{user.pk}'
+    ip = BaseThrottle().get_ident(request) or ''
+    agent = request.META.get('HTTP_USER_AGENT', '')
+    return 'a' + hashlib.sha1(f'{ip}|{agent}'.encode()).hexdigest()[:16]
+
+
+view_counter = ViewCounter()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        view_counter.flush()
+    except Exception:
+        logger.exception('Could not flush pending view counts on exit')
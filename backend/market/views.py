@@ -1,56 +1,227 @@
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.response import Response
 # 1. Added 'action' import
-from rest_framework.decorators import api_view, action
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 import django_filters
-from django.http import HttpResponse
+import hashlib
+from xml.sax.saxutils import escape
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, Max, OuterRef
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.utils.text import slugify
+from django.views.decorators.http import require_safe
 # 2. Added 'Wishlist' import
-from .models import Shoe, ShoeImage, Wishlist
-from .serializers import ShoeSerializer
+from .archive import delete_archived, restore_shoe
+from .models import ArchivedShoe, Shoe, Wishlist
+from .serializers import ArchivedShoeSerializer, ShoeListSerializer, ShoeSerializer, WishlistBatchSerializer
 from .permissions import IsSellerOrReadOnly
+from .view_counter import view_counter, viewer_key
+from .search import ShoeSearchFilter
+from .facets import facet_counts
+from .wishlist import liked_shoes
+from config.async_views import AsyncReadMixin
+from config.conditional import ConditionalGetMixin
+from config.fieldsets import SparseFieldsetMixin, narrow_queryset
+from config.response_cache import CachedResponseMixin, response_cache
+from config.values_serialization import ValuesListMixin
 
 # --- Custom Filter Class ---
 class ShoeFilter(django_filters.FilterSet):
     min_price = django_filters.NumberFilter(field_name="price", lookup_expr='gte')
     max_price = django_filters.NumberFilter(field_name="price", lookup_expr='lte')
     brand = django_filters.CharFilter(lookup_expr='icontains')
+    min_seller_rating = django_filters.NumberFilter(field_name="seller__profile__rating_avg", lookup_expr='gte')
 
     class Meta:
         model = Shoe
-        fields = ['brand', 'size', 'condition', 'seller__username', 'min_price', 'max_price']
+        fields = ['brand', 'size', 'condition', 'seller__username', 'min_price', 'max_price', 'min_seller_rating']
 
 
-class ShoeViewSet(viewsets.ModelViewSet):
+class ShoeViewSet(AsyncReadMixin, SparseFieldsetMixin, ConditionalGetMixin, CachedResponseMixin, ValuesListMixin,
+                  viewsets.ModelViewSet):
     queryset = Shoe.objects.all().order_by('-created_at')
     serializer_class = ShoeSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsSellerOrReadOnly]
 
+    # Served by async views under ASGI (see config/async_views.py)
+    async_read_actions = ('list', 'retrieve', 'favorites', 'facets')
+
+    # Anonymous list/detail responses are cached (see config/response_cache.py);
+    # facet counts are the same for everyone, so they are cached for all users.
+    cached_actions = {
+        'list': ('shoes-list', ('shoes', 'profiles')),
+        'retrieve': ('shoes-detail', ('shoes', 'profiles')),
+        'facets': ('shoes-facets', ('shoes', 'profiles')),
+    }
+    shared_cached_actions = ('facets',)
+
+    # Per-user limits on writes (THROTTLE_RATES, config/throttling.py)
+    throttle_scopes = {
+        'create': 'listings',
+        'update': 'listings',
+        'partial_update': 'listings',
+        'destroy': 'listings',
+        'restore': 'listings',
+        'toggle_wishlist': 'wishlist',
+        'wishlist_batch': 'wishlist',
+    }
+
     # Filters & Search
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # ShoeSearchFilter: ranked full-text search, LIKE fallback on search_fields
+    filter_backends = [DjangoFilterBackend, ShoeSearchFilter, filters.OrderingFilter]
     filterset_class = ShoeFilter
     search_fields = ['title', 'description', 'brand']
 
-    # 3. Added 'views' to ordering options
-    ordering_fields = ['price', 'created_at', 'views']
+    # 3. Added 'views' to ordering options ('seller_rating' is annotated in get_queryset)
+    ordering_fields = ['price', 'created_at', 'views', 'seller_rating']
+
+    # ?fields= / ?view=compact / ?expand= (config/fieldsets.py); compact cards
+    # render from values() rows (config/values_serialization.py)
+    sparse_actions = ('list', 'favorites')
+    values_actions = ('list', 'favorites')
+
+    def get_serializer_class(self):
+        if self.action in self.sparse_actions:
+            return ShoeListSerializer
+        return ShoeSerializer
+
+    def get_queryset(self):
+        # Avoid N+1: seller, profile, gallery and rating in fixed queries
+        queryset = super().get_queryset()
+        serializer = self.sparse_serializer()
+        if serializer is None:
+            return ShoeSerializer.setup_eager_loading(queryset)
+
+        # Lists: only the columns, joins and prefetches the rendered fields need
+        fields = set(serializer.fields)
+        if 'seller_rating' in self.request.query_params.get('ordering', ''):
+            fields.add('seller_rating')
+        return ShoeSerializer.setup_eager_loading(narrow_queryset(queryset, serializer), fields)
+
+    # --- CONDITIONAL GET (ETag / Last-Modified, see config/conditional.py) ---
+    def get_validators(self, request):
+        """
+        Decides whether the client's copy is current: one query for a
+        detail; for a list, cache reads while the response cache is on and
+        an aggregate otherwise. View counts are left out on purpose: they
+        change on every hit.
+        """
+        user = request.user
+        if self.action == 'retrieve':
+            fields = ['pk', 'seller_id', 'updated_at', 'seller__profile__updated_at']
+            shoes = Shoe.objects.filter(pk=self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+            if user.is_authenticated:
+                shoes = shoes.annotate(liked=Exists(Wishlist.objects.filter(user=user, shoe=OuterRef('pk'))))
+                fields.append('liked')
+            try:
+                row = shoes.values_list(*fields).first()
+            except (TypeError, ValueError):
+                return None  # malformed pk: let retrieve() answer 404
+            if row is None:
+                return None
+            self.validated_pk, self.validated_seller_id = row[0], row[1]
+            return (user.pk, *row), max(filter(None, row[2:4]))
+
+        if self.action == 'list':
+            if response_cache.is_enabled('shoes-list'):
+                # The response cache's namespace versions move with every write a
+                # list page shows (config/response_cache.py): one cache read and no
+                # query, so a cached page is answered without touching the database.
+                # The cache is shared by all workers whenever it is on (settings).
+                parts = [user.pk, *response_cache.versions(self.cached_actions['list'][1])]
+                if user.is_authenticated:
+                    parts.append(liked_shoes.version(user.pk))  # moves with every like / unlike
+                return parts, None
+
+            # Otherwise the versions may be this worker's alone: ask the database.
+            if self.paginator.wants_cursor(request):
+                return None  # keyset pages exist to avoid COUNT(*); they aren't re-polled anyway
+            stats = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+                count=Count('pk'), shoes=Max('updated_at'), sellers=Max('seller__profile__updated_at'))
+            parts = [user.pk, stats['count'], stats['shoes'], stats['sellers']]
+            if user.is_authenticated:
+                likes = Wishlist.objects.filter(user=user).aggregate(count=Count('pk'), last=Max('created_at'))
+                parts += [likes['count'], likes['last']]
+            return parts, max(filter(None, [stats['shoes'], stats['sellers']]), default=None)
+        return None
 
     # --- VIEW COUNT LOGIC ---
     # --- VIEW COUNT LOGIC (FIXED) ---
     def retrieve(self, request, *args, **kwargs):
         """
         Increments view count ONLY if the viewer is not the seller.
+        Views are buffered and written in batches (see market/view_counter.py).
         """
-        instance = self.get_object()
+        return self.conditional_response(
+            request,
+            lambda: self.cached_response(request, self.retrieve_fresh, on_hit=self.retrieve_cached),
+            on_not_modified=self.retrieve_not_modified,
+        )
+
+    def retrieve_fresh(self):
+        request = self.request
+        try:
+            instance = self.get_object()
+        except Http404:
+            return self.retrieve_archived()
         
         # FIX: Check if the current user is NOT the seller
         if instance.seller != request.user:
-            instance.views += 1
-            instance.save()
-            
+            view_counter.record(instance.pk, viewer_key(request))
+
+        # Show the count including views not flushed to the database yet
+        instance.views += view_counter.pending(instance.pk)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    def get_archived(self):
+        # Sold / stale listings live in ArchivedShoe under the same id (market/archive.py)
+        archived = get_object_or_404(
+            ArchivedShoe.objects.select_related('seller__profile'),
+            pk=self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        self.check_object_permissions(self.request, archived)
+        return archived
+
+    def retrieve_archived(self):
+        archived = self.get_archived()
+        return Response(ArchivedShoeSerializer(archived, context=self.get_serializer_context()).data)
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except Http404:
+            delete_archived(self.get_archived())  # the seller can drop archived listings too
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+    # --- ARCHIVE: RESTORE A SOLD / STALE LISTING (market/archive.py) ---
+    @action(detail=True, methods=['post'])
+    def restore(self, request, pk=None):
+        """POST /api/shoes/<id>/restore/: the seller moves an archived listing back to the live table."""
+        shoe = restore_shoe(self.get_archived())
+        return Response(ShoeSerializer(shoe, context=self.get_serializer_context()).data)
+
+    def retrieve_not_modified(self):
+        # A 304 is still a view
+        if self.validated_seller_id != self.request.user.pk:
+            view_counter.record(self.validated_pk, viewer_key(self.request))
+
+    def retrieve_cached(self, data):
+        # Cached detail hits are anonymous (never the seller): still count the
+        # view, and refresh the count with one primary-key lookup.
+        if 'archived_at' in data:
+            return data  # archived listings don't change or count views
+        views = Shoe.objects.filter(pk=data['id']).values_list('views', flat=True).first()
+        if views is None:
+            return None
+        view_counter.record(data['id'], viewer_key(self.request))
+        return {**data, 'views': views + view_counter.pending(data['id'])}
+
     # --- WISHLIST: TOGGLE LIKE (FIXED) ---
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def toggle_wishlist(self, request, pk=None):
@@ -73,6 +244,32 @@ class ShoeViewSet(viewsets.ModelViewSet):
         else:
             return Response({'status': 'added', 'is_liked': True}, status=status.HTTP_201_CREATED)
 
+    # --- WISHLIST: BATCH ADD / REMOVE ---
+    @action(detail=False, methods=['post'], url_path='wishlist', permission_classes=[permissions.IsAuthenticated])
+    def wishlist_batch(self, request):
+        """
+        POST /api/shoes/wishlist/ {"add": [ids], "remove": [ids]}
+        One transaction and a fixed number of queries for up to 100 ids each.
+        Unknown shoes and the user's own listings are skipped.
+        """
+        serializer = WishlistBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        add, remove = set(serializer.validated_data['add']), set(serializer.validated_data['remove'])
+        user = request.user
+
+        with transaction.atomic():
+            addable = set(Shoe.objects.filter(pk__in=add).exclude(seller=user).values_list('pk', flat=True))
+            existing = set(Wishlist.objects.filter(user=user, shoe_id__in=addable).values_list('shoe_id', flat=True))
+            added = addable - existing
+            Wishlist.objects.bulk_create([Wishlist(user=user, shoe_id=pk) for pk in added], ignore_conflicts=True)
+
+            removed_rows = Wishlist.objects.filter(user=user, shoe_id__in=remove)
+            removed = set(removed_rows.values_list('shoe_id', flat=True))
+            removed_rows.delete()
+        liked_shoes.invalidate(user.pk)  # bulk_create sends no post_save
+
+        return Response({'added': sorted(added), 'removed': sorted(removed), 'skipped': sorted(add - addable)})
+
     # --- WISHLIST: GET FAVORITES ---
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def favorites(self, request):
@@ -81,56 +278,178 @@ class ShoeViewSet(viewsets.ModelViewSet):
         Returns shoes liked by the current user.
         """
         user = request.user
-        favorites = Shoe.objects.filter(wishlisted_by__user=user).order_by('-created_at')
-        
-        page = self.paginate_queryset(favorites)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(favorites, many=True)
-        return Response(serializer.data)
-
-    # --- CREATE LOGIC ---
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        shoe = serializer.save(seller=self.request.user)
+        favorites = self.get_queryset().filter(wishlisted_by__user=user)
+        return self.list_response(favorites)
 
-        # FIXED: Changed 'gallery_images' to 'uploaded_images' to match React 'Sell.js'
-        images = request.FILES.getlist('uploaded_images')
-        for img in images:
-            ShoeImage.objects.create(shoe=shoe, image=img)
+    # --- FACETS: counts per brand / size / condition / price bucket ---
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        GET /api/shoes/facets/?<same filters as the list>
+        One GROUP BY over the filtered shoes (see market/facets.py).
+        """
+        def build():
+            queryset = Shoe.objects.all()
+            for backend in (DjangoFilterBackend, ShoeSearchFilter):
+                queryset = backend().filter_queryset(request, queryset, self)
+            return Response(facet_counts(queryset))
 
-        headers = self.get_success_headers(serializer.data)
-        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        return self.cached_response(request, build)
 
+    # --- CREATE LOGIC ---
+    # ShoeSerializer.create() saves the shoe and its 'uploaded_images' gallery
+    # (see market/services.py), so there is no image loop here.
     def perform_create(self, serializer):
         serializer.save(seller=self.request.user)
 
 
 # --- SEO Sitemap ---
-@api_view(['GET'])
+# /sitemap.xml is a sitemap index; shoes are listed in /sitemap-<n>.xml files of
+# at most SITEMAP_PAGE_SIZE URLs, page n holding ids ((n-1)*size, n*size].
+# Files are streamed from an id-range scan and carry Last-Modified / ETag, so
+# crawlers can revalidate with a cheap aggregate instead of a full download.
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def sitemap_base_url(request):
+    return escape(f"{request.scheme}://{request.get_host()}")
+
+
+def conditional_sitemap_response(request, stream, etag, last_modified):
+    """304 if the crawler's copy is current, else the streamed XML with validators."""
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+    if not_modified is not None:
+        return not_modified
+
+    response = StreamingHttpResponse(stream, content_type='application/xml')
+    response['ETag'] = etag
+    if last_modified_ts is not None:
+        response['Last-Modified'] = http_date(last_modified_ts)
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+
+def sitemap_pages():
+    size = settings.SITEMAP_PAGE_SIZE
+    return (
+        Shoe.objects.order_by()
+        .annotate(page=(F('id') - 1) / size + 1)
+        .values('page')
+        .annotate(lastmod=Max('updated_at'), urls=Count('id'))
+        .order_by('page')
+    )
+
+
+def sitemap_index_response(request, pages):
+    if not pages:
+        pages = [{'page': 1, 'lastmod': None, 'urls': 0}]  # page 1 still lists the home page
+
+    base_url = sitemap_base_url(request)
+    latest = max((p['lastmod'] for p in pages if p['lastmod']), default=None)
+    fingerprint = ';'.join(f"{p['page']}:{p['urls']}:{p['lastmod']}" for p in pages)
+    etag = quote_etag(hashlib.md5(f'{base_url}|{fingerprint}'.encode()).hexdigest())
+
+    # Resolved now, from the URLconf, rather than while the response streams
+    locs = [base_url + escape(reverse('sitemap-page', kwargs={'page': p['page']})) for p in pages]
+
+    def stream():
+        yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n'
+        for p, loc in zip(pages, locs):
+            lastmod = f"<lastmod>{p['lastmod'].strftime('%Y-%m-%d')}</lastmod>" if p['lastmod'] else ''
+            yield f"  <sitemap><loc>{loc}</loc>{lastmod}</sitemap>\n"
+        yield '</sitemapindex>\n'
+
+    return conditional_sitemap_response(request, stream(), etag, latest)
+
+
+@require_safe
 def sitemap_view(request):
-    """Generate XML sitemap for all shoe listings"""
-    shoes = Shoe.objects.all().order_by('-created_at')
-    base_url = f"{request.scheme}://{request.get_host()}"
-
-    xml_lines = [
-        '<?xml version="1.0" encoding="UTF-8"?>',
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
-        f'  <url><loc>{base_url}/</loc><priority>1.0</priority><changefreq>daily</changefreq></url>',
-    ]
-
-    for shoe in shoes:
-        xml_lines.append(
-            f'  <url>'
-            f'<loc>{base_url}/shoes/{shoe.id}</loc>'
-            f'<lastmod>{shoe.created_at.strftime("%Y-%m-%d")}</lastmod>'
-            f'<priority>0.8</priority>'
-            f'<changefreq>weekly</changefreq>'
-            f'</url>'
-        )
+    """Sitemap index: one entry per non-empty sitemap-<n>.xml file (one GROUP BY query)"""
+    return sitemap_index_response(request, list(sitemap_pages()))
+
+
+def sitemap_page_shoes(page):
+    size = settings.SITEMAP_PAGE_SIZE
+    return Shoe.objects.filter(id__gt=(page - 1) * size, id__lte=page * size)
+
+
+def sitemap_page_etag(request, page, stats):
+    if page < 1 or (page > 1 and not stats['urls']):
+        raise Http404('No such sitemap page')
+    return quote_etag(hashlib.md5(
+        f"{sitemap_base_url(request)}|{page}|{stats['urls']}|{stats['lastmod']}".encode()).hexdigest())
+
+
+def sitemap_page_head(base_url, page):
+    head = f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+    if page == 1:
+        head += f'  <url><loc>{base_url}/</loc><priority>1.0</priority><changefreq>daily</changefreq></url>\n'
+    return head
+
+
+def sitemap_url(base_url, shoe_id, updated_at):
+    return (
+        f'  <url>'
+        f'<loc>{base_url}/shoes/{shoe_id}</loc>'
+        f'<lastmod>{updated_at.strftime("%Y-%m-%d")}</lastmod>'
+        f'<priority>0.8</priority>'
+        f'<changefreq>weekly</changefreq>'
+        f'</url>\n'
+    )
+
+
+@require_safe
+def sitemap_page_view(request, page):
+    """One sitemap file: the shoes whose id falls in this page's range, streamed"""
+    shoes = sitemap_page_shoes(page)
+    stats = shoes.aggregate(lastmod=Max('updated_at'), urls=Count('id'))
+    etag = sitemap_page_etag(request, page, stats)
+    base_url = sitemap_base_url(request)
+
+    def stream():
+        yield sitemap_page_head(base_url, page)
+        rows = shoes.order_by('id').values_list('id', 'updated_at').iterator(chunk_size=2000)
+        chunk = []
+        for shoe_id, updated_at in rows:
+            chunk.append(sitemap_url(base_url, shoe_id, updated_at))
+            if len(chunk) == 1000:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+        yield '</urlset>\n'
+
+    return conditional_sitemap_response(request, stream(), etag, stats['lastmod'])
+
+
+# Async versions, routed instead under ASGI (ASYNC_READ_VIEWS): the queries
+# are awaited and a large sitemap file streams without holding a thread.
+@require_safe
+async def async_sitemap_view(request):
+    return sitemap_index_response(request, [p async for p in sitemap_pages()])
+
+
+@require_safe
+async def async_sitemap_page_view(request, page):
+    shoes = sitemap_page_shoes(page)
+    stats = await shoes.aaggregate(lastmod=Max('updated_at'), urls=Count('id'))
+    etag = sitemap_page_etag(request, page, stats)
+    base_url = sitemap_base_url(request)
+
+    async def stream():
+        yield sitemap_page_head(base_url, page)
+        # values(), not values_list(): the latter's iterable runs its query
+        # as soon as it is created, i.e. on the event loop, under aiterator()
+        rows = shoes.order_by('id').values('id', 'updated_at').aiterator(chunk_size=2000)
+        chunk = []
+        async for row in rows:
+            chunk.append(sitemap_url(base_url, row['id'], row['updated_at']))
+            if len(chunk) == 1000:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+        yield '</urlset>\n'
 
-    xml_lines.append('</urlset>')
-    return HttpResponse('\n'.join(xml_lines), content_type='application/xml')
\ No newline at end of file
+    return conditional_sitemap_response(request, stream(), etag, stats['lastmod'])
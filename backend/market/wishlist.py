@@ -0,0 +1,93 @@
+"""
+Per-user liked-shoe sets, for ShoeSerializer.is_liked.
+
+is_liked used to be an EXISTS subquery evaluated for every shoe on the
+page. Now the signed-in user's liked shoe ids are loaded once per request
+(liked_shoe_ids) as a frozenset, from the cache when possible, and the
+serializer answers from it with no query per row.
+
+Sets are cached under a per-user version:
+
+    liked-shoes:version:<user_id>      -> version (no expiry)
+    liked-shoes:<user_id>:<version>    -> frozenset of shoe ids
+
+Any Wishlist save or delete bumps the user's version (market.signals; the
+batch endpoint bumps it after its bulk insert), which orphans the old set;
+orphans expire after LIKED_SHOES_CACHE_TIMEOUT. The version also goes into the list ETag
+(ShoeViewSet.get_validators), so likes revalidate without a query.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from config import metrics
+from .models import Wishlist
+
+cache_requests = metrics.counter(
+    'liked_shoes_cache_requests_total',
+    'Per-user liked-shoe set lookups served from (hit) or loaded into (miss) the cache.',
+    labelnames=('result',),
+)
+
+PREFIX = 'liked-shoes'
+
+
+class LikedShoes:
+    @property
+    def cache(self):
+        return caches[settings.LIKED_SHOES_CACHE_ALIAS]
+
+    @staticmethod
+    def new_version():
+        # Time based, so an evicted version never comes back as an old number
+        return int(time.time() * 1000)
+
+    def version(self, user_id):
+        key = f'{PREFIX}:version:{user_id}'
+        version = self.cache.get(key)
+        if version is None:
+            # add() so two workers initializing at once agree on one value
+            self.cache.add(key, self.new_version(), timeout=None)
+            version = self.cache.get(key, 0)
+        return version
+
+    def ids(self, user_id):
+        """The shoe ids `user_id` has liked (frozenset)."""
+        key = f'{PREFIX}:{user_id}:{self.version(user_id)}'
+        ids = self.cache.get(key)
+        cache_requests.inc(result='miss' if ids is None else 'hit')
+        if ids is None:
+            ids = frozenset(Wishlist.objects.filter(user_id=user_id).values_list('shoe_id', flat=True))
+            self.cache.set(key, ids, timeout=settings.LIKED_SHOES_CACHE_TIMEOUT)
+        return ids
+
+    def invalidate(self, user_id):
+        """
+        Drops the user's cached set. Bumps again once the surrounding
+        transaction commits, so a request that read the old rows in between
+        can't leave them cached.
+        """
+        self._bump(user_id)
+        transaction.on_commit(lambda: self._bump(user_id))
+
+    def _bump(self, user_id):
+        key = f'{PREFIX}:version:{user_id}'
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, self.new_version(), timeout=None)
+
+
+liked_shoes = LikedShoes()
+
+
+def liked_shoe_ids(request):
+    """The requesting user's liked shoe ids, loaded once per request (empty when signed out)."""
+    if request is None or not request.user.is_authenticated:
+        return frozenset()
+    ids = getattr(request, '_liked_shoe_ids', None)
+    if ids is None:
+        ids = request._liked_shoe_ids = liked_shoes.ids(request.user.pk)
+    return ids
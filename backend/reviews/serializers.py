@@ -1,14 +1,19 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Review
+from config.fieldsets import SparseFieldsSerializerMixin
+from config.instrumentation import TimedListSerializer, TimedSerializerMixin
+from config.values_serialization import ValuesSerializerMixin
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsSerializerMixin, ValuesSerializerMixin, TimedSerializerMixin,
+                       serializers.ModelSerializer):
     reviewer_username = serializers.ReadOnlyField(source='reviewer.username')
     # write_only means we receive it, but don't send it back
     seller_username = serializers.CharField(write_only=True) 
 
     class Meta:
         model = Review
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'seller', 'reviewer', 'reviewer_username', 'seller_username', 
                   'rating', 'comment', 'created_at']
         read_only_fields = ['reviewer', 'seller']
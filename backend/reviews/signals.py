@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.response_cache import response_cache
+from users.models import Profile
+from .models import Review
+
+
+# Keep the seller's denormalized rating (Profile.rating_avg / rating_count)
+# in step with their reviews. ReviewViewSet wraps writes in a transaction,
+# so the review and the rating commit (or roll back) together.
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def update_seller_rating(sender, instance, **kwargs):
+    Profile.refresh_ratings([instance.seller_id])
+    # refresh_ratings() is a queryset update (no Profile signals), so the
+    # cached profiles and shoe listings showing the rating are dropped here.
+    response_cache.bump('reviews', 'profiles')
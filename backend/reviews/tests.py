@@ -1,3 +1,60 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from market.tests.factories import make_user
+from users.models import Profile
+from .models import Review
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SellerRatingTests(TestCase):
+    def setUp(self):
+        self.seller = make_user('seller')
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+
+    def profile(self):
+        return Profile.objects.get(user=self.seller)
+
+    def test_rating_follows_review_create_update_delete(self):
+        first = Review.objects.create(seller=self.seller, reviewer=self.alice, rating=5, comment='great')
+        Review.objects.create(seller=self.seller, reviewer=self.bob, rating=2, comment='meh')
+        self.assertEqual((self.profile().rating_avg, self.profile().rating_count), (3.5, 2))
+
+        first.rating = 3
+        first.save()
+        self.assertEqual((self.profile().rating_avg, self.profile().rating_count), (2.5, 2))
+
+        first.delete()
+        self.assertEqual((self.profile().rating_avg, self.profile().rating_count), (2.0, 1))
+
+    def test_profile_row_is_locked_before_the_recompute(self):
+        with CaptureQueriesContext(connection) as ctx:
+            Review.objects.create(seller=self.seller, reviewer=self.alice, rating=5, comment='great')
+        profile_sql = [q['sql'] for q in ctx.captured_queries if 'users_profile' in q['sql']]
+        self.assertEqual([sql.split()[0] for sql in profile_sql], ['SELECT', 'UPDATE'])
+        if connection.features.has_select_for_update:
+            self.assertIn('FOR UPDATE', profile_sql[0])
+
+    def test_review_api_updates_profile_rating(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        response = client.post('/api/reviews/', {'seller_username': 'seller', 'rating': 4, 'comment': 'nice'})
+        self.assertEqual(response.status_code, 201)
+
+        response = client.get('/api/profiles/seller/')
+        self.assertEqual(response.data['seller_rating'], 4.0)
+        self.assertEqual(response.data['review_count'], 1)
+
+    def test_rebuild_command_repairs_drift(self):
+        Review.objects.create(seller=self.seller, reviewer=self.alice, rating=4, comment='ok')
+        Profile.objects.filter(user=self.seller).update(rating_avg=0, rating_count=0)
+
+        call_command('rebuild_seller_ratings', stdout=StringIO())
+        self.assertEqual((self.profile().rating_avg, self.profile().rating_count), (4.0, 1))
+        self.assertEqual(Profile.objects.get(user=self.alice).rating_count, 0)
@@ -1,13 +1,41 @@
+from django.db import transaction
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from .models import Review
 from .serializers import ReviewSerializer
+from config.fieldsets import SparseFieldsetMixin
+from config.response_cache import CachedResponseMixin
+from config.values_serialization import ValuesListMixin
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SparseFieldsetMixin, CachedResponseMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all().order_by('-created_at')
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    # Anonymous review listings are cached (see config/response_cache.py)
+    cached_actions = {
+        'list': ('reviews-list', ('reviews', 'profiles')),
+    }
+
+    # Per-user limit on review writes (THROTTLE_RATES, config/throttling.py)
+    throttle_scopes = {action: 'reviews' for action in ('create', 'update', 'partial_update', 'destroy')}
+
+    # ?fields= (config/fieldsets.py); lists load only the columns and joins they
+    # render, as values() rows (config/values_serialization.py)
+    def get_queryset(self):
+        return self.sparse_queryset(super().get_queryset())
+
+    # Writes are atomic so the seller's stored rating (see reviews.signals)
+    # always matches the reviews table.
+    @transaction.atomic
     def perform_create(self, serializer):
         # This is critical: We set the 'reviewer' to the logged-in user here
-        serializer.save(reviewer=self.request.user)
\ No newline at end of file
+        serializer.save(reviewer=self.request.user)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
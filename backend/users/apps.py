@@ -5,4 +5,5 @@ class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
 
-    # The ready() method is removed because signals.py is deleted.
\ No newline at end of file
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from config.response_cache import response_cache
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Rebuilds Profile.rating_avg / rating_count from scratch from the reviews table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Profiles updated per UPDATE statement (keeps row locks short).')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        user_ids = list(Profile.objects.order_by('user_id').values_list('user_id', flat=True))
+
+        updated = 0
+        for start in range(0, len(user_ids), batch_size):
+            updated += Profile.refresh_ratings(user_ids[start:start + batch_size])
+
+        response_cache.bump('profiles')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt seller ratings for {updated} profiles.'))
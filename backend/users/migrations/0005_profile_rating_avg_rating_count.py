@@ -0,0 +1,42 @@
+# Generated by Django 6.0 on 2026-10-18 11:52
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, FloatField, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_ratings(apps, schema_editor):
+    Profile = apps.get_model('users', 'Profile')
+    Review = apps.get_model('reviews', 'Review')
+
+    reviews = Review.objects.filter(seller=OuterRef('user')).order_by().values('seller')
+    Profile.objects.update(
+        rating_avg=Coalesce(
+            Subquery(reviews.annotate(avg=Avg('rating')).values('avg')),
+            Value(0.0), output_field=FloatField()),
+        rating_count=Coalesce(
+            Subquery(reviews.annotate(count=Count('pk')).values('count')),
+            Value(0), output_field=IntegerField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_profile_bio_alter_profile_avatar_and_more'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='rating_avg',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
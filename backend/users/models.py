@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Avg, Count, FloatField, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Now
 from django.contrib.auth.models import User
 
 class Profile(models.Model):
@@ -12,5 +14,54 @@ class Profile(models.Model):
     location = models.CharField(max_length=100, blank=True)
     is_verified = models.BooleanField(default=False)
 
+    # Seller rating, denormalized from reviews.Review (kept in sync by reviews.signals,
+    # rebuilt with `manage.py rebuild_seller_ratings`)
+    rating_avg = models.FloatField(default=0, db_index=True)
+    rating_count = models.PositiveIntegerField(default=0)
+
+    # Drives ETag / Last-Modified (config/conditional.py); also bumped when the
+    # ratings are refreshed or the User row changes (users.signals).
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
-        return f'{self.user.username} Profile'
\ No newline at end of file
+        return f'{self.user.username} Profile'
+
+    @property
+    def seller_rating(self):
+        return self.display_rating(self.rating_avg, self.rating_count)
+
+    @staticmethod
+    def display_rating(rating_avg, rating_count):
+        return round(rating_avg, 1) if rating_count else 0
+
+    @classmethod
+    def refresh_ratings(cls, user_ids=None):
+        """
+        Recomputes rating_avg / rating_count from the reviews table in a
+        single UPDATE. Pass user_ids to limit it to some sellers.
+
+        The profile rows are locked first, in their own statement: the
+        UPDATE then reads the reviews with a snapshot taken after any other
+        transaction refreshing the same seller has committed. Without the
+        lock, two reviews committed at the same time could each recompute
+        without the other (READ COMMITTED) and the last writer would store
+        a stale count.
+        """
+        from reviews.models import Review
+
+        reviews = Review.objects.filter(seller=OuterRef('user')).order_by().values('seller')
+        profiles = cls.objects.all()
+        if user_ids is not None:
+            profiles = profiles.filter(user_id__in=user_ids)
+
+        with transaction.atomic():
+            list(profiles.select_for_update().order_by('pk').values_list('pk', flat=True))
+            return profiles.update(
+                rating_avg=Coalesce(
+                    Subquery(reviews.annotate(avg=Avg('rating')).values('avg')),
+                    Value(0.0), output_field=FloatField()),
+                rating_count=Coalesce(
+                    Subquery(reviews.annotate(count=Count('pk')).values('count')),
+                    Value(0), output_field=IntegerField()),
+                updated_at=Now(),
+            )
@@ -0,0 +1,93 @@
+"""
+Everything the seller page shows, in one response (GET /api/profiles/<username>/page/):
+
+    {"profile": {...},                     ProfileSerializer fields, without reviews_list
+     "rating": {"average": 4.3, "count": 12,
+                "distribution": {"5": 7, "4": 3, "3": 1, "2": 1, "1": 0}},
+     "reviews": {"count": 12, "next": url, "previous": null, "results": [...]},     ?reviews_page=N
+     "listings": {"count": 30, "next": url, "previous": null, "results": [...]}}    ?listings_page=N
+
+Four queries whatever the page: the profile with its user and an
+active-listing count (subquery annotation), the rating distribution (one
+conditional aggregate, which also counts the reviews), a page of reviews
+and a page of unsold listings as compact cards. The pages are values()
+rows (config/values_serialization.py) with the reviewer / seller joined,
+and need no COUNT(*) of their own.
+
+Anonymous responses are cached per URL (so per seller and page) in the
+response cache ('profiles-page'), invalidated with the profiles, reviews
+and shoes namespaces.
+"""
+from django.conf import settings
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import NotFound
+from rest_framework.generics import get_object_or_404
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from market.models import Shoe
+from market.serializers import ShoeListSerializer
+from reviews.models import Review
+from .models import Profile
+from .serializers import ProfileListSerializer, SimpleReviewSerializer
+
+RATINGS = range(5, 0, -1)
+
+
+def seller_profile(username):
+    """The seller's Profile, with its User and `active_listings` (unsold shoes), or 404."""
+    listings = (Shoe.objects.filter(seller=OuterRef('user'), is_sold=False)
+                .order_by().values('seller').annotate(count=Count('pk')).values('count'))
+    profiles = Profile.objects.select_related('user').annotate(
+        active_listings=Coalesce(Subquery(listings), Value(0), output_field=IntegerField()))
+    return get_object_or_404(profiles, user__username=username)
+
+
+def paged(request, param, queryset, count, size, serializer):
+    """Page ?<param>=N of `queryset` (`count` rows in all), in PageNumberPagination's shape."""
+    try:
+        number = int(request.query_params.get(param, 1))
+    except ValueError:
+        raise NotFound('Invalid page.')
+    if not 1 <= number <= max(1, -(-count // size)):
+        raise NotFound('Invalid page.')
+
+    url = request.build_absolute_uri()
+    if number == 1:
+        previous = None
+    elif number == 2:
+        previous = remove_query_param(url, param)
+    else:
+        previous = replace_query_param(url, param, number - 1)
+    start = (number - 1) * size
+    return {
+        'count': count,
+        'next': replace_query_param(url, param, number + 1) if start + size < count else None,
+        'previous': previous,
+        'results': serializer.values_data(queryset[start:start + size]),
+    }
+
+
+def seller_page(request, username):
+    profile = seller_profile(username)
+    context = {'request': request, 'compact': True}  # cards, as with ?view=compact
+
+    reviews = Review.objects.filter(seller_id=profile.user_id)
+    distribution = reviews.aggregate(**{str(rating): Count('pk', filter=Q(rating=rating)) for rating in RATINGS})
+    listings = Shoe.objects.filter(seller_id=profile.user_id, is_sold=False)
+
+    return {
+        # Compact ProfileListSerializer: the profile without its reviews_list
+        'profile': ProfileListSerializer(profile, context=context).data,
+        'rating': {
+            'average': profile.seller_rating,
+            'count': profile.rating_count,
+            'distribution': distribution,
+        },
+        'reviews': paged(request, 'reviews_page', reviews.order_by('-created_at', '-pk'),
+                         sum(distribution.values()), settings.SELLER_PAGE_REVIEWS,
+                         SimpleReviewSerializer(context=context)),
+        'listings': paged(request, 'listings_page', listings.order_by('-created_at', '-pk'),
+                          profile.active_listings, settings.SELLER_PAGE_LISTINGS,
+                          ShoeListSerializer(context=context)),
+    }
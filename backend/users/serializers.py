@@ -1,17 +1,20 @@
 from rest_framework import serializers
 from .models import Profile
-from django.db.models import Avg
 from reviews.models import Review
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer, UserSerializer as BaseUserSerializer
+from config.fieldsets import SparseFieldsSerializerMixin
+from config.instrumentation import TimedListSerializer, TimedSerializerMixin
+from config.values_serialization import ValuesSerializerMixin
 
-class SimpleReviewSerializer(serializers.ModelSerializer):
+class SimpleReviewSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     reviewer_username = serializers.ReadOnlyField(source='reviewer.username')
 
     class Meta:
         model = Review
         fields = ['reviewer_username', 'rating', 'comment', 'created_at']
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(SparseFieldsSerializerMixin, ValuesSerializerMixin, TimedSerializerMixin,
+                        serializers.ModelSerializer):
     username = serializers.CharField(source='user.username')
     email = serializers.CharField(source='user.email')
     
@@ -22,32 +25,48 @@ class ProfileSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Profile
+        list_serializer_class = TimedListSerializer
         fields = [
             'user_id', 'username', 'email', 'avatar', 'location', 
             'phone_number', 'is_verified', 'seller_rating',
             'review_count', 'reviews_list','bio'
         ]
-
+        # What the method fields read, for sparse querysets (config/fieldsets.py)
+        field_sources = {
+            'seller_rating': ('rating_avg', 'rating_count'),
+            'review_count': ('rating_count',),
+            'reviews_list': ('user',),
+        }
+
+    # Both read the denormalized columns on Profile (see reviews.signals)
     def get_seller_rating(self, obj):
-        if not hasattr(obj.user, 'received_reviews'):
-            return 0
-        avg = obj.user.received_reviews.aggregate(Avg('rating'))['rating__avg']
-        return round(avg, 1) if avg else 0
+        return obj.seller_rating
 
     def get_review_count(self, obj):
-        if not hasattr(obj.user, 'received_reviews'):
-            return 0
-        return obj.user.received_reviews.count()
+        return obj.rating_count
+
+    # From values() rows on list pages (config/values_serialization.py)
+    def values_seller_rating(self, row):
+        return Profile.display_rating(row['rating_avg'], row['rating_count'])
+
+    def values_review_count(self, row):
+        return row['rating_count']
 
     def get_reviews_list(self, obj):
         if not hasattr(obj.user, 'received_reviews'):
             return []
         try:
-            reviews = obj.user.received_reviews.all().order_by('-created_at')[:10]
-            return SimpleReviewSerializer(reviews, many=True).data
+            # values() rows, not Review instances (reviewer_username is joined in)
+            reviews = obj.user.received_reviews.order_by('-created_at')[:10]
+            return SimpleReviewSerializer().values_data(reviews)
         except:
             return []
 
+# ?view=compact profile lists leave out the latest reviews (a query per profile) unless ?expand=reviews_list
+class ProfileListSerializer(ProfileSerializer):
+    class Meta(ProfileSerializer.Meta):
+        expandable_fields = ['reviews_list']
+
 # --- CUSTOM USER SERIALIZERS ---
 
 class UserCreateSerializer(BaseUserCreateSerializer):
@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from config.response_cache import response_cache
+from config.token_cache import token_cache
+from .models import Profile
+
+
+# Any change to a User (deleted via emergency_delete_view, email changed,
+# deactivated...) drops the tokens cached for them by SupabaseAuthentication.
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_tokens(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+
+
+# Usernames, avatars, locations and ratings show up in cached anonymous
+# responses (config.response_cache) for profiles, shoes and reviews.
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_cached_profile_responses(sender, **kwargs):
+    response_cache.bump('profiles')
+
+
+# Username / email are part of the profile's representation (ETag / Last-Modified)
+@receiver(post_save, sender=User)
+def touch_profile(sender, instance, **kwargs):
+    Profile.objects.filter(user=instance).update(updated_at=timezone.now())
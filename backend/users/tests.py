@@ -1,3 +1,384 @@
-from django.test import TestCase
+import asyncio
+import socket
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import exceptions
+from rest_framework.test import APIClient, APIRequestFactory
+
+from benchmarks.stub_issuer import STUB_ANON_KEY, StubIssuer
+from config import supabase_client
+from config.authentication import SupabaseAuthentication
+from config.supabase_client import SupabaseUnavailable, request_seconds, supabase_auth_client
+from config.throttling import throttle_store
+from config.token_cache import token_cache
+from market.tests.factories import make_shoe, make_user
+from reviews.models import Review
+from .models import Profile
+from .views import ProfileViewSet
+
+
+class SupabaseAuthTestCase(TestCase):
+    """Runs SupabaseAuthentication against a local stub issuer."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.issuer = StubIssuer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.issuer.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.user = User.objects.create_user(username='ana', email='ana@example.com', password='x')
+        self.factory = APIRequestFactory()
+        self.auth = SupabaseAuthentication()
+        settings_override = override_settings(
+            SUPABASE_URL=self.issuer.url,
+            SUPABASE_KEY=STUB_ANON_KEY,
+            SUPABASE_JWT_SECRET=self.issuer.secret,
+            SUPABASE_JWKS_URL=self.issuer.jwks_url,
+            SUPABASE_AUTH_MODE='local',
+            SUPABASE_AUTH_REMOTE_FALLBACK=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def authenticate(self, token):
+        request = self.factory.get('/api/shoes/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return self.auth.authenticate(request)
+
+
+class SupabaseAuthenticationTests(SupabaseAuthTestCase):
+    def test_local_hs256_token_needs_no_issuer_call(self):
+        before = self.issuer.requests
+        user, _ = self.authenticate(self.issuer.issue('ana@example.com'))
+        self.assertEqual(user, self.user)
+        self.assertEqual(self.issuer.requests, before)
+
+    def test_local_rs256_token_is_checked_against_jwks(self):
+        user, _ = self.authenticate(self.issuer.issue('ana@example.com', algorithm='RS256'))
+        self.assertEqual(user, self.user)
+
+    def test_expired_token_is_rejected(self):
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate(self.issuer.issue('ana@example.com', lifetime=-60))
+
+    def test_tampered_token_is_rejected_without_remote_fallback(self):
+        token = self.issuer.issue('ana@example.com')
+        before = self.issuer.requests
+        with override_settings(SUPABASE_AUTH_REMOTE_FALLBACK=True):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.authenticate(token[:-4] + 'AAAA')
+        self.assertEqual(self.issuer.requests, before)
+
+    def test_remote_fallback_is_opt_in(self):
+        token = self.issuer.issue('ana@example.com')
+        with override_settings(SUPABASE_JWT_SECRET=''):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.authenticate(token)
+            with override_settings(SUPABASE_AUTH_REMOTE_FALLBACK=True):
+                user, _ = self.authenticate(token)
+        self.assertEqual(user, self.user)
+
+    def test_remote_mode_asks_supabase(self):
+        before = self.issuer.requests
+        with override_settings(SUPABASE_AUTH_MODE='remote'):
+            user, _ = self.authenticate(self.issuer.issue('ana@example.com'))
+        self.assertEqual(user, self.user)
+        self.assertEqual(self.issuer.requests, before + 1)
+
+    def test_unknown_email_is_not_active(self):
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Account not fully active'):
+            self.authenticate(self.issuer.issue('ghost@example.com'))
+
+
+class TokenUserCacheTests(SupabaseAuthTestCase):
+    def test_repeated_token_skips_verification_and_lookup(self):
+        token = self.issuer.issue('ana@example.com', algorithm='RS256')
+        self.authenticate(token)
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(token)
+        self.assertEqual(user, self.user)
+
+    def test_cached_user_is_a_fresh_instance_per_request(self):
+        token = self.issuer.issue('ana@example.com')
+        first, _ = self.authenticate(token)
+        first.first_name = 'changed'
+        second, _ = self.authenticate(token)
+        self.assertEqual(second.first_name, '')
+
+    def test_deleting_user_drops_cached_token(self):
+        token = self.issuer.issue('ana@example.com')
+        self.authenticate(token)
+        self.user.delete()
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Account not fully active'):
+            self.authenticate(token)
+
+    def test_email_change_drops_cached_token(self):
+        token = self.issuer.issue('ana@example.com')
+        self.authenticate(token)
+        self.user.email = 'ana@new.example.com'
+        self.user.save()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_entry_does_not_outlive_token(self):
+        token = self.issuer.issue('ana@example.com', lifetime=1)
+        self.authenticate(token)
+        stats = token_cache.stats()
+        with override_settings(SUPABASE_AUTH_CACHE_TTL=3600):
+            time.sleep(1.1)
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.authenticate(token)
+        self.assertEqual(token_cache.stats()['local_hits'], stats['local_hits'])
+
+    def test_lru_is_bounded(self):
+        with override_settings(SUPABASE_AUTH_CACHE_SIZE=2):
+            for lifetime in (100, 200, 300):
+                self.authenticate(self.issuer.issue('ana@example.com', lifetime=lifetime))
+            self.assertLessEqual(token_cache.stats()['size'], 2)
+
+    def test_shared_tier_serves_other_workers(self):
+        token = self.issuer.issue('ana@example.com')
+        with override_settings(SUPABASE_AUTH_SHARED_CACHE='default'):
+            self.authenticate(token)
+            token_cache.clear()  # another worker: empty local tier
+            with self.assertNumQueries(0):
+                user, _ = self.authenticate(token)
+            self.assertEqual(user, self.user)
+
+            self.user.delete()
+            token_cache.clear()
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.authenticate(token)
+
+
+@override_settings(THROTTLE_RATES={'auth': '2/min', 'emergency-delete': '2/hour'}, SECURE_SSL_REDIRECT=False)
+class ThrottleTests(SupabaseAuthTestCase):
+    def setUp(self):
+        super().setUp()
+        throttle_store().clear()
+
+    def test_new_tokens_per_ip_are_limited(self):
+        first = self.issuer.issue('ana@example.com')
+        self.authenticate(first)
+        self.authenticate(self.issuer.issue('ana@example.com', lifetime=1800))
+        with self.assertRaises(exceptions.Throttled) as ctx:
+            self.authenticate(self.issuer.issue('ana@example.com', lifetime=900))
+        self.assertGreaterEqual(ctx.exception.wait, 1)
+        self.assertEqual(self.authenticate(first)[0], self.user)  # cached: not verified again
+
+    def test_emergency_delete_is_limited_per_ip(self):
+        client = APIClient()
+        for _ in range(2):
+            self.assertEqual(client.get('/api/delete-emergency/bad-token/').status_code, 400)
+        response = client.get('/api/delete-emergency/bad-token/')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(client.get('/api/delete-emergency/bad-token/', REMOTE_ADDR='10.0.0.2').status_code, 400)
+
+
+class AsyncAuthenticationTests(SupabaseAuthTestCase):
+    def aauthenticate(self, token):
+        request = self.factory.get('/api/shoes/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return async_to_sync(self.auth.aauthenticate)(request)
+
+    def test_local_tokens(self):
+        for algorithm in ('HS256', 'RS256'):
+            user, _ = self.aauthenticate(self.issuer.issue('ana@example.com', algorithm=algorithm))
+            self.assertEqual(user, self.user)
+
+    def test_remote_mode_awaits_supabase(self):
+        before = self.issuer.requests
+        with override_settings(SUPABASE_AUTH_MODE='remote'):
+            user, _ = self.aauthenticate(self.issuer.issue('ana@example.com'))
+            self.assertEqual(user, self.user)
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.aauthenticate('not-a-token')
+        self.assertEqual(self.issuer.requests, before + 2)
+
+    def test_bad_tokens_are_rejected(self):
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.aauthenticate(self.issuer.issue('ana@example.com', lifetime=-60))
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Account not fully active'):
+            self.aauthenticate(self.issuer.issue('ghost@example.com'))
+
+    @override_settings(ASYNC_READ_VIEWS=True, SECURE_SSL_REDIRECT=False)
+    def test_async_profile_view(self):
+        view = ProfileViewSet.as_view({'get': 'retrieve', 'patch': 'partial_update'})
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        self.assertFalse(asyncio.iscoroutinefunction(ProfileViewSet.as_view({'get': 'list'})))
+
+        Profile.objects.create(user=self.user, phone_number='+3850000001')
+        factory = AsyncRequestFactory()
+        token = self.issuer.issue('ana@example.com')
+        request = factory.get('/api/profiles/ana/', headers={'Authorization': f'Bearer {token}'})
+        response = async_to_sync(view)(request, user__username='ana')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], 'ana')
+
+        request = factory.get('/api/profiles/ana/', headers={'Authorization': 'Bearer not-a-token'})
+        # 403 as on the sync path (SupabaseAuthentication sends no WWW-Authenticate)
+        self.assertEqual(async_to_sync(view)(request, user__username='ana').status_code, 403)
+
+
+class SupabaseClientTests(SupabaseAuthTestCase):
+    def setUp(self):
+        super().setUp()
+        remote = override_settings(SUPABASE_AUTH_MODE='remote', SUPABASE_AUTH_CACHE_SIZE=0)
+        remote.enable()
+        self.addCleanup(remote.disable)
+        supabase_auth_client.reset()
+        self.addCleanup(supabase_auth_client.reset)
+
+    def dead_url(self):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            return f'http://127.0.0.1:{s.getsockname()[1]}'
+
+    def test_one_client_per_process(self):
+        token = self.issuer.issue('ana@example.com')
+        with mock.patch.object(supabase_client, 'create_client', wraps=supabase_client.create_client) as create:
+            self.authenticate(token)
+            self.authenticate(token)
+            self.assertEqual(create.call_count, 1)
+
+            # a forked worker must not reuse the parent's connections
+            with mock.patch('os.getpid', return_value=-1):
+                self.authenticate(token)
+            self.assertEqual(create.call_count, 2)
+
+    def test_latency_is_recorded(self):
+        before = request_seconds.value(operation='get_user', outcome='ok')
+        self.authenticate(self.issuer.issue('ana@example.com'))
+        self.assertEqual(request_seconds.value(operation='get_user', outcome='ok'), before + 1)
+
+        rejected = request_seconds.value(operation='get_user', outcome='rejected')
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate(self.issuer.issue('ana@example.com', lifetime=-60))
+        self.assertEqual(request_seconds.value(operation='get_user', outcome='rejected'), rejected + 1)
+
+    @override_settings(SUPABASE_BREAKER_FAILURES=2, SUPABASE_BREAKER_RESET_SECONDS=60)
+    def test_breaker_opens_after_consecutive_failures(self):
+        token = self.issuer.issue('ana@example.com')
+        with override_settings(SUPABASE_URL=self.dead_url()):
+            for _ in range(2):
+                with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Invalid Token'):
+                    self.authenticate(token)
+            self.assertEqual(supabase_auth_client.breaker.state, 'open')
+            with self.assertRaises(SupabaseUnavailable):
+                self.authenticate(token)
+
+    @override_settings(SUPABASE_BREAKER_FAILURES=1, SUPABASE_BREAKER_RESET_SECONDS=0)
+    def test_half_open_trial_closes_the_breaker(self):
+        breaker = supabase_auth_client.breaker
+        supabase_auth_client.client  # bind the client to the current settings
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'half-open')
+        user, _ = self.authenticate(self.issuer.issue('ana@example.com'))
+        self.assertEqual(user, self.user)
+        self.assertEqual(breaker.state, 'closed')
+
+    @override_settings(SUPABASE_BREAKER_FAILURES=1, SUPABASE_BREAKER_RESET_SECONDS=0)
+    def test_cancelled_trial_does_not_wedge_the_breaker(self):
+        breaker = supabase_auth_client.breaker
+        supabase_auth_client.client  # bind the client to the current settings
+        breaker.record_failure()
+        token = self.issuer.issue('ana@example.com')
+        with mock.patch('httpx.AsyncClient.get', side_effect=asyncio.CancelledError):
+            with self.assertRaises(asyncio.CancelledError):
+                async_to_sync(supabase_auth_client.aget_user)(token)
+        self.assertEqual(breaker.state, 'half-open')
+        self.assertTrue(async_to_sync(supabase_auth_client.aget_user)(token))
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_async_path_shares_the_breaker(self):
+        token = self.issuer.issue('ana@example.com')
+        request = self.factory.get('/api/shoes/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        with override_settings(SUPABASE_URL=self.dead_url(), SUPABASE_BREAKER_FAILURES=1):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                async_to_sync(self.auth.aauthenticate)(request)
+            with self.assertRaises(SupabaseUnavailable):
+                self.authenticate(token)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, SELLER_PAGE_REVIEWS=3, SELLER_PAGE_LISTINGS=4)
+class SellerPageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.seller = make_user('seller')
+
+    def add_listings(self, seller, count, **fields):
+        for i in range(count):
+            make_shoe(seller, title=f'Shoe {i}', price='100.00', **fields)
+
+    def add_reviews(self, seller, ratings):
+        for i, rating in enumerate(ratings):
+            Review.objects.create(seller=seller, reviewer=make_user(f'{seller.username}-fan{i}'),
+                                  rating=rating, comment='ok')
+
+    def get_page(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data
+
+    def test_page_loads_in_fixed_queries(self):
+        small = make_user('small')
+        self.add_listings(small, 1)
+        self.add_reviews(small, [4])
+        self.add_listings(self.seller, 6)
+        self.add_listings(self.seller, 2, is_sold=True)
+        self.add_reviews(self.seller, [5, 5, 4, 2, 5])
+
+        small_queries, _ = self.get_page('/api/profiles/small/page/')
+        queries, page = self.get_page('/api/profiles/seller/page/')
+        self.assertEqual(queries, small_queries)
+        self.assertEqual(queries, 4)
+
+        self.assertEqual(page['profile']['username'], 'seller')
+        self.assertNotIn('reviews_list', page['profile'])
+        self.assertEqual(page['rating'], {'average': 4.2, 'count': 5,
+                                          'distribution': {'5': 3, '4': 1, '3': 0, '2': 1, '1': 0}})
+        self.assertEqual((page['reviews']['count'], len(page['reviews']['results'])), (5, 3))
+        self.assertEqual(page['reviews']['results'][0]['reviewer_username'], 'seller-fan4')
+        self.assertIn('reviews_page=2', page['reviews']['next'])
+        self.assertEqual((page['listings']['count'], len(page['listings']['results'])), (6, 4))
+        self.assertNotIn('images', page['listings']['results'][0])
+
+        _, last = self.get_page('/api/profiles/seller/page/?listings_page=2&reviews_page=2')
+        self.assertEqual(len(last['listings']['results']), 2)
+        self.assertIsNone(last['listings']['next'])
+        self.assertNotIn('listings_page', last['listings']['previous'])
+        self.assertEqual(self.client.get('/api/profiles/seller/page/?reviews_page=3').status_code, 404)
+        self.assertEqual(self.client.get('/api/profiles/nobody/page/').status_code, 404)
+
+    @override_settings(RESPONSE_CACHE_ENDPOINTS=['profiles-page'])
+    def test_page_is_cached_until_reviews_or_listings_change(self):
+        self.add_listings(self.seller, 1)
+        self.get_page('/api/profiles/seller/page/')
+        queries, _ = self.get_page('/api/profiles/seller/page/')
+        self.assertEqual(queries, 0)
+
+        self.add_listings(self.seller, 1)
+        _, page = self.get_page('/api/profiles/seller/page/')
+        self.assertEqual(page['listings']['count'], 2)
+
+        self.add_reviews(self.seller, [3])
+        _, page = self.get_page('/api/profiles/seller/page/')
+        self.assertEqual(page['rating']['count'], 1)
+        self.assertEqual(len(page['reviews']['results']), 1)
 
-# Create your tests here.
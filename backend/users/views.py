@@ -1,32 +1,101 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, filters
 from .models import Profile
-from .serializers import ProfileSerializer
+from .serializers import ProfileListSerializer, ProfileSerializer
 from .permissions import IsOwnerOrReadOnly
 from django.http import HttpResponse
 from django.core.signing import TimestampSigner, BadSignature, SignatureExpired
 from django.contrib.auth.models import User
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import IsAuthenticated
 from .serializers import ManageProfileSerializer
+from .seller_page import seller_page
+from django.db.models import Count, Max
+from market.models import ArchivedShoe
+from market.serializers import ArchivedShoeSerializer
+from config.async_views import AsyncReadMixin
+from config.conditional import ConditionalGetMixin
+from config.fieldsets import SparseFieldsetMixin
+from config.response_cache import CachedResponseMixin
+from config.throttling import ClientThrottle, EndpointThrottle
+from config.values_serialization import ValuesListMixin
 # CRITICAL: Must be ModelViewSet (allows editing), NOT ReadOnlyModelViewSet
 
 
-class ProfileViewSet(viewsets.ModelViewSet):
-    queryset = Profile.objects.all()
+class ProfileViewSet(AsyncReadMixin, SparseFieldsetMixin, ConditionalGetMixin, CachedResponseMixin, ValuesListMixin,
+                     viewsets.ModelViewSet):
+    queryset = Profile.objects.select_related('user')
     serializer_class = ProfileSerializer
     permission_classes = [IsOwnerOrReadOnly]
     lookup_field = 'user__username'
 
+    # Served by async views under ASGI (see config/async_views.py)
+    async_read_actions = ('retrieve', 'seller_page')
+
+    # Anonymous profile pages are cached (see config/response_cache.py);
+    # they embed the latest reviews, hence the 'reviews' namespace. The
+    # seller page also lists the seller's shoes.
+    cached_actions = {
+        'retrieve': ('profiles-detail', ('profiles', 'reviews')),
+        'seller_page': ('profiles-page', ('profiles', 'reviews', 'shoes')),
+    }
+
+    # Seller rating is a stored column, so sorting by it is cheap (?ordering=-rating_avg)
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['rating_avg', 'rating_count']
+
+    # ?fields= / ?view=compact / ?expand= (config/fieldsets.py); compact lists
+    # leave out reviews_list and are rendered from values() rows
+    # (config/values_serialization.py)
+    def get_serializer_class(self):
+        return ProfileListSerializer if self.action == 'list' else ProfileSerializer
+
+    def get_queryset(self):
+        return self.sparse_queryset(super().get_queryset())
+
     # We explicitly allow 'patch' here so the frontend can update data
     http_method_names = ['get', 'patch', 'head', 'options']
 
+    # ETag / Last-Modified (config/conditional.py). Profile.updated_at also
+    # moves when the seller's reviews or User row change.
+    def get_validators(self, request):
+        if self.action == 'retrieve':
+            row = (Profile.objects.filter(user__username=self.kwargs['user__username'])
+                   .values_list('pk', 'updated_at').first())
+            return (row, row[1]) if row else None
+        if self.action == 'list':
+            stats = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+                count=Count('pk'), last=Max('updated_at'))
+            return (stats['count'], stats['last']), stats['last']
+        return None
+
+    # Profile, rating stats, reviews and listings in one request (users/seller_page.py)
+    @action(detail=True, methods=['get'], url_path='page', permission_classes=[AllowAny])
+    def seller_page(self, request, user__username=None):
+        return self.cached_response(request, lambda: Response(seller_page(request, user__username)))
+
+    # Sold / stale listings moved out of the live Shoe table (market/archive.py)
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    def archived_shoes(self, request, user__username=None):
+        shoes = (ArchivedShoe.objects.filter(seller__username=user__username)
+                 .select_related('seller__profile').order_by('-archived_at'))
+        page = self.paginate_queryset(shoes)
+        context = self.get_serializer_context()
+        if page is not None:
+            return self.get_paginated_response(ArchivedShoeSerializer(page, many=True, context=context).data)
+        return Response(ArchivedShoeSerializer(shoes, many=True, context=context).data)
+
+
+class EmergencyDeleteThrottle(EndpointThrottle):
+    scope = 'emergency-delete'
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@throttle_classes([ClientThrottle, EmergencyDeleteThrottle])
 def emergency_delete_view(request, token):
     signer = TimestampSigner()
     try:
@@ -226,7 +226,7 @@ const Home = () => {
                             <div key={shoe.id} className="product-card" style={{animationDelay: `${index * 0.05}s`}}>
                                 <Link to={`/shoes/${shoe.id}`} style={{ display: 'block', textDecoration: 'none' }}>
                                     <div style={imageContainerStyle}>
-                                        <img src={shoe.image} alt={shoe.title} style={imageStyle} className="product-image" />
+                                        <img src={shoe.renditions?.card || shoe.image} alt={shoe.title} style={imageStyle} className="product-image" loading="lazy" />
                                     </div>
                                     <div style={{ padding: '15px 0', textAlign: 'center' }}>
                                         <p style={brandStyle}>{shoe.brand}</p>
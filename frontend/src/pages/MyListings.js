@@ -84,7 +84,7 @@ const MyListings = () => {
               {/* Image Area */}
               <Link to={`/shoes/${shoe.id}`} style={{textDecoration:'none', display:'block'}}>
                 <div style={styles.imageContainer}>
-                    <img src={shoe.image} alt={shoe.title} style={styles.image} className="product-image" />
+                    <img src={shoe.renditions?.card || shoe.image} alt={shoe.title} style={styles.image} className="product-image" />
                 </div>
               </Link>
 
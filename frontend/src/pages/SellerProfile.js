@@ -7,6 +7,7 @@ const SellerProfile = () => {
   const { username } = useParams();
   const { user } = useContext(AuthContext); 
   const [profile, setProfile] = useState(null);
+  const [listings, setListings] = useState([]);
   const [loading, setLoading] = useState(true);
 
   // --- REVIEW FORM STATE ---
@@ -15,10 +16,12 @@ const SellerProfile = () => {
   const [comment, setComment] = useState('');
   const [reviewLoading, setReviewLoading] = useState(false);
 
+  // Profile, reviews and listings in one request
   const fetchProfile = useCallback(() => {
-    api.get(`/api/profiles/${username}/`)
+    api.get(`/api/profiles/${username}/page/`)
       .then(res => {
-        setProfile(res.data);
+        setProfile({ ...res.data.profile, reviews_list: res.data.reviews.results });
+        setListings(res.data.listings.results);
         setLoading(false);
       })
       .catch(err => {
@@ -181,6 +184,23 @@ const SellerProfile = () => {
             </div>
         )}
 
+        {/* --- LISTINGS --- */}
+        {listings.length > 0 && (
+            <>
+                <h2 style={sectionTitle}>LISTINGS</h2>
+                <div style={listingGrid}>
+                    {listings.map(shoe => (
+                        <Link key={shoe.id} to={`/shoes/${shoe.id}`} style={listingCard}>
+                            <img src={shoe.renditions?.card || shoe.image} alt={shoe.title} style={listingImage} loading="lazy" />
+                            <div style={{ fontWeight: 'bold', marginTop: '8px' }}>{shoe.title}</div>
+                            <div style={{ color: '#888' }}>{shoe.price} {shoe.currency}</div>
+                        </Link>
+                    ))}
+                </div>
+                <div style={divider}></div>
+            </>
+        )}
+
         {/* --- REVIEWS LIST --- */}
         <h2 style={sectionTitle}>REVIEWS ({profile.review_count || 0})</h2>
 
@@ -233,6 +253,10 @@ const btnStyle = { textDecoration: 'none', backgroundColor: '#f5f5f5', color: '#
 const divider = { height: '1px', backgroundColor: '#eee', margin: '40px 0' };
 const sectionTitle = { fontFamily: '"Bebas Neue", sans-serif', fontSize: '2rem', marginBottom: '20px' };
 
+const listingGrid = { display: 'grid', gridTemplateColumns: 'repeat(auto-fill, minmax(170px, 1fr))', gap: '20px' };
+const listingCard = { textDecoration: 'none', color: '#111', fontSize: '0.9rem' };
+const listingImage = { width: '100%', aspectRatio: '1 / 1', objectFit: 'cover', backgroundColor: '#f5f5f5' };
+
 const reviewCard = { backgroundColor: '#fafafa', padding: '20px', border: '1px solid #eee', borderRadius: '4px' };
 const reviewFormCard = { backgroundColor: '#fff', border: '2px solid #b75784', padding: '20px', marginBottom: '40px' };
 const inputStyle = { width: '100%', padding: '10px', border: '1px solid #ddd', fontFamily: 'Lato' };
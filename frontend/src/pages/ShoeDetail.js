@@ -24,11 +24,12 @@ const ShoeDetail = () => {
         setShoe(res.data);
         
         // --- FIX: REMOVE DUPLICATES ---
-        const mainImg = res.data.image;
+        // Resized renditions (falls back to the original upload)
+        const mainImg = res.data.renditions?.full || res.data.image;
         
         // 1. Get gallery images (if any)
         const galleryImgs = (res.data.images && Array.isArray(res.data.images)) 
-            ? res.data.images.map(imgObj => imgObj.image) 
+            ? res.data.images.map(imgObj => imgObj.renditions?.full || imgObj.image) 
             : [];
 
         // 2. Create a Set to automatically remove duplicate URLs
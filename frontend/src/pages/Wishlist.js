@@ -54,7 +54,7 @@ const Wishlist = () => {
                     
                     <div style={imageContainerStyle}>
                         <img 
-                            src={shoe.image} 
+                            src={shoe.renditions?.card || shoe.image} 
                             alt={shoe.title} 
                             className="product-image"
                             style={imageStyle} 